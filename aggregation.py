@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import logging
+import time
+from typing import Dict, List, Optional
+
+from dataset_cache import LRUCache, file_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Categorical columns with more distinct values than this are not pre-aggregated
+MAX_CUBE_CARDINALITY = 200
+
+# Statistics stored for every (categorical, numeric) pair
+CUBE_STATS = ['count', 'sum', 'sumsq', 'min', 'max']
+
+_cube_cache = LRUCache(max_entries=32)
+
+
+class AggregationCube:
+    """
+    Pre-aggregated group-by statistics for a dataset.
+
+    For every low-cardinality categorical column the cube stores the row count
+    per category and, for every numeric column, count / sum / sum of squares /
+    min / max per category. Means, variances and top-N rankings are derived
+    from those without touching the raw rows again.
+    """
+
+    def __init__(self, sizes: Dict[str, pd.Series], stats: Dict[str, pd.DataFrame],
+                 numeric_columns: List[str]):
+        """
+        Initialize the cube.
+
+        Args:
+            sizes: Row count per category, keyed by categorical column
+            stats: Per-category statistics keyed by categorical column; columns
+                are a (numeric column, statistic) MultiIndex
+            numeric_columns: Numeric columns covered by the cube
+        """
+        self.sizes = sizes
+        self.stats = stats
+        self.numeric_columns = numeric_columns
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, max_cardinality: int = MAX_CUBE_CARDINALITY) -> 'AggregationCube':
+        """
+        Build a cube from a dataframe in one grouped pass per categorical column.
+
+        Args:
+            df: Pandas DataFrame
+            max_cardinality: Skip categorical columns with more distinct values
+
+        Returns:
+            AggregationCube
+        """
+        start = time.perf_counter()
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+        numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+
+        sizes = {}
+        stats = {}
+        numeric = df[numeric_cols]
+        squares = numeric ** 2
+
+        for cat_col in categorical_cols:
+            if df[cat_col].nunique() > max_cardinality:
+                logger.debug("Skipping high-cardinality column '%s' for aggregation cube", cat_col)
+                continue
+
+            keys = df[cat_col]
+            grouped = numeric.groupby(keys, sort=False, observed=True)
+            sizes[cat_col] = keys.groupby(keys, sort=False, observed=True).size()
+
+            if numeric_cols:
+                agg = grouped.agg(['count', 'sum', 'min', 'max'])
+                sumsq = squares.groupby(keys, sort=False, observed=True).sum()
+                sumsq.columns = pd.MultiIndex.from_product([sumsq.columns, ['sumsq']])
+                stats[cat_col] = pd.concat([agg, sumsq], axis=1)
+
+        logger.info(f"Built aggregation cube for {len(sizes)} categorical x {len(numeric_cols)} numeric columns "
+                    f"in {time.perf_counter() - start:.3f}s")
+        return cls(sizes, stats, numeric_cols)
+
+    @classmethod
+    def merge(cls, cubes: List['AggregationCube']) -> 'AggregationCube':
+        """
+        Combine cubes built from separate files into the cube of their union.
+
+        Counts and sums add up, minimums and maximums combine, and categories
+        keep their order of first appearance across the cubes, which matches a
+        cube built from the concatenated files.
+
+        Args:
+            cubes: Cubes to combine, in file order
+
+        Returns:
+            AggregationCube
+        """
+        numeric_cols = list(dict.fromkeys(col for cube in cubes for col in cube.numeric_columns))
+        categorical_cols = list(dict.fromkeys(cat_col for cube in cubes for cat_col in cube.sizes))
+
+        sizes = {}
+        stats = {}
+        for cat_col in categorical_cols:
+            parts = [cube.sizes[cat_col] for cube in cubes if cat_col in cube.sizes]
+            sizes[cat_col] = pd.concat(parts).groupby(level=0, sort=False).sum()
+
+            stat_parts = [cube.stats[cat_col] for cube in cubes if cat_col in cube.stats]
+            if not stat_parts:
+                continue
+            combined = pd.concat(stat_parts)
+            grouped = combined.groupby(level=0, sort=False)
+            merged = grouped.sum()
+            for how in ('min', 'max'):
+                cols = [col for col in combined.columns if col[1] == how]
+                merged[cols] = getattr(grouped, how)()[cols]
+            count_cols = [col for col in combined.columns if col[1] == 'count']
+            merged[count_cols] = merged[count_cols].astype(int)
+            stats[cat_col] = merged
+
+        return cls(sizes, stats, numeric_cols)
+
+    def has(self, cat_col: str, num_col: Optional[str] = None) -> bool:
+        """Check whether the cube covers a categorical (and optional numeric) column."""
+        if cat_col not in self.sizes:
+            return False
+        return num_col is None or num_col in self.numeric_columns
+
+    def counts(self, cat_col: str) -> pd.Series:
+        """
+        Get row counts per category, largest first (same order as ``value_counts``).
+
+        Args:
+            cat_col: Categorical column
+
+        Returns:
+            Series of counts indexed by category
+        """
+        return self.sizes[cat_col].sort_values(ascending=False, kind='stable')
+
+    def aggregate(self, cat_col: str, num_col: str, how: str = 'mean') -> pd.Series:
+        """
+        Get a per-category aggregate of a numeric column.
+
+        Args:
+            cat_col: Categorical column to group by
+            num_col: Numeric column to aggregate
+            how: One of count, sum, mean, min, max, var, std
+
+        Returns:
+            Series indexed by category
+        """
+        col_stats = self.stats[cat_col][num_col]
+        count = col_stats['count']
+
+        if how in ('count', 'sum', 'min', 'max'):
+            result = col_stats[how]
+            if how in ('min', 'max'):
+                result = result.where(count > 0)
+            return result
+        if how == 'mean':
+            return col_stats['sum'] / count.where(count > 0)
+        if how in ('var', 'std'):
+            # Sample variance from the moment sums
+            mean = col_stats['sum'] / count.where(count > 0)
+            var = (col_stats['sumsq'] - count * mean ** 2) / (count - 1).where(count > 1)
+            var = var.clip(lower=0)
+            return np.sqrt(var) if how == 'std' else var
+
+        raise ValueError(f"Unsupported aggregation: {how}")
+
+
+def get_cube(df: pd.DataFrame, file_path: Optional[str] = None) -> AggregationCube:
+    """
+    Get the aggregation cube for a dataframe, reusing a cached one when possible.
+
+    Cubes are cached per file contents and column layout, so every chart for
+    the same dataset is answered from a single build.
+
+    Args:
+        df: Pandas DataFrame
+        file_path: Path of the file the dataframe was loaded from, if any
+
+    Returns:
+        AggregationCube
+    """
+    file_key = file_cache_key(file_path) if file_path else None
+    if file_key is None:
+        return AggregationCube.from_dataframe(df)
+
+    # Different loaders may infer different dtypes for the same file
+    layout = tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+    return _cube_cache.get_or_create((file_key, layout, len(df)), lambda: AggregationCube.from_dataframe(df))
@@ -2,15 +2,13 @@ import os
 import json
 import logging
 import traceback
-import requests
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+from typing import Dict, Iterator, List, Any, Optional
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Previous messages sent verbatim with a question; older ones reach the model through the rolling summary
+HISTORY_MESSAGES = 8
+
 def get_ai_instance(api_key=None):
     """
     Factory function to get an AI client instance.
@@ -42,6 +40,10 @@ class OpenRouterAI:
             logger.error("No OpenRouter API key available")
 
         try:
+            # Imported here: the SDK takes longer to import than the rest of the
+            # app, and processes that never call the AI shouldn't pay for it
+            from openai import OpenAI
+
             # Initialize the OpenAI client with OpenRouter base URL
             self.client = OpenAI(
                 base_url="https://openrouter.ai/api/v1",
@@ -74,7 +76,9 @@ class OpenRouterAI:
                 return "AI service is not properly initialized. Please check your configuration."
 
             logger.info("Generating initial data analysis")
-            logger.debug(f"Data summary for analysis: {json.dumps(data_summary, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                # Pretty-printing a large summary is costly, so only do it when it will be logged
+                logger.debug("Data summary for analysis: %s", json.dumps(data_summary, indent=2))
 
             # Create a prompt that instructs the AI to analyze the data summary
             prompt = f"""
@@ -102,7 +106,8 @@ class OpenRouterAI:
             logger.error(traceback.format_exc())
             return "I'm unable to analyze this data at the moment. Please try again later."
 
-    def chat(self, user_message: str, chat_history: List[Dict[str, str]] = None, file_data: Dict[str, Any] = None) -> str:
+    def chat(self, user_message: str, chat_history: List[Dict[str, str]] = None, file_data: Dict[str, Any] = None,
+             summary: Optional[str] = None) -> str:
         """
         Generate a response to a user message.
         
@@ -110,6 +115,7 @@ class OpenRouterAI:
             user_message: The user's message
             chat_history: Optional list of previous messages
             file_data: Optional data from uploaded files
+            summary: Optional summary of the conversation before ``chat_history``
             
         Returns:
             AI-generated response
@@ -120,9 +126,82 @@ class OpenRouterAI:
         if file_data is None:
             file_data = {}
             
-        return self.answer_question(user_message, file_data, chat_history)
+        return self.answer_question(user_message, file_data, chat_history, summary)
+
+    def stream_chat(self, user_message: str, chat_history: List[Dict[str, str]] = None,
+                    file_data: Dict[str, Any] = None, summary: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate a response to a user message, yielding it as it is produced.
+        
+        Args:
+            user_message: The user's message
+            chat_history: Optional list of previous messages
+            file_data: Optional data from uploaded files
+            summary: Optional summary of the conversation before ``chat_history``
+            
+        Yields:
+            Fragments of the AI-generated response
+        """
+        return self.stream_answer(user_message, file_data or {}, chat_history or [], summary)
+
+    def _question_messages(self, question: str, data_context: Dict[str, Any],
+                           chat_history: List[Dict[str, str]], summary: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Build the chat completion messages for a question about the user's data.
+
+        Args:
+            question: The user's question
+            data_context: Context about the data being analyzed
+            chat_history: Previous messages in the conversation
+            summary: Summary of the conversation before ``chat_history``
+
+        Returns:
+            List of role/content messages
+        """
+        # Format the chat history for context
+        messages = []
+
+        # Include system message with context
+        system_message = f"""
+        You are DataHub's expert data analyst assistant. You provide clear, direct, and actionable answers.
+
+        DATA CONTEXT:
+        {json.dumps(data_context, indent=2)}
+
+        GUIDELINES:
+        1. Be concise and focused - users prefer shorter, precise answers
+        2. Use markdown formatting (bold, bullet points) for better readability
+        3. When showing data, present it in clearly formatted tables/lists
+        4. If suggesting actions, make them specific and actionable
+        5. When answering "how to" questions, provide step-by-step instructions
+        6. Always relate your answers to the specific data uploaded by the user
+        7. Never mention your knowledge cutoff - simply use the data context available to you
+        8. If asked for a visualization, suggest our platform's specific chart types (bar_chart, line_chart, pie_chart, etc.)
+
+        If you cannot answer based on the available data, clearly state what information is missing.
+        """
+
+        messages.append({"role": "system", "content": system_message})
+
+        # Earlier turns that no longer fit in the history window
+        if summary:
+            messages.append({"role": "system", "content": f"SUMMARY OF THE CONVERSATION SO FAR:\n{summary}"})
 
-    def answer_question(self, question: str, data_context: Dict[str, Any] = None, chat_history: List[Dict[str, str]] = None) -> str:
+        # Add chat history if available
+        if chat_history:
+            for msg in chat_history[-HISTORY_MESSAGES:]:  # Include the most recent messages for context
+                if msg.get("role") in ["user", "assistant"]:
+                    messages.append({
+                        "role": msg.get("role"),
+                        "content": msg.get("content", "")
+                    })
+
+        # Add the current question
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def answer_question(self, question: str, data_context: Dict[str, Any] = None, chat_history: List[Dict[str, str]] = None,
+                        summary: Optional[str] = None) -> str:
         """
         Answer a user question about their data.
 
@@ -130,6 +209,7 @@ class OpenRouterAI:
             question: The user's question
             data_context: Context about the data being analyzed
             chat_history: Previous messages in the conversation
+            summary: Summary of the conversation before ``chat_history``
 
         Returns:
             str: The AI's response to the question
@@ -146,44 +226,9 @@ class OpenRouterAI:
 
             logger.info(f"Answering question: {question}")
 
-            # Format the chat history for context
-            messages = []
-
-            # Include system message with context
-            system_message = f"""
-            You are DataHub's expert data analyst assistant. You provide clear, direct, and actionable answers.
+            messages = self._question_messages(question, data_context, chat_history, summary)
 
-            DATA CONTEXT:
-            {json.dumps(data_context, indent=2)}
-
-            GUIDELINES:
-            1. Be concise and focused - users prefer shorter, precise answers
-            2. Use markdown formatting (bold, bullet points) for better readability
-            3. When showing data, present it in clearly formatted tables/lists
-            4. If suggesting actions, make them specific and actionable
-            5. When answering "how to" questions, provide step-by-step instructions
-            6. Always relate your answers to the specific data uploaded by the user
-            7. Never mention your knowledge cutoff - simply use the data context available to you
-            8. If asked for a visualization, suggest our platform's specific chart types (bar_chart, line_chart, pie_chart, etc.)
-
-            If you cannot answer based on the available data, clearly state what information is missing.
-            """
-
-            messages.append({"role": "system", "content": system_message})
-
-            # Add chat history if available
-            if chat_history:
-                for msg in chat_history[-8:]:  # Include last 8 messages for context
-                    if msg.get("role") in ["user", "assistant"]:
-                        messages.append({
-                            "role": msg.get("role"),
-                            "content": msg.get("content", "")
-                        })
-
-            # Add the current question
-            messages.append({"role": "user", "content": question})
-
-            logger.debug(f"Sending {len(messages)} messages to AI")
+            logger.debug("Sending %s messages to AI", len(messages))
 
             # Get response using the chat completion API
             completion = self.client.chat.completions.create(
@@ -206,6 +251,65 @@ class OpenRouterAI:
             logger.error(traceback.format_exc())
             return f"I'm unable to process your question at the moment. Error: {str(e)}"
 
+    def stream_answer(self, question: str, data_context: Dict[str, Any] = None,
+                      chat_history: List[Dict[str, str]] = None, summary: Optional[str] = None) -> Iterator[str]:
+        """
+        Answer a user question about their data, yielding tokens as they arrive.
+
+        Uses a streaming chat completion, so the first fragment is available
+        after the model's time-to-first-token instead of the full generation.
+        Errors are reported as a final fragment, like ``answer_question`` does.
+
+        Args:
+            question: The user's question
+            data_context: Context about the data being analyzed
+            chat_history: Previous messages in the conversation
+            summary: Summary of the conversation before ``chat_history``
+
+        Yields:
+            str: Fragments of the AI's response
+        """
+        if not self.client:
+            yield "AI service is not properly initialized. Please check your configuration."
+            return
+
+        logger.info(f"Streaming answer to question: {question}")
+        messages = self._question_messages(question, data_context or {}, chat_history or [], summary)
+        logger.debug("Sending %s messages to AI", len(messages))
+
+        stream = None
+        try:
+            stream = self.client.chat.completions.create(
+                extra_headers={
+                    "HTTP-Referer": self.http_referer,
+                    "X-Title": self.site_name,
+                },
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000,
+                stream=True
+            )
+
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    yield token
+
+            logger.info("Successfully streamed AI response")
+
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            logger.error(traceback.format_exc())
+            yield f"I'm unable to process your question at the moment. Error: {str(e)}"
+
+        finally:
+            # Release the HTTP connection if the client went away mid-stream
+            if stream is not None:
+                stream.close()
+
     def suggest_visualizations(self, data_summary: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Suggest appropriate visualizations based on the data.
@@ -248,7 +352,7 @@ class OpenRouterAI:
             """
 
             response = self.generate_response(prompt)
-            logger.debug(f"Raw visualization suggestion response: {response}")
+            logger.debug("Raw visualization suggestion response: %s", response)
 
             # Clean the response to ensure it's valid JSON
             # Remove any markdown code block markers or extra text
@@ -278,6 +382,56 @@ class OpenRouterAI:
                 {"type": "pie_chart", "title": "Data Distribution", "description": "See breakdown of categories"}
             ]
 
+    def summarize_conversation(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        Fold older messages of a conversation into its running summary.
+
+        Unlike the other methods, failures are raised rather than returned as
+        text, so an error message never ends up stored as the summary.
+
+        Args:
+            summary: The current summary, empty for the first update
+            messages: Role/content messages following the current summary
+
+        Returns:
+            str: The updated summary
+
+        Raises:
+            RuntimeError: If the AI client is not initialized
+        """
+        if not self.client:
+            raise RuntimeError("AI service is not properly initialized.")
+
+        transcript = "\n".join(
+            f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')[:2000]}"
+            for msg in messages
+        )
+        prompt = f"""
+        You maintain a running summary of a conversation between a user and a data analyst assistant.
+
+        CURRENT SUMMARY:
+        {summary or '(none yet)'}
+
+        NEW MESSAGES:
+        {transcript}
+
+        Rewrite the summary so it also covers the new messages. Keep the user's goals, the datasets
+        and columns discussed, figures and conclusions reached, and any open questions.
+        Use concise bullet points and at most 250 words. Reply with the summary only.
+        """
+
+        completion = self.client.chat.completions.create(
+            extra_headers={
+                "HTTP-Referer": self.http_referer,
+                "X-Title": self.site_name,
+            },
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=600
+        )
+        return completion.choices[0].message.content.strip()
+
     def generate_response(self, prompt: str) -> str:
         """
         Send a prompt to the OpenRouter API and get a response.
@@ -292,7 +446,7 @@ class OpenRouterAI:
             if not self.client:
                 return "AI service is not properly initialized."
 
-            logger.debug(f"Sending prompt to AI: {prompt[:100]}...")
+            logger.debug("Sending prompt to AI: %s...", prompt[:100])
 
             completion = self.client.chat.completions.create(
                 extra_headers={
@@ -306,7 +460,7 @@ class OpenRouterAI:
             )
 
             response = completion.choices[0].message.content
-            logger.debug(f"Received AI response: {response[:100]}...")
+            logger.debug("Received AI response: %s...", response[:100])
             return response
 
         except Exception as e:
@@ -1,28 +1,24 @@
 import os
+import time
 import logging
+import importlib
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-# Try to load environment variables from .env file
+from logging_config import configure_logging
+
+# Load environment variables from a .env file when python-dotenv is installed
 try:
     from dotenv import load_dotenv
     load_dotenv()
-    print("Loaded environment variables from .env file")
 except ImportError:
-    print("python-dotenv not installed. Install with: pip install python-dotenv")
-except Exception as e:
-    print(f"Error loading .env file: {e}")
-
-# Print environment variables for debugging
-print(f"DATABASE_URL environment variable: {os.environ.get('DATABASE_URL')}")
-print(f"SESSION_SECRET environment variable: {os.environ.get('SESSION_SECRET')}")
+    pass
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Set up logging: levels and sampling come from LOG_LEVEL, LOG_LEVELS and LOG_SAMPLE
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Setup SQLAlchemy base class
@@ -33,8 +29,21 @@ class Base(DeclarativeBase):
 db = SQLAlchemy(model_class=Base)
 login_manager = LoginManager()
 
-def create_app():
-    """Create and configure the Flask application."""
+# Modules that are slow to import and only used by some requests. A server
+# that forks workers imports them once in the parent (see ``preload_modules``).
+DEFERRED_MODULES = ('openai', 'markdown')
+
+def create_app(job_workers=None, start=True):
+    """
+    Create and configure the Flask application.
+    
+    Args:
+        job_workers: Background job worker threads to start in this process;
+            defaults to the JOB_WORKER_THREADS setting
+        start: Start the background services right away. A server that
+            loads the app before forking workers passes False and calls
+            ``start_services`` in each worker instead.
+    """
     app = Flask(__name__)
     
     # Configure the application
@@ -65,12 +74,65 @@ def create_app():
     from routes import main
     app.register_blueprint(main)
     
+    # Minified, fingerprinted JS and CSS for templates (asset_url)
+    from assets import init_assets
+    init_assets(app)
+    
     with app.app_context():
-        # Import models to ensure tables are created
-        import models
-        
-        # Create all tables
-        db.create_all()
-        logger.info("Database tables created")
+        logger.info(f"Using database {db.engine.url.render_as_string(hide_password=True)}")
+        # Create missing tables and apply pending schema migrations
+        from migrations import upgrade
+        upgrade()
+    
+    if start:
+        start_services(app, job_workers)
     
     return app
+
+def preload_modules():
+    """
+    Import the modules in ``DEFERRED_MODULES``.
+    
+    Called in a server's parent process so forked workers share the
+    imported code instead of each importing it on its first request.
+    """
+    for name in DEFERRED_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {str(e)}")
+
+def start_services(app, job_workers=None):
+    """
+    Start the background services of a process that serves requests.
+    
+    Warms the chart and PDF render pools so the first export doesn't wait
+    for matplotlib and WeasyPrint to load, and starts the embedded job
+    workers. Pools and threads don't survive a fork, so this runs once per
+    worker process, after forking.
+    
+    Args:
+        app: Flask application
+        job_workers: Background job worker threads to start; defaults to
+            the JOB_WORKER_THREADS setting
+    """
+    started = time.perf_counter()
+    
+    # No-op unless this process was forked from the one that set up logging
+    configure_logging()
+    
+    # Start chart rendering workers so report exports don't pay matplotlib's startup cost
+    from chart_renderer import chart_renderer
+    chart_renderer.warm()
+    
+    # Same for report PDFs, with WeasyPrint imported ahead of the first download
+    from pdf_renderer import pdf_renderer
+    pdf_renderer.warm()
+    
+    # Run queued background jobs (report generation, PDF exports) in this process if configured
+    from jobs import start_embedded_workers
+    if job_workers is None:
+        job_workers = app.config.get('JOB_WORKER_THREADS', 0)
+    start_embedded_workers(app, job_workers)
+    
+    logger.info(f"Services of process {os.getpid()} started in {time.perf_counter() - started:.2f}s")
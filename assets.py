@@ -0,0 +1,358 @@
+import os
+import re
+import json
+import gzip
+import hashlib
+import logging
+import argparse
+from typing import Dict, Optional
+
+from flask import url_for
+
+from logging_config import configure_logging
+
+# Optional compression - gzip copies are always written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DEFAULT_BUILD_DIR = os.path.join(BASE_DIR, 'cache', 'assets')
+MANIFEST_NAME = 'manifest.json'
+
+# Static files that go through the build, by extension
+ASSET_EXTENSIONS = ('.js', '.css')
+
+# Fingerprinted files never change, so browsers may keep them for a year without revalidating
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Keywords after which a slash starts a regular expression rather than a division
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void',
+                   'throw', 'instanceof', 'yield', 'await'}
+
+# Manifest of the running app: source path -> fingerprinted path
+_manifest = {}
+
+
+def minify_js(source: str) -> str:
+    """
+    Minify JavaScript conservatively.
+
+    Removes comments, indentation, blank lines and repeated spaces. Line
+    breaks between statements are kept, so automatic semicolon insertion
+    behaves exactly as in the source, and string, template and regular
+    expression literals are copied untouched.
+
+    Args:
+        source: JavaScript source
+
+    Returns:
+        Minified source
+    """
+    out = []
+    i, n = 0, len(source)
+    # Open template literals; each entry counts the braces opened inside its current ${...}
+    templates = []
+    last = ''  # Last significant code token, to tell a regex from a division
+
+    def regex_allowed():
+        if not last:
+            return True
+        if last in _REGEX_KEYWORDS:
+            return True
+        return not (last[-1].isalnum() or last[-1] in '_$)]}"\'`')
+
+    while i < n:
+        ch = source[i]
+
+        # Text of a template literal, outside ${...}
+        if templates and templates[-1] is None:
+            if ch == '\\':
+                out.append(source[i:i + 2])
+                i += 2
+            elif ch == '`':
+                out.append(ch)
+                templates.pop()
+                last = '`'
+                i += 1
+            elif source.startswith('${', i):
+                out.append('${')
+                templates[-1] = 0
+                last = '{'
+                i += 2
+            else:
+                out.append(ch)
+                i += 1
+            continue
+
+        if ch in ' \t\r\n':
+            start = i
+            while i < n and source[i] in ' \t\r\n':
+                i += 1
+            if not out or out[-1].endswith('\n'):
+                continue
+            out.append('\n' if '\n' in source[start:i] else ' ')
+            continue
+
+        if source.startswith('//', i):
+            while i < n and source[i] != '\n':
+                i += 1
+            continue
+
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            # A comment spanning lines still separates statements
+            if '\n' in source[i:end] and out and not out[-1].endswith('\n'):
+                out.append('\n')
+            i = end
+            continue
+
+        if ch in '\'"':
+            j = i + 1
+            while j < n and source[j] != ch:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            last = ch
+            i = j + 1
+            continue
+
+        if ch == '`':
+            out.append(ch)
+            templates.append(None)
+            i += 1
+            continue
+
+        if ch == '/' and regex_allowed():
+            j = i + 1
+            in_class = False
+            while j < n and source[j] != '\n':
+                if source[j] == '\\':
+                    j += 2
+                    continue
+                if source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                elif source[j] == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and source[j].isalpha():
+                j += 1
+            out.append(source[i:j])
+            last = '/'
+            i = j
+            continue
+
+        if templates and ch in '{}':
+            if ch == '{':
+                templates[-1] += 1
+            elif templates[-1] == 0:
+                # End of a ${...} expression, back to template text
+                out.append(ch)
+                templates[-1] = None
+                i += 1
+                continue
+            else:
+                templates[-1] -= 1
+
+        if ch.isalnum() or ch in '_$':
+            j = i
+            while j < n and (source[j].isalnum() or source[j] in '_$'):
+                j += 1
+            # Keep decimal points with their number, so 1.5 isn't read as 1 followed by .5
+            while ch.isdigit() and j < n and (source[j].isalnum() or source[j] == '.'):
+                j += 1
+            last = source[i:j]
+            out.append(last)
+            i = j
+            continue
+
+        # Drop the space between two punctuation characters, unless joining them
+        # would form another token (a + +b, a - -b, a / /re/)
+        if out and out[-1] == ' ' and len(out) > 1 and not (out[-2][-1:].isalnum() or out[-2][-1:] in '_$'):
+            if ch not in '+-/':
+                out.pop()
+        out.append(ch)
+        last = ch
+        i += 1
+
+    return ''.join(out).strip() + '\n'
+
+
+def minify_css(source: str) -> str:
+    """
+    Minify CSS: remove comments and collapse whitespace.
+
+    Args:
+        source: CSS source
+
+    Returns:
+        Minified source
+    """
+    # Comments and strings in one pass, so quotes inside comments don't start strings
+    tokens = re.split(r'(/\*.*?\*/|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')', source, flags=re.S)
+    result = []
+    for index, part in enumerate(tokens):
+        if index % 2:
+            if not part.startswith('/*'):
+                result.append(part)  # String literal
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r'\s*([{};,])\s*', r'\1', part)
+        part = part.replace(';}', '}')
+        result.append(part)
+    return ''.join(result).strip() + '\n'
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    """Write a file so concurrent readers never see it partially written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def build_assets(static_dir: str = STATIC_DIR, build_dir: str = DEFAULT_BUILD_DIR,
+                 minify: bool = True) -> Dict[str, str]:
+    """
+    Minify and fingerprint the JavaScript and CSS under the static folder.
+
+    Each file is written as ``<name>.<content hash><ext>`` with gzip (and,
+    if available, brotli) copies next to it, and the mapping from source
+    path to fingerprinted path is stored in ``manifest.json``. Files of
+    earlier builds are left in place, so pages rendered before a deploy can
+    still load their assets.
+
+    Args:
+        static_dir: Folder holding the source files
+        build_dir: Output folder
+        minify: Minify the files (disable to debug built assets)
+
+    Returns:
+        The manifest
+    """
+    manifest = {}
+    for root, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            name, ext = os.path.splitext(filename)
+            if ext not in ASSET_EXTENSIONS:
+                continue
+            source_path = os.path.join(root, filename)
+            relative_path = os.path.relpath(source_path, static_dir).replace(os.sep, '/')
+
+            with open(source_path, encoding='utf-8') as f:
+                source = f.read()
+            if minify:
+                source = minify_js(source) if ext == '.js' else minify_css(source)
+            content = source.encode('utf-8')
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            built_path = f"{os.path.dirname(relative_path)}/{name}.{digest}{ext}".lstrip('/')
+            output_path = os.path.join(build_dir, built_path)
+            if not os.path.exists(output_path):
+                _write_atomic(output_path, content)
+                _write_atomic(f"{output_path}.gz", gzip.compress(content, compresslevel=9))
+                if brotli is not None:
+                    _write_atomic(f"{output_path}.br", brotli.compress(content, quality=11))
+            manifest[relative_path] = built_path
+
+    _write_atomic(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    logger.info(f"Built {len(manifest)} static assets into {build_dir}")
+    return manifest
+
+
+def _is_stale(static_dir: str, build_dir: str) -> bool:
+    """Check whether a source file changed since the manifest was written."""
+    manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return True
+    built_at = os.path.getmtime(manifest_path)
+    for root, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            if filename.endswith(ASSET_EXTENSIONS) and os.path.getmtime(os.path.join(root, filename)) > built_at:
+                return True
+    return False
+
+
+def init_assets(app, static_dir: str = STATIC_DIR, build_dir: str = DEFAULT_BUILD_DIR) -> None:
+    """
+    Load the asset manifest, rebuilding it if the sources changed, and add ``asset_url`` to templates.
+
+    Args:
+        app: Flask application
+        static_dir: Folder holding the source files
+        build_dir: Folder of the built assets
+    """
+    global _manifest
+    app.config['ASSET_BUILD_DIR'] = build_dir
+    try:
+        if _is_stale(static_dir, build_dir):
+            _manifest = build_assets(static_dir, build_dir)
+        else:
+            with open(os.path.join(build_dir, MANIFEST_NAME), encoding='utf-8') as f:
+                _manifest = json.load(f)
+    except Exception as e:
+        # Templates fall back to the plain static files
+        logger.error(f"Could not build static assets: {str(e)}")
+        _manifest = {}
+    app.jinja_env.globals['asset_url'] = asset_url
+
+
+def asset_url(path: str) -> str:
+    """
+    Get the URL of a static asset, fingerprinted if it has been built.
+
+    Args:
+        path: Path under the static folder, e.g. ``js/charts.js``
+
+    Returns:
+        URL of the fingerprinted file, or the plain static URL
+    """
+    built_path = _manifest.get(path)
+    if built_path is None:
+        return url_for('static', filename=path)
+    return url_for('main.serve_asset', filename=built_path)
+
+
+def built_asset(build_dir: str, filename: str, accept_encodings) -> Optional[tuple]:
+    """
+    Pick the file to send for a built asset, preferring a precompressed copy.
+
+    Args:
+        build_dir: Folder of the built assets
+        filename: Fingerprinted path from the manifest
+        accept_encodings: ``request.accept_encodings``
+
+    Returns:
+        Tuple of (file name to send, content encoding or None)
+    """
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accept_encodings[encoding] and os.path.isfile(os.path.join(build_dir, filename + suffix)):
+            return filename + suffix, encoding
+    return filename, None
+
+
+def main():
+    """Build the static assets from the command line, e.g. during a deploy."""
+    parser = argparse.ArgumentParser(description="Minify and fingerprint SmartDataHub static assets.")
+    parser.add_argument('--output', default=DEFAULT_BUILD_DIR, help="Folder for the built assets")
+    parser.add_argument('--no-minify', action='store_true', help="Only fingerprint, keeping the sources readable")
+    args = parser.parse_args()
+
+    configure_logging()
+    manifest = build_assets(STATIC_DIR, args.output, minify=not args.no_minify)
+    for source_path, built_path in sorted(manifest.items()):
+        source_size = os.path.getsize(os.path.join(STATIC_DIR, source_path))
+        built_size = os.path.getsize(os.path.join(args.output, built_path))
+        print(f"{source_path:<28} -> {built_path:<40} {source_size:>8} -> {built_size:>8} bytes")
+
+
+if __name__ == '__main__':
+    main()
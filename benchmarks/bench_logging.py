@@ -0,0 +1,104 @@
+"""
+Benchmark the cost of logging calls on the calling thread.
+
+Compares debug calls with the root level at INFO (discarded) and at DEBUG
+(emitted), f-string messages against lazy %-style arguments, a handler
+writing directly to the stream against the QueueHandler/QueueListener pair
+of ``logging_config``, and debug sampling. Output goes to a sink that
+sleeps ``--write-delay`` microseconds per write, standing in for a slow
+terminal, pipe or log shipper.
+
+Usage:
+    python benchmarks/bench_logging.py [--calls 20000] [--write-delay 50]
+"""
+import os
+import sys
+import time
+import queue
+import logging
+import argparse
+from logging.handlers import QueueHandler, QueueListener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logging_config import DEFAULT_FORMAT, SamplingFilter
+
+
+class SlowSink:
+    """Stream discarding its input after a fixed delay per write."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def run(calls, level, queued, lazy, sample_rate, delay):
+    """Time ``calls`` debug calls; return (microseconds per call, records written)."""
+    sink = SlowSink(delay)
+    output = logging.StreamHandler(sink)
+    output.setFormatter(logging.Formatter(DEFAULT_FORMAT))
+
+    listener = None
+    if queued:
+        records = queue.SimpleQueue()
+        handler = QueueHandler(records)
+        listener = QueueListener(records, output, respect_handler_level=True)
+        listener.start()
+    else:
+        handler = output
+    if sample_rate > 1:
+        handler.addFilter(SamplingFilter({'bench': sample_rate}))
+
+    logger = logging.getLogger('bench')
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(level)
+
+    row = {'column': 'revenue', 'rows': 1200, 'nulls': 3}
+    start = time.perf_counter()
+    if lazy:
+        for i in range(calls):
+            logger.debug("Column %s of row %s: %s", i % 12, i, row)
+    else:
+        for i in range(calls):
+            logger.debug(f"Column {i % 12} of row {i}: {row}")
+    elapsed = time.perf_counter() - start
+
+    if listener is not None:
+        listener.stop()
+    return elapsed / calls * 1e6, sink.writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000, help="Debug calls per measurement")
+    parser.add_argument('--write-delay', type=float, default=50, help="Microseconds per write to the sink")
+    args = parser.parse_args()
+    delay = args.write_delay / 1e6
+
+    cases = [
+        ("INFO, f-string", logging.INFO, True, False, 1),
+        ("INFO, lazy", logging.INFO, True, True, 1),
+        ("DEBUG, lazy, direct handler", logging.DEBUG, False, True, 1),
+        ("DEBUG, lazy, queue handler", logging.DEBUG, True, True, 1),
+        ("DEBUG, f-string, queue handler", logging.DEBUG, True, False, 1),
+        ("DEBUG, lazy, queue, 1 in 20", logging.DEBUG, True, True, 20),
+    ]
+
+    print(f"{args.calls} debug calls, {args.write_delay:g} us per write\n")
+    print(f"{'Configuration':<34}{'us/call':>10}{'written':>10}")
+    for name, level, queued, lazy, sample_rate in cases:
+        per_call, written = run(args.calls, level, queued, lazy, sample_rate, delay)
+        print(f"{name:<34}{per_call:>10.2f}{written:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark database round trips of the chart, report and conversation endpoints.
+
+Seeds a throwaway SQLite database with one user owning N saved charts, a
+report containing all of them and N conversations, then compares the old
+per-row access pattern with the batched and joined queries of the
+data-access layer and times the endpoints that use them.
+
+Usage:
+    python benchmarks/bench_queries.py [--rows 200] [--messages 5] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class QueryCounter:
+    """Count SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def measure(counter, func, repeat):
+    """Run ``func`` several times; return (queries per run, median milliseconds)."""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        start_count = counter.count
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+        queries = counter.count - start_count
+    return queries, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200, help="Charts and conversations to seed")
+    parser.add_argument('--messages', type=int, default=5, help="Messages per conversation")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-queries-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app, db
+    from models import User, SavedChart, Report, Conversation, Message
+    from data_access import load_charts, load_report_charts, set_report_charts, conversations_with_message_counts
+
+    app = create_app(job_workers=0)
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+        chart_data = json.dumps({"labels": ["a", "b", "c"], "datasets": [{"label": "x", "data": [1, 2, 3]}]})
+        charts = [SavedChart(user_id=user.id, chart_type='bar_chart', chart_title=f"Chart {i}", chart_data=chart_data)
+                  for i in range(args.rows)]
+        db.session.add_all(charts)
+        conversations = [Conversation(user_id=user.id, title=f"Conversation {i}") for i in range(args.rows)]
+        db.session.add_all(conversations)
+        db.session.commit()
+
+        db.session.add_all([Message(conversation_id=conv.id, is_user=i % 2 == 0, content=f"message {i}")
+                            for conv in conversations for i in range(args.messages)])
+        chart_ids = [chart.id for chart in charts]
+        report = Report(user_id=user.id, title='Bench report', content='# Bench')
+        set_report_charts(report, chart_ids)
+        db.session.add(report)
+        db.session.commit()
+        user_id, report_id = user.id, report.id
+
+        counter = QueryCounter(db.engine)
+
+        def per_row_charts():
+            db.session.expunge_all()
+            return [SavedChart.query.filter_by(id=chart_id).first() for chart_id in chart_ids]
+
+        def batched_charts():
+            db.session.expunge_all()
+            return load_charts(chart_ids)
+
+        def joined_charts():
+            db.session.expunge_all()
+            return load_report_charts(report_id)
+
+        def per_row_counts():
+            db.session.expunge_all()
+            convs = Conversation.query.filter_by(user_id=user_id).order_by(Conversation.created_at.desc()).all()
+            return [conv.messages.count() for conv in convs]
+
+        def grouped_counts():
+            db.session.expunge_all()
+            return conversations_with_message_counts(user_id).all()
+
+        print(f"Seeded {args.rows} charts and {args.rows} conversations ({args.messages} messages each)\n")
+        print(f"{'access pattern':<44}{'queries':>10}{'median ms':>12}")
+        for name, func in [("report charts, one query per chart", per_row_charts),
+                           ("report charts, batched IN query", batched_charts),
+                           ("report charts, joined report_charts query", joined_charts),
+                           ("message counts, one COUNT per conversation", per_row_counts),
+                           ("message counts, one grouped query", grouped_counts)]:
+            queries, ms = measure(counter, func, args.repeat)
+            print(f"{name:<44}{queries:>10}{ms:>12.1f}")
+
+    client = app.test_client()
+    response = client.post('/api/login', json={"username": "bench", "password": "bench"})
+    assert response.get_json().get("success"), "login failed"
+
+    print(f"\n{'endpoint':<44}{'queries':>10}{'median ms':>12}")
+    for path in ['/api/conversations', f'/api/reports/{report_id}', '/api/reports']:
+        def request_once(path=path):
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        queries, ms = measure(counter, request_once, args.repeat)
+        print(f"{'GET ' + path:<44}{queries:>10}{ms:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
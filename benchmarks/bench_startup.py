@@ -0,0 +1,125 @@
+"""
+Measure startup time against a budget.
+
+Three phases are timed, each in a fresh process:
+
+- import: importing ``app`` and ``routes`` (everything a worker loads before
+  serving), with the slowest packages from ``python -X importtime``
+- create_app: building the app without starting its services, as the
+  gunicorn master does with ``preload_app``
+- worker boot: forking from that master, running ``start_services`` and
+  answering a first request, as a new gunicorn worker does
+
+The script exits with status 1 when a phase exceeds its budget, so it can
+run in CI to catch a heavy import sneaking back into module scope.
+
+Usage:
+    python benchmarks/bench_startup.py [--import-budget 1.5] [--boot-budget 0.5] [--top 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure_imports(top):
+    """Import the app in a new interpreter; return (seconds, [(module, cumulative seconds)])."""
+    code = "import time; t = time.perf_counter(); import app, routes; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        # Packages and top-level modules; their time includes what they import in turn
+        name = name.strip()
+        if '.' not in name and not name.startswith('_') and name not in ('app', 'routes'):
+            modules.append((name, int(cumulative) / 1e6))
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return float(result.stdout.strip().splitlines()[-1]), modules[:top]
+
+
+def measure_boot():
+    """Preload the app, fork a worker and time it to its first response; return the timings."""
+    from app import create_app, preload_modules, start_services
+    from chart_renderer import chart_renderer
+    from pdf_renderer import pdf_renderer
+
+    start = time.perf_counter()
+    app = create_app(start=False)
+    timings = {'create_app': time.perf_counter() - start}
+    preload_modules()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        start = time.perf_counter()
+        start_services(app, job_workers=0)
+        services = time.perf_counter() - start
+        response = app.test_client().get('/login')
+        ready = time.perf_counter() - start
+        os.write(write_fd, json.dumps({'services': services, 'ready': ready,
+                                       'status': response.status_code}).encode('utf-8'))
+        # Render pool processes would otherwise outlive the worker
+        chart_renderer.shutdown()
+        pdf_renderer.shutdown()
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        timings.update(json.loads(pipe.read()))
+    os.waitpid(pid, 0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--import-budget', type=float, default=1.5, help="Seconds allowed to import the app")
+    parser.add_argument('--boot-budget', type=float, default=0.5,
+                        help="Seconds allowed from fork to a worker's first response")
+    parser.add_argument('--top', type=int, default=10, help="Slowest modules to list")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    import_seconds, modules = measure_imports(args.top)
+    print("Slowest imports (cumulative):")
+    for name, seconds in modules:
+        print(f"  {name:<28}{seconds:>8.3f}s")
+
+    timings = measure_boot()
+    phases = [
+        ("import app and routes", import_seconds, args.import_budget),
+        ("create_app (master)", timings['create_app'], None),
+        ("start_services (worker)", timings['services'], None),
+        ("fork to first response", timings['ready'], args.boot_budget),
+    ]
+
+    print(f"\n{'Phase':<28}{'seconds':>10}{'budget':>10}")
+    over = 0
+    for name, seconds, budget in phases:
+        exceeded = budget is not None and seconds > budget
+        over += exceeded
+        budget_text = f"{budget:.2f}" if budget is not None else '-'
+        print(f"{name:<28}{seconds:>10.3f}{budget_text:>10}{'  OVER' if exceeded else ''}")
+
+    if timings['status'] != 200:
+        print(f"\nFirst request failed with status {timings['status']}")
+        sys.exit(1)
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
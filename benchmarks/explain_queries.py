@@ -0,0 +1,118 @@
+"""
+Check that the hot query paths are answered from their indexes.
+
+Runs each query the way the application does, records the SQL it sends to
+the database and asks the database for its plan (EXPLAIN QUERY PLAN on
+SQLite, EXPLAIN on Postgres). Every plan must mention the index added for
+that query; the script exits with status 1 otherwise, so it can run in CI
+after a schema change.
+
+Without --database-url a throwaway SQLite database is used. On Postgres,
+sequential scans are disabled for the check so small tables still show
+whether an index is usable.
+
+Usage:
+    python benchmarks/explain_queries.py [--database-url postgresql://...] [--verbose]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help="Database to check (default: a temporary SQLite file)")
+    parser.add_argument('--verbose', action='store_true', help="Print every plan, not only failing ones")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        workdir = tempfile.mkdtemp(prefix='explain-queries-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'explain.db')}"
+
+    from sqlalchemy import event
+    from app import create_app, db
+    from models import Conversation, Job, Message, Report, SavedChart, Upload
+    from data_access import (conversations_with_message_counts, keyset_page, load_report_charts,
+                             messages_between, recent_messages, reports_with_chart_counts)
+
+    app = create_app(job_workers=0)
+    user_id, conversation_id = 1, 1
+    since = datetime.datetime.utcnow() - datetime.timedelta(hours=24)
+
+    # (description, index the plan must use, function running the query as the app does);
+    # primary keys are named per database, so a tuple lists the accepted names
+    checks = [
+        ("conversations page", 'ix_conversations_user_created',
+         lambda: keyset_page(conversations_with_message_counts(user_id), Conversation)),
+        ("saved charts page", 'ix_saved_charts_user_created',
+         lambda: keyset_page(SavedChart.query.filter_by(user_id=user_id), SavedChart)),
+        ("reports page", 'ix_reports_user_created',
+         lambda: keyset_page(reports_with_chart_counts(user_id), Report)),
+        ("recent message window", 'ix_messages_conversation_id_id',
+         lambda: recent_messages(conversation_id, 8)),
+        ("messages to summarize", 'ix_messages_conversation_id_id',
+         lambda: messages_between(conversation_id, 0, 100, 40)),
+        ("conversation view", 'ix_messages_conversation_timestamp',
+         lambda: Message.query.filter_by(conversation_id=conversation_id).order_by(Message.timestamp).all()),
+        ("active session uploads", 'ix_uploads_session_user_active',
+         lambda: Upload.query.filter_by(session_id='session', user_id=user_id, active=True).all()),
+        ("latest active upload", 'ix_uploads_user_active_date',
+         lambda: Upload.query.filter(Upload.user_id == user_id, Upload.upload_date >= since,
+                                     Upload.active == True).first()),
+        ("report charts", ('sqlite_autoindex_report_charts_1', 'report_charts_pkey'),
+         lambda: load_report_charts(1)),
+        ("pending jobs of a kind", 'ix_jobs_kind_status',
+         lambda: Job.query.filter(Job.kind == 'conversation.summarize', Job.payload == '{}',
+                                  Job.status.in_(['queued', 'running'])).first()),
+        ("user's jobs", 'ix_jobs_user_id',
+         lambda: Job.query.filter_by(user_id=user_id).order_by(Job.id.desc()).limit(20).all()),
+    ]
+
+    failures = 0
+    with app.app_context():
+        postgres = db.engine.dialect.name == 'postgresql'
+
+        def explain(statement, parameters):
+            with db.engine.connect() as connection:
+                if postgres:
+                    connection.exec_driver_sql('SET enable_seqscan = off')
+                    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+                    return "\n".join(row[0] for row in rows)
+                rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                return "\n".join(row[-1] for row in rows)
+
+        print(f"Checking query plans on {db.engine.dialect.name}\n")
+        for name, index_name, run_query in checks:
+            statements = []
+
+            def record(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith('SELECT'):
+                    statements.append((statement, parameters))
+
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                run_query()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+                db.session.rollback()
+
+            plan = "\n".join(explain(statement, parameters) for statement, parameters in statements)
+            accepted = index_name if isinstance(index_name, tuple) else (index_name,)
+            ok = any(accepted_name in plan for accepted_name in accepted)
+            failures += not ok
+            print(f"{'ok' if ok else 'MISSING':<9}{name:<28}{' or '.join(accepted)}")
+            if args.verbose or not ok:
+                print("         " + plan.replace("\n", "\n         "))
+
+    print(f"\n{len(checks) - failures}/{len(checks)} queries use their index")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,416 @@
+import os
+import io
+import re
+import json
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Union
+
+from logging_config import configure_logging
+from dataset_cache import DiskCachePruner
+
+logger = logging.getLogger(__name__)
+
+# Bump when drawing code changes so cached images are re-rendered
+RENDER_VERSION = 1
+
+IMAGE_MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'charts')
+
+# Cached images are pruned, least recently used first, beyond this size or age
+DEFAULT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# Workers are forked from a single-threaded server process, never from a web
+# worker whose other threads may hold locks the child would inherit
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+if POOL_CONTEXT.get_start_method() == 'forkserver':
+    # Also passes sys.path to the server; the default would re-import __main__ there
+    POOL_CONTEXT.set_forkserver_preload(['chart_renderer', 'pdf_renderer'])
+
+# Figure size in inches and raster resolution
+DEFAULT_FIGSIZE = (8, 4.5)
+DEFAULT_DPI = 120
+
+# Maximum category labels drawn on an x axis before thinning them out
+MAX_TICK_LABELS = 20
+
+_RGBA_PATTERN = re.compile(r'rgba?\(([^)]*)\)')
+
+
+def _init_worker() -> None:
+    """Import matplotlib and load the font cache once per worker process."""
+    # A forked worker inherits the parent's log queue but not its writer thread
+    configure_logging()
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(1, 1))
+    figure.text(0.5, 0.5, 'warm-up')
+    figure.savefig(io.BytesIO(), format='png')
+
+
+def _color(value: Any, default: Any = None) -> Any:
+    """Convert a Chart.js color ('rgba(r, g, b, a)' or '#hex') into a matplotlib color."""
+    if isinstance(value, list):
+        return [_color(v, default) for v in value]
+    if not isinstance(value, str):
+        return default
+    match = _RGBA_PATTERN.fullmatch(value.strip())
+    if match:
+        parts = [float(p) for p in match.group(1).split(',')]
+        rgb = [min(max(p / 255, 0), 1) for p in parts[:3]]
+        alpha = parts[3] if len(parts) > 3 else 1.0
+        return (*rgb, min(max(alpha, 0), 1))
+    return value if value.startswith('#') else default
+
+
+def _numbers(values: List[Any]) -> List[float]:
+    """Replace missing values with NaN so matplotlib leaves gaps."""
+    return [float('nan') if v is None else float(v) for v in values]
+
+
+def _set_category_ticks(ax, labels: List[Any]) -> None:
+    """Label category positions, thinning labels out on crowded axes."""
+    step = max(1, -(-len(labels) // MAX_TICK_LABELS))
+    positions = list(range(0, len(labels), step))
+    ax.set_xticks(positions)
+    ax.set_xticklabels([str(labels[i]) for i in positions], rotation=45, ha='right', fontsize=8)
+
+
+def _draw_bar(ax, chart: Dict[str, Any]) -> None:
+    """Draw grouped vertical bars, one group per label."""
+    labels = chart.get('labels', [])
+    datasets = chart.get('datasets', [])
+    width = 0.8 / max(len(datasets), 1)
+    for i, dataset in enumerate(datasets):
+        offset = (i - (len(datasets) - 1) / 2) * width
+        ax.bar([x + offset for x in range(len(labels))], _numbers(dataset.get('data', [])), width=width,
+               color=_color(dataset.get('backgroundColor'), f'C{i}'), label=dataset.get('label'))
+    _set_category_ticks(ax, labels)
+    if len(datasets) > 1:
+        ax.legend(fontsize=8)
+
+
+def _draw_line(ax, chart: Dict[str, Any]) -> None:
+    """Draw one line per dataset over the label positions."""
+    labels = chart.get('labels', [])
+    datasets = chart.get('datasets', [])
+    for i, dataset in enumerate(datasets):
+        ax.plot(range(len(dataset.get('data', []))), _numbers(dataset.get('data', [])),
+                color=_color(dataset.get('borderColor'), f'C{i}'), label=dataset.get('label'))
+    _set_category_ticks(ax, labels)
+    if len(datasets) > 1:
+        ax.legend(fontsize=8)
+
+
+def _draw_pie(ax, chart: Dict[str, Any]) -> None:
+    """Draw the first dataset as a pie."""
+    dataset = (chart.get('datasets') or [{}])[0]
+    values = [0 if v is None else max(float(v), 0) for v in dataset.get('data', [])]
+    colors = _color(dataset.get('backgroundColor'))
+    ax.pie(values, labels=[str(label) for label in chart.get('labels', [])],
+           colors=colors if isinstance(colors, list) and None not in colors else None,
+           autopct='%1.1f%%', textprops={'fontsize': 8})
+    ax.axis('equal')
+
+
+def _draw_points(ax, chart: Dict[str, Any]) -> None:
+    """Draw scatter points, sized by radius for bubble charts."""
+    for i, dataset in enumerate(chart.get('datasets', [])):
+        points = [p for p in dataset.get('data', []) if p.get('x') is not None and p.get('y') is not None]
+        sizes = [(p.get('r') or 3) ** 2 for p in points] if chart.get('type') == 'bubble' else 12
+        ax.scatter([p['x'] for p in points], [p['y'] for p in points], s=sizes,
+                   color=_color(dataset.get('backgroundColor'), f'C{i}'), label=dataset.get('label'))
+    if len(chart.get('datasets', [])) > 1:
+        ax.legend(fontsize=8)
+
+
+def _draw_radar(ax, chart: Dict[str, Any]) -> None:
+    """Draw one closed polygon per dataset on a polar axis."""
+    import math
+    labels = chart.get('labels', [])
+    angles = [2 * math.pi * i / max(len(labels), 1) for i in range(len(labels))]
+    for i, dataset in enumerate(chart.get('datasets', [])):
+        values = _numbers(dataset.get('data', []))
+        color = _color(dataset.get('borderColor'), f'C{i}')
+        ax.plot(angles + angles[:1], values + values[:1], color=color, label=dataset.get('label'))
+        ax.fill(angles + angles[:1], values + values[:1], color=color, alpha=0.2)
+    ax.set_xticks(angles)
+    ax.set_xticklabels([str(label) for label in labels], fontsize=8)
+    ax.legend(fontsize=8, loc='upper right', bbox_to_anchor=(1.3, 1.1))
+
+
+def _draw_boxplot(ax, chart: Dict[str, Any]) -> None:
+    """Draw pre-computed box statistics, one box per dataset."""
+    stats = []
+    for dataset in chart.get('datasets', []):
+        box = (dataset.get('data') or [{}])[0]
+        stats.append({
+            'label': str(dataset.get('label', '')),
+            'whislo': box.get('min'), 'q1': box.get('q1'), 'med': box.get('median'),
+            'q3': box.get('q3'), 'whishi': box.get('max'), 'fliers': box.get('outliers', [])
+        })
+    ax.bxp(stats, showfliers=True)
+    ax.tick_params(axis='x', labelrotation=45, labelsize=8)
+
+
+def _draw_heatmap(ax, chart: Dict[str, Any]) -> None:
+    """Draw heatmap cells as a matrix image with a color bar."""
+    labels = chart.get('labels', [])
+    positions = {label: i for i, label in enumerate(labels)}
+    matrix = [[float('nan')] * len(labels) for _ in labels]
+    for cell in chart.get('datasets', []):
+        if cell.get('x') in positions and cell.get('y') in positions and cell.get('v') is not None:
+            matrix[positions[cell['y']]][positions[cell['x']]] = cell['v']
+    image = ax.imshow(matrix, cmap='coolwarm', vmin=-1, vmax=1)
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels, fontsize=8)
+    ax.figure.colorbar(image, ax=ax)
+
+
+_DRAWERS = {
+    'bar': _draw_bar,
+    'line': _draw_line,
+    'pie': _draw_pie,
+    'doughnut': _draw_pie,
+    'scatter': _draw_points,
+    'bubble': _draw_points,
+    'radar': _draw_radar,
+    'boxplot': _draw_boxplot,
+    'heatmap': _draw_heatmap
+}
+
+
+def render_chart_image(chart: Dict[str, Any], title: str, image_format: str = 'png',
+                       figsize: tuple = DEFAULT_FIGSIZE, dpi: int = DEFAULT_DPI) -> bytes:
+    """
+    Draw an expanded chart payload with matplotlib.
+
+    Runs inside the renderer's worker processes, but has no process state
+    of its own and can be called directly.
+
+    Args:
+        chart: Chart payload as returned by the ``generate_*`` methods
+        title: Title drawn above the chart
+        image_format: 'png' or 'svg'
+        figsize: Figure size in inches
+        dpi: Raster resolution
+
+    Returns:
+        Encoded image bytes
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    drawer = _DRAWERS.get(chart.get('type'))
+    if drawer is None:
+        raise ValueError(f"Cannot render chart type: {chart.get('type')}")
+
+    # Hidden datasets (per-source breakdowns) are off by default on the dashboard too
+    if chart.get('type') != 'heatmap':
+        chart = {**chart, 'datasets': [d for d in chart.get('datasets', []) if not d.get('hidden')]}
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    ax = figure.add_subplot(projection='polar' if chart.get('type') == 'radar' else None)
+    drawer(ax, chart)
+    ax.set_title(title, fontsize=11)
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """
+    Render saved charts to images in a pool of warmed-up worker processes.
+
+    Images are cached on disk under a hash of the chart payload, title,
+    format, size and ``RENDER_VERSION``, so exporting the same report again
+    reuses the rendered files. The cache is pruned to a size and age limit,
+    least recently used images first.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_workers: int = 2,
+                 figsize: tuple = DEFAULT_FIGSIZE, dpi: int = DEFAULT_DPI,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, cache_max_age: float = DEFAULT_CACHE_MAX_AGE):
+        """Initialize the renderer; worker processes start on ``warm`` or first use."""
+        self.cache_dir = cache_dir
+        self._pruner = DiskCachePruner(cache_dir, cache_max_bytes, cache_max_age)
+        self.max_workers = max_workers
+        self.figsize = figsize
+        self.dpi = dpi
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Get the worker pool, starting it if needed."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                     mp_context=POOL_CONTEXT)
+            return self._executor
+
+    def _reset_pool(self) -> None:
+        """Drop a broken pool so the next call starts a fresh one."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def warm(self) -> None:
+        """Start the worker processes in the background so they are ready for the first export."""
+        # Worker processes that import the app must not start pools of their own
+        if multiprocessing.parent_process() is not None:
+            return
+        try:
+            pool = self._pool()
+            for _ in range(self.max_workers):
+                pool.submit(int)
+            logger.info(f"Warming {self.max_workers} chart render workers")
+        except Exception as e:
+            logger.warning(f"Could not start chart render workers: {str(e)}")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def cache_key(self, chart_data: Union[str, Dict[str, Any]], title: str, image_format: str) -> str:
+        """
+        Build the content hash identifying a rendered image.
+
+        Args:
+            chart_data: Stored chart JSON or chart payload
+            title: Chart title
+            image_format: 'png' or 'svg'
+
+        Returns:
+            Hex digest
+        """
+        if not isinstance(chart_data, str):
+            chart_data = json.dumps(chart_data, sort_keys=True)
+        digest = hashlib.sha256()
+        for part in (str(RENDER_VERSION), image_format, repr(self.figsize), str(self.dpi), title, chart_data):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str, image_format: str) -> str:
+        """Get the file path of a cached image."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{image_format}")
+
+    def _read_cache(self, key: str, image_format: str) -> Optional[bytes]:
+        """Read a cached image, or None on a miss."""
+        path = self._cache_path(key, image_format)
+        try:
+            with open(path, 'rb') as f:
+                image = f.read()
+        except OSError:
+            return None
+        self._pruner.touch(path)
+        return image
+
+    def _write_cache(self, key: str, image_format: str, image: bytes) -> None:
+        """Store a rendered image in the cache."""
+        path = self._cache_path(key, image_format)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache chart image: {str(e)}")
+        self._pruner.maybe_prune()
+
+    def render_many(self, charts: List[Dict[str, Any]], image_format: str = 'png',
+                    timeout: float = 60) -> List[Optional[bytes]]:
+        """
+        Render several charts, in parallel for those not already cached.
+
+        Args:
+            charts: Dicts with ``chart_data`` (stored JSON string or payload) and ``chart_title``
+            image_format: 'png' or 'svg'
+            timeout: Maximum seconds to wait for each render
+
+        Returns:
+            Image bytes per chart, None where rendering failed
+        """
+        if image_format not in IMAGE_MIMETYPES:
+            raise ValueError(f"Unsupported image format: {image_format}")
+
+        from visualization import from_columnar_payload
+
+        images = [None] * len(charts)
+        pending = {}
+        for i, chart in enumerate(charts):
+            title = chart.get('chart_title') or ''
+            key = self.cache_key(chart.get('chart_data'), title, image_format)
+            images[i] = self._read_cache(key, image_format)
+            if images[i] is not None:
+                continue
+            try:
+                chart_data = chart.get('chart_data')
+                if isinstance(chart_data, str):
+                    chart_data = json.loads(chart_data)
+                if not isinstance(chart_data, dict) or 'error' in chart_data:
+                    continue
+                payload = from_columnar_payload(chart_data)
+                future = self._pool().submit(render_chart_image, payload, title, image_format, self.figsize, self.dpi)
+                pending[i] = (key, future)
+            except BrokenProcessPool:
+                self._reset_pool()
+                logger.error("Chart render pool broke while submitting; skipping chart image")
+            except Exception as e:
+                logger.warning(f"Could not queue chart {chart.get('id')} for rendering: {str(e)}")
+
+        for i, (key, future) in pending.items():
+            try:
+                images[i] = future.result(timeout=timeout)
+                self._write_cache(key, image_format, images[i])
+            except BrokenProcessPool:
+                self._reset_pool()
+                logger.error("Chart render worker died; skipping chart image")
+            except Exception as e:
+                logger.error(f"Error rendering chart {charts[i].get('id')}: {str(e)}")
+                logger.debug("Traceback", exc_info=True)
+
+        logger.info(f"Rendered {len(pending)} of {len(charts)} chart images ({len(charts) - len(pending)} cached or skipped)")
+        return images
+
+    def render(self, chart_data: Union[str, Dict[str, Any]], title: str = '', image_format: str = 'png',
+               timeout: float = 60) -> Optional[bytes]:
+        """
+        Render one chart.
+
+        Args:
+            chart_data: Stored chart JSON or chart payload
+            title: Title drawn above the chart
+            image_format: 'png' or 'svg'
+            timeout: Maximum seconds to wait for the render
+
+        Returns:
+            Image bytes or None if rendering failed
+        """
+        return self.render_many([{"chart_data": chart_data, "chart_title": title}], image_format, timeout)[0]
+
+
+chart_renderer = ChartRenderer()
@@ -0,0 +1,554 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+import threading
+import time
+import traceback
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from aggregation import AggregationCube, get_cube
+from correlation import DEFAULT_MAX_ROWS, CorrelationMoments, heatmap_payload
+from dataset_cache import load_cached_dataframe
+from distribution import MAX_OUTLIERS, QuantileSketch, histogram_bins
+from visualization import DataVisualizer
+
+logger = logging.getLogger(__name__)
+
+
+def column_kind(dtype) -> str:
+    """
+    Classify a dtype the way chart generators see it through ``select_dtypes``.
+
+    Args:
+        dtype: Column dtype
+
+    Returns:
+        'number', 'category', 'datetime' or 'other'
+    """
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'other'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'number'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype) \
+            or isinstance(dtype, pd.CategoricalDtype):
+        return 'category'
+    return 'other'
+
+
+class CombinedDataset:
+    """
+    Schema and per-file partial aggregates for a combined selection of files.
+
+    Files are reduced one at a time to small partial results (aggregation
+    cubes, quantile sketches, samples) that charts merge afterwards, so no
+    concatenated copy of the data is ever built. The parsed files come from
+    the shared frame cache, which is bounded by size
+    (``FRAME_CACHE_MAX_BYTES``), and may stay there between requests.
+    Columns and dtypes follow ``pd.concat`` semantics: the union of all
+    files in order of first appearance.
+    """
+
+    def __init__(self, file_paths: List[str], loader):
+        """
+        Initialize the dataset.
+
+        Args:
+            file_paths: Paths of the combined files
+            loader: Callable that loads one file into a DataFrame
+        """
+        self.file_paths = list(file_paths)
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._profiled = False
+        self._sketches = {}
+        self.sources = []
+        self.rows = []
+        self.columns = []
+        self.dtypes = {}
+        self.kinds = {}
+
+    def frames(self) -> Iterator[Tuple[str, str, pd.DataFrame]]:
+        """Yield (path, source name, dataframe) for every loadable file, one at a time."""
+        for file_path in self.file_paths:
+            df = load_cached_dataframe(file_path, self._loader)
+            if df is None:
+                logger.warning(f"Failed to load file {os.path.basename(file_path)} for combined analysis")
+                continue
+            yield file_path, os.path.basename(file_path), df
+
+    def profile(self) -> None:
+        """Read the schema and row counts of every file once."""
+        with self._lock:
+            if self._profiled:
+                return
+            heads = []
+            for _, source, df in self.frames():
+                self.sources.append(source)
+                self.rows.append(len(df))
+                heads.append(df.head(1))
+
+            if not self.sources:
+                raise ValueError("Failed to load any files")
+
+            # Concatenating one row per file gives exactly the dtypes a full concat would
+            schema = pd.concat(heads, ignore_index=True)
+            self.columns = list(schema.columns)
+            self.dtypes = schema.dtypes.to_dict()
+            self.kinds = {col: column_kind(dtype) for col, dtype in self.dtypes.items()}
+            self._profiled = True
+            logger.info(f"Profiled {len(self.sources)} files with {sum(self.rows)} rows "
+                        f"and {len(self.columns)} columns for combined analysis")
+
+    def columns_of(self, kind: str) -> List[str]:
+        """Get the combined columns of a kind ('number', 'category' or 'datetime')."""
+        self.profile()
+        return [col for col in self.columns if self.kinds[col] == kind]
+
+    def cubes(self, cat_col: Optional[str], num_cols: List[str]) -> List[Optional[AggregationCube]]:
+        """
+        Get one aggregation cube per file covering a categorical column.
+
+        Uses the cached per-file cube when it covers the column and builds a
+        narrow one otherwise (high cardinality, or a column that is only
+        categorical in the combined schema).
+
+        Args:
+            cat_col: Categorical column
+            num_cols: Numeric columns that must be aggregated
+
+        Returns:
+            List of cubes in file order, None for files without the column
+        """
+        cubes = []
+        for file_path, _, df in self.frames():
+            if cat_col not in df.columns:
+                cubes.append(None)
+                continue
+            cube = get_cube(df, file_path=file_path)
+            if not cube.has(cat_col) or any(col in df.columns and not cube.has(cat_col, col) for col in num_cols):
+                narrow = df[[cat_col] + [col for col in num_cols if col in df.columns]]
+                cube = AggregationCube.from_dataframe(narrow.astype({cat_col: object}),
+                                                      max_cardinality=len(df))
+            cubes.append(cube)
+        return cubes
+
+    def sketches(self, columns: List[str]) -> Dict[str, List[QuantileSketch]]:
+        """
+        Get per-file quantile sketches of numeric columns.
+
+        Args:
+            columns: Numeric columns
+
+        Returns:
+            Dict of column to sketches in file order
+        """
+        missing = [col for col in columns if col not in self._sketches]
+        if missing:
+            built = {col: [] for col in missing}
+            for _, _, df in self.frames():
+                for col in missing:
+                    values = df[col].to_numpy(dtype=float, na_value=np.nan) if col in df.columns else []
+                    built[col].append(QuantileSketch.from_values(values))
+            self._sketches.update(built)
+        return {col: self._sketches[col] for col in columns}
+
+
+class CombinedVisualizer:
+    """
+    Generate combined-mode charts by merging per-file partial aggregates.
+
+    Charts keep the single-file payload shape; where it helps, per-file
+    series are appended as hidden datasets after the combined one so the
+    dashboard can break the chart down by source.
+    """
+
+    # Datasets after the combined one are per-source breakdowns
+    SOURCE_DATASET_DEFAULTS = {"hidden": True, "borderWidth": 1}
+
+    def __init__(self, visualizer: Optional[DataVisualizer] = None):
+        """
+        Initialize the CombinedVisualizer.
+
+        Args:
+            visualizer: DataVisualizer used to load files
+        """
+        self.visualizer = visualizer or DataVisualizer()
+
+    def load(self, file_paths: List[str]) -> CombinedDataset:
+        """
+        Create the combined dataset for a selection of files.
+
+        Args:
+            file_paths: Paths of the combined files
+
+        Returns:
+            CombinedDataset
+        """
+        if not file_paths:
+            raise ValueError("No data files provided")
+        return CombinedDataset(file_paths, self.visualizer._load_file)
+
+    def generate_visualizations(self, file_paths: List[str]) -> Dict[str, Any]:
+        """
+        Generate every dashboard chart for combined files.
+
+        Args:
+            file_paths: Paths of the combined files
+
+        Returns:
+            Dict containing visualization data
+        """
+        start = time.perf_counter()
+        dataset = self.load(file_paths)
+        dataset.profile()
+        visualizations = {
+            chart_type: self.generate_chart(dataset, chart_type)
+            for chart_type in DataVisualizer.CHART_GENERATORS
+        }
+        logger.info(f"Generated {len(visualizations)} combined visualizations for {len(dataset.sources)} files "
+                    f"in {time.perf_counter() - start:.3f}s")
+        return visualizations
+
+    def generate_chart(self, dataset: CombinedDataset, chart_type: str) -> Dict[str, Any]:
+        """
+        Generate data for a single chart type over combined files.
+
+        Args:
+            dataset: Combined dataset
+            chart_type: Chart id, e.g. ``bar_chart``
+
+        Returns:
+            Dict with chart data
+        """
+        if chart_type not in DataVisualizer.CHART_GENERATORS:
+            return {"error": f"Unsupported chart type: {chart_type}"}
+
+        try:
+            dataset.profile()
+            return getattr(self, DataVisualizer.CHART_GENERATORS[chart_type])(dataset)
+        except Exception as e:
+            logger.error(f"Error generating combined {chart_type}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return {"error": str(e)}
+
+    def _source_dataset(self, color_index: int, label: str, data: List[Any], **extra) -> Dict[str, Any]:
+        """Build the dataset of one source file, colored from the shared palette."""
+        palette = DataVisualizer.CHART_PALETTE
+        color = palette[color_index % len(palette)]
+        return {"label": label, "data": data, "backgroundColor": color, "borderColor": color,
+                **self.SOURCE_DATASET_DEFAULTS, **extra}
+
+    @staticmethod
+    def _values(series: pd.Series) -> List[Any]:
+        """Convert a series to a JSON list with None for missing values."""
+        return [None if pd.isna(v) else float(v) for v in series]
+
+    @staticmethod
+    def _budgets(rows: List[int], total_budget: int) -> List[int]:
+        """Split a point budget across files in proportion to their rows."""
+        total = sum(rows)
+        if total <= total_budget:
+            return list(rows)
+        return [min(n, max(1, round(total_budget * n / total))) if n else 0 for n in rows]
+
+    def generate_line_chart(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """
+        Generate a line chart with one series per source file.
+
+        Time series are aligned on the union of their dates (gaps are None);
+        otherwise every file is plotted against its own row index.
+        """
+        datetime_cols = dataset.columns_of('datetime')
+        numeric_cols = dataset.columns_of('number')
+        if not numeric_cols:
+            logger.warning("No suitable columns for line chart")
+            return {"error": "No suitable columns for line chart"}
+
+        num_col = numeric_cols[0]
+        date_col = datetime_cols[0] if datetime_cols else None
+        series = []
+        for index, (_, source, df) in enumerate(dataset.frames()):
+            if num_col not in df.columns or (date_col and date_col not in df.columns):
+                continue
+            if date_col:
+                df_sorted = df[[date_col, num_col]].sort_values(by=date_col)
+                if len(df_sorted) > 50:
+                    step = len(df_sorted) // 50 + 1
+                    df_sorted = df_sorted.iloc[::step, :]
+                labels = df_sorted[date_col].dt.strftime('%Y-%m-%d').tolist()
+            else:
+                df_sorted = df[[num_col]]
+                labels = list(range(len(df_sorted)))
+            series.append((index, source, labels, df_sorted[num_col].tolist()))
+
+        if date_col:
+            labels = sorted({label for _, _, file_labels, _ in series for label in file_labels if label is not None})
+        else:
+            labels = list(range(max((len(values) for _, _, _, values in series), default=0)))
+        positions = {label: i for i, label in enumerate(labels)}
+
+        datasets = []
+        for index, source, file_labels, values in series:
+            data = [None] * len(labels)
+            for label, value in zip(file_labels, values):
+                if label in positions:
+                    data[positions[label]] = None if pd.isna(value) else value
+            color = DataVisualizer.CHART_PALETTE[index % len(DataVisualizer.CHART_PALETTE)]
+            datasets.append({
+                "label": f"{num_col} ({source})",
+                "data": data,
+                "borderColor": color,
+                "backgroundColor": color.replace("0.7)", "0.1)"),
+                "tension": 0.4,
+                "spanGaps": True
+            })
+
+        return {"type": "line", "labels": labels, "datasets": datasets}
+
+    def generate_bar_chart(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """
+        Generate a bar chart of the top category means from merged cubes.
+
+        Falls back to grouping by source file when no column is categorical.
+        """
+        categorical_cols = dataset.columns_of('category')
+        numeric_cols = dataset.columns_of('number')
+        if not numeric_cols:
+            logger.warning("No suitable columns for bar chart")
+            return {"error": "No suitable columns for bar chart"}
+
+        num_col = numeric_cols[0]
+        if not categorical_cols:
+            # Without categories the source file is the only grouping
+            sketches = dataset.sketches([num_col])[num_col]
+            means = pd.Series([float((s.values * s.weights).sum() / s.count) if s.count else np.nan
+                               for s in sketches], index=dataset.sources)
+            grouped = means.dropna().sort_values(ascending=False).head(10)
+            return {
+                "type": "bar",
+                "labels": grouped.index.tolist(),
+                "datasets": [{
+                    "label": f"Average {num_col} by source file",
+                    "data": grouped.tolist(),
+                    "backgroundColor": "rgba(168, 85, 247, 0.7)",
+                    "borderColor": "#7928ca",
+                    "borderWidth": 1
+                }]
+            }
+
+        cat_col = categorical_cols[0]
+        cubes = dataset.cubes(cat_col, [num_col])
+        merged = AggregationCube.merge([cube for cube in cubes if cube is not None])
+        grouped = merged.aggregate(cat_col, num_col, 'mean').sort_values(ascending=False).head(10)
+
+        datasets = [{
+            "label": f"Average {num_col} by {cat_col}",
+            "data": grouped.tolist(),
+            "backgroundColor": "rgba(168, 85, 247, 0.7)",
+            "borderColor": "#7928ca",
+            "borderWidth": 1
+        }]
+        for index, (source, cube) in enumerate(zip(dataset.sources, cubes)):
+            if cube is None or not cube.has(cat_col, num_col):
+                continue
+            means = cube.aggregate(cat_col, num_col, 'mean').reindex(grouped.index)
+            datasets.append(self._source_dataset(index + 1, source, self._values(means)))
+
+        return {"type": "bar", "labels": grouped.index.tolist(), "datasets": datasets}
+
+    def generate_pie_chart(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """Generate a pie chart of category counts summed over the files."""
+        categorical_cols = dataset.columns_of('category')
+        if not categorical_cols:
+            logger.warning("No suitable columns for pie chart")
+            return {"error": "No suitable columns for pie chart"}
+
+        cat_col = categorical_cols[0]
+        cubes = [cube for cube in dataset.cubes(cat_col, []) if cube is not None]
+        return self.visualizer.generate_pie_chart(pd.DataFrame({cat_col: pd.Series(dtype=object)}),
+                                                  cube=AggregationCube.merge(cubes))
+
+    def generate_radar_chart(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """Generate a radar chart of the top categories from merged cubes."""
+        categorical_cols = dataset.columns_of('category')
+        numeric_cols = dataset.columns_of('number')
+        if not categorical_cols or len(numeric_cols) < 3:
+            logger.warning("Not enough suitable columns for radar chart")
+            return {"error": "Not enough suitable columns for radar chart"}
+
+        cat_col = categorical_cols[0]
+        selected_numeric_cols = numeric_cols[:5]
+        cubes = [cube for cube in dataset.cubes(cat_col, selected_numeric_cols) if cube is not None]
+
+        # An empty frame with the combined schema picks the same columns as a single file
+        schema = pd.DataFrame({cat_col: pd.Series(dtype=object),
+                               **{col: pd.Series(dtype=float) for col in selected_numeric_cols}})
+        return self.visualizer.generate_radar_chart(schema, cube=AggregationCube.merge(cubes))
+
+    def _merged_sketches(self, dataset: CombinedDataset) -> Dict[str, QuantileSketch]:
+        """Merge the per-file sketches of every numeric column with at least one value."""
+        sketches = dataset.sketches(dataset.columns_of('number'))
+        merged = {col: QuantileSketch.merge(parts) for col, parts in sketches.items()}
+        return {col: sketch for col, sketch in merged.items() if sketch.count > 0}
+
+    def generate_histogram(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """
+        Generate a histogram over shared bin edges.
+
+        Edges come from the merged sketch (Freedman-Diaconis, as for single
+        files); every file is then binned against them and the counts added.
+        """
+        sketches = self._merged_sketches(dataset)
+        if not sketches:
+            logger.warning("No suitable columns for histogram")
+            return {"error": "No suitable columns for histogram"}
+
+        num_col, sketch = next(iter(sketches.items()))
+        q1, q3 = sketch.quantiles([0.25, 0.75])
+        bins, low, high = histogram_bins(np.array([sketch.count]), np.array([sketch.minimum]),
+                                         np.array([sketch.maximum]), np.array([q3 - q1]))
+        edges = np.linspace(low[0], high[0], bins[0] + 1)
+
+        per_source = []
+        for index, (_, source, df) in enumerate(dataset.frames()):
+            if num_col not in df.columns:
+                continue
+            values = df[num_col].to_numpy(dtype=float, na_value=np.nan)
+            counts, _ = np.histogram(values[~np.isnan(values)], bins=edges)
+            per_source.append((index, source, counts))
+        total = np.sum([counts for _, _, counts in per_source], axis=0)
+
+        bin_labels = [f"{edges[i]:.1f}-{edges[i+1]:.1f}" for i in range(len(edges)-1)]
+        datasets = [{
+            "label": f"Distribution of {num_col}",
+            "data": total.tolist(),
+            "backgroundColor": "rgba(168, 85, 247, 0.7)",
+            "borderColor": "rgba(121, 40, 202, 0.8)",
+            "borderWidth": 1
+        }]
+        datasets.extend(self._source_dataset(index + 1, source, counts.tolist())
+                        for index, source, counts in per_source)
+
+        return {"type": "bar", "labels": bin_labels, "datasets": datasets}
+
+    def generate_box_plot(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """
+        Generate box plots from merged quantile sketches.
+
+        Outliers are collected in a second pass against the merged whiskers,
+        in file and row order.
+        """
+        sketches = self._merged_sketches(dataset)
+        selected_cols = list(sketches)[:5]
+        if not selected_cols:
+            logger.warning("No suitable columns for box plot")
+            return {"error": "No suitable columns for box plot"}
+
+        boxes = {}
+        for col in selected_cols:
+            minimum, q1, median, q3, maximum = sketches[col].quantiles([0, 0.25, 0.5, 0.75, 1])
+            iqr = q3 - q1
+            boxes[col] = {
+                "min": float(max(minimum, q1 - 1.5 * iqr)),
+                "q1": float(q1),
+                "median": float(median),
+                "q3": float(q3),
+                "max": float(min(maximum, q3 + 1.5 * iqr)),
+                "outliers": []
+            }
+
+        for _, _, df in dataset.frames():
+            for col in selected_cols:
+                box = boxes[col]
+                if col not in df.columns or len(box["outliers"]) >= MAX_OUTLIERS:
+                    continue
+                values = df[col].to_numpy(dtype=float, na_value=np.nan)
+                outliers = values[(values < box["min"]) | (values > box["max"])]
+                box["outliers"].extend(outliers[:MAX_OUTLIERS - len(box["outliers"])].tolist())
+
+        datasets = [{
+            "label": col,
+            "data": [boxes[col]],
+            "backgroundColor": "rgba(168, 85, 247, 0.5)",
+            "borderColor": "rgba(121, 40, 202, 0.8)",
+            "borderWidth": 1
+        } for col in selected_cols]
+
+        return {"type": "boxplot", "labels": [""], "datasets": datasets}
+
+    def _sample_points(self, dataset: CombinedDataset, columns: List[str],
+                       total_points: int) -> List[Tuple[int, str, pd.DataFrame]]:
+        """Sample rows from every file in proportion to its size."""
+        samples = []
+        budgets = self._budgets(dataset.rows, total_points)
+        for index, ((_, source, df), budget) in enumerate(zip(dataset.frames(), budgets)):
+            if budget == 0 or any(col not in df.columns for col in columns):
+                continue
+            sample = df[columns].sample(budget) if len(df) > budget else df[columns]
+            samples.append((index, source, sample))
+        return samples
+
+    def generate_scatter_plot(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """Generate a scatter plot with a proportional sample of every file as its own dataset."""
+        numeric_cols = dataset.columns_of('number')
+        if len(numeric_cols) < 2:
+            logger.warning("Not enough numeric columns for scatter plot")
+            return {"error": "Not enough numeric columns for scatter plot"}
+
+        x_col, y_col = numeric_cols[0], numeric_cols[1]
+        datasets = []
+        for index, source, sample in self._sample_points(dataset, [x_col, y_col], 100):
+            data = [{"x": float(x), "y": float(y)} for x, y in zip(sample[x_col], sample[y_col])]
+            datasets.append(self._source_dataset(index, f"{x_col} vs {y_col} ({source})", data,
+                                                 hidden=False, pointRadius=5, pointHoverRadius=7))
+
+        return {"type": "scatter", "datasets": datasets}
+
+    def generate_bubble_chart(self, dataset: CombinedDataset) -> Dict[str, Any]:
+        """Generate a bubble chart per source file with radii scaled across all files."""
+        numeric_cols = dataset.columns_of('number')
+        if len(numeric_cols) < 3:
+            logger.warning("Not enough numeric columns for bubble chart")
+            return {"error": "Not enough numeric columns for bubble chart"}
+
+        x_col, y_col, r_col = numeric_cols[:3]
+        samples = self._sample_points(dataset, [x_col, y_col, r_col], 50)
+        radii = pd.concat([sample[r_col] for _, _, sample in samples]) if samples else pd.Series(dtype=float)
+        r_min = radii.min()
+        r_range = max(radii.max() - r_min, 1)  # Avoid division by zero
+
+        datasets = []
+        for index, source, sample in samples:
+            data = [{"x": float(x), "y": float(y), "r": float(5 + ((r - r_min) / r_range) * 15)}
+                    for x, y, r in zip(sample[x_col], sample[y_col], sample[r_col])]
+            datasets.append(self._source_dataset(index, f"{x_col} vs {y_col} (size: {r_col}) ({source})",
+                                                 data, hidden=False))
+
+        return {"type": "bubble", "datasets": datasets}
+
+    def generate_heatmap(self, dataset: CombinedDataset, max_columns: int = 20,
+                         tile_size: Optional[int] = None) -> Dict[str, Any]:
+        """Generate a correlation heatmap from co-moments merged across files."""
+        numeric_cols = dataset.columns_of('number')
+        if len(numeric_cols) < 2:
+            logger.warning("Not enough numeric columns for heatmap")
+            return {"error": "Not enough numeric columns for heatmap"}
+
+        start = time.perf_counter()
+        budgets = self._budgets(dataset.rows, DEFAULT_MAX_ROWS)
+        parts = []
+        for (_, _, df), budget in zip(dataset.frames(), budgets):
+            numeric = df.reindex(columns=numeric_cols)
+            if len(numeric) > budget:
+                numeric = numeric.sample(budget, random_state=0)
+            parts.append(CorrelationMoments.from_values(numeric.to_numpy(dtype=float, na_value=np.nan)))
+
+        labels = [str(col) for col in numeric_cols]
+        corr = CorrelationMoments.merge(parts).correlation()
+        heatmap = heatmap_payload(corr, labels, max_columns=max_columns, tile_size=tile_size)
+        logger.info(f"Built combined correlation heatmap for {len(labels)} columns over {len(parts)} files "
+                    f"in {time.perf_counter() - start:.3f}s")
+        return heatmap
@@ -5,14 +5,10 @@ class Config:
     # Database - include a fallback to SQLite if DATABASE_URL isn't available
     database_url = os.environ.get("DATABASE_URL")
     
-    # Print debug information
-    if database_url:
-        print("Using DATABASE_URL from environment variables")
-    else:
+    if not database_url:
         import pathlib
         base_dir = pathlib.Path(__file__).parent.absolute()
         database_url = f"sqlite:///{base_dir}/app.db"
-        print(f"DATABASE_URL not found in environment variables. Using SQLite database: {database_url}")
     
     SQLALCHEMY_DATABASE_URI = database_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -25,6 +21,12 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
     ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'json', 'txt'}
     
+    # Background jobs: worker threads started inside one web process per host
+    # (see jobs.start_embedded_workers). Dashboard AI insights run as jobs, so
+    # keep enough threads that they don't wait behind reports and PDFs. Set to
+    # 0 when running dedicated `python worker.py` processes.
+    JOB_WORKER_THREADS = int(os.environ.get("JOB_WORKER_THREADS", 4))
+    
     # Session configuration
     SESSION_TYPE = 'filesystem'
     SESSION_PERMANENT = False
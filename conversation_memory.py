@@ -0,0 +1,107 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import db
+from models import Conversation, ConversationSummary, Job, Message
+from data_access import recent_messages, messages_between
+from ai_integration import get_ai_instance, HISTORY_MESSAGES
+from jobs import JobError, job_handler, enqueue, QUEUED, RUNNING, PRIORITY_BATCH
+
+logger = logging.getLogger(__name__)
+
+# Messages older than the history window that trigger a summary update
+SUMMARY_BATCH = 8
+
+# Most messages folded into the summary by one job; a long backlog is caught up over several turns
+MAX_MESSAGES_PER_SUMMARY = 40
+
+SUMMARY_JOB = 'conversation.summarize'
+
+
+def _as_history(messages: List[Message]) -> List[Dict[str, str]]:
+    """Convert messages to role/content dicts for the AI client."""
+    return [{"role": "user" if msg.is_user else "assistant", "content": msg.content} for msg in messages]
+
+
+def chat_context(conversation_id: int) -> Tuple[Optional[str], List[Dict[str, str]]]:
+    """
+    Get what the AI is told about a conversation: a summary plus the recent tail.
+
+    Reads a fixed number of rows however long the conversation is.
+
+    Args:
+        conversation_id: Conversation id
+
+    Returns:
+        Tuple of (summary of older messages or None, recent messages as
+        role/content dicts, oldest first)
+    """
+    history = _as_history(recent_messages(conversation_id, HISTORY_MESSAGES))
+    summary = db.session.get(ConversationSummary, conversation_id)
+    return (summary.content or None) if summary else None, history
+
+
+def _pending_messages(conversation_id: int, limit: Optional[int] = None) -> List[Message]:
+    """Get the messages that are neither summarized nor in the recent history window."""
+    window = recent_messages(conversation_id, HISTORY_MESSAGES)
+    if len(window) < HISTORY_MESSAGES:
+        return []
+    summary = db.session.get(ConversationSummary, conversation_id)
+    after_id = summary.through_message_id if summary else 0
+    return messages_between(conversation_id, after_id, window[0].id, limit)
+
+
+def schedule_summary(conversation_id: int, user_id: int) -> Optional[Job]:
+    """
+    Queue a summary update once enough messages have left the history window.
+
+    Args:
+        conversation_id: Conversation that just got a new message
+        user_id: Owner of the conversation
+
+    Returns:
+        The queued job, or None if no update is due or one is already pending
+    """
+    if len(_pending_messages(conversation_id, SUMMARY_BATCH)) < SUMMARY_BATCH:
+        return None
+
+    payload = {"conversation_id": conversation_id}
+    pending = Job.query.filter(Job.kind == SUMMARY_JOB, Job.payload == json.dumps(payload),
+                               Job.status.in_([QUEUED, RUNNING])).first()
+    if pending:
+        return None
+    return enqueue(SUMMARY_JOB, payload, user_id=user_id, priority=PRIORITY_BATCH)
+
+
+@job_handler(SUMMARY_JOB)
+def run_summary_job(job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler folding messages that left the history window into the conversation summary."""
+    conversation = Conversation.query.filter_by(id=payload['conversation_id'], user_id=job.user_id).first()
+    if not conversation:
+        raise JobError("Conversation not found")
+
+    messages = _pending_messages(conversation.id, MAX_MESSAGES_PER_SUMMARY)
+    summary = conversation.summary
+    if messages:
+        ai_client = get_ai_instance()
+        if not ai_client:
+            raise JobError("AI service not available")
+
+        job.progress(0.1, f"Summarizing {len(messages)} messages")
+        content = ai_client.summarize_conversation(summary.content if summary else '', _as_history(messages))
+
+        if summary is None:
+            summary = ConversationSummary(conversation_id=conversation.id, message_count=0)
+            db.session.add(summary)
+        summary.content = content
+        summary.through_message_id = messages[-1].id
+        summary.message_count = (summary.message_count or 0) + len(messages)
+        db.session.commit()
+        logger.info(f"Summary of conversation {conversation.id} now covers {summary.message_count} messages")
+
+    return {
+        "conversation_id": conversation.id,
+        "through_message_id": summary.through_message_id if summary else 0,
+        "message_count": summary.message_count if summary else 0
+    }
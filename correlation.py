@@ -0,0 +1,357 @@
+import pandas as pd
+import numpy as np
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Columns per block when multiplying the data matrix with itself
+DEFAULT_BLOCK_SIZE = 256
+
+# Rows used for the correlation estimate of very long files
+DEFAULT_MAX_ROWS = 50000
+
+# Pairs with fewer complete observations than this get no correlation
+MIN_PERIODS = 3
+
+
+def correlation_matrix(values: np.ndarray, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """
+    Compute a pairwise-complete Pearson correlation matrix in float32 blocks.
+
+    Missing values (NaN) are excluded pair by pair, like ``DataFrame.corr``,
+    but the work is done as a handful of matrix products per column block
+    instead of one Python-level pass per pair.
+
+    Args:
+        values: 2-D array of shape (rows, columns), NaN for missing
+        block_size: Columns per block, bounds the temporary memory
+
+    Returns:
+        float32 array of shape (columns, columns), NaN where undefined
+    """
+    values = np.asarray(values, dtype=np.float32)
+    n_cols = values.shape[1]
+    mask = ~np.isnan(values)
+
+    # Centering first keeps float32 sums of squares from cancelling out
+    means = np.nanmean(values, axis=0) if values.shape[0] else np.zeros(n_cols, dtype=np.float32)
+    centered = np.where(mask, values - np.nan_to_num(means), 0).astype(np.float32)
+    corr = np.full((n_cols, n_cols), np.nan, dtype=np.float32)
+
+    if mask.all():
+        # No missing values: one standardized cross product per block pair
+        counts = values.shape[0]
+        scale = np.sqrt((centered ** 2).sum(axis=0))
+        scale[scale == 0] = np.nan
+        standardized = centered / scale
+        for a in range(0, n_cols, block_size):
+            za = standardized[:, a:a + block_size]
+            for b in range(a, n_cols, block_size):
+                block = za.T @ standardized[:, b:b + block_size]
+                corr[a:a + block_size, b:b + block_size] = block
+                corr[b:b + block_size, a:a + block_size] = block.T
+        if counts < MIN_PERIODS:
+            corr[:] = np.nan
+    else:
+        weights = mask.astype(np.float32)
+        squares = centered ** 2
+        for a in range(0, n_cols, block_size):
+            xa, ma, sa = centered[:, a:a + block_size], weights[:, a:a + block_size], squares[:, a:a + block_size]
+            for b in range(a, n_cols, block_size):
+                xb, mb, sb = centered[:, b:b + block_size], weights[:, b:b + block_size], squares[:, b:b + block_size]
+                # Moments over the rows where both columns are present
+                n = ma.T @ mb
+                sum_x = xa.T @ mb
+                sum_y = ma.T @ xb
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cov = xa.T @ xb - sum_x * sum_y / n
+                    var_x = sa.T @ mb - sum_x ** 2 / n
+                    var_y = ma.T @ sb - sum_y ** 2 / n
+                    block = cov / np.sqrt(var_x * var_y)
+                block[n < MIN_PERIODS] = np.nan
+                corr[a:a + block_size, b:b + block_size] = block
+                corr[b:b + block_size, a:a + block_size] = block.T
+
+    np.clip(corr, -1, 1, out=corr)
+    defined = ~np.isnan(np.diag(corr))
+    corr[np.diag_indices(n_cols)] = np.where(defined, 1, np.nan)
+    return corr
+
+
+class CorrelationMoments:
+    """
+    Mergeable pairwise-complete co-moments of a set of numeric columns.
+
+    For every column pair it keeps the rows where both columns are present,
+    the means of both over those rows and the centered sums of squares and
+    cross products. Moments of separate files are combined with the pairwise
+    parallel update (Chan et al.), so a correlation matrix over several files
+    never needs their rows in memory together.
+    """
+
+    def __init__(self, n: np.ndarray, mean_x: np.ndarray, mean_y: np.ndarray,
+                 m2_x: np.ndarray, m2_y: np.ndarray, c_xy: np.ndarray):
+        """
+        Initialize the moments; every argument is a (columns, columns) array.
+
+        Args:
+            n: Rows where both columns of the pair are present
+            mean_x: Mean of the row column over those rows
+            mean_y: Mean of the column column over those rows
+            m2_x: Centered sum of squares of the row column
+            m2_y: Centered sum of squares of the column column
+            c_xy: Centered sum of cross products
+        """
+        self.n = n
+        self.mean_x = mean_x
+        self.mean_y = mean_y
+        self.m2_x = m2_x
+        self.m2_y = m2_y
+        self.c_xy = c_xy
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> 'CorrelationMoments':
+        """
+        Compute the moments of a value matrix.
+
+        Args:
+            values: 2-D array of shape (rows, columns), NaN for missing
+
+        Returns:
+            CorrelationMoments
+        """
+        values = np.asarray(values, dtype=np.float64)
+        mask = ~np.isnan(values)
+        weights = mask.astype(np.float64)
+
+        # Center on the column means first so the cross products don't cancel out
+        present = weights.sum(axis=0)
+        column_means = np.where(present > 0, np.nansum(values, axis=0) / np.maximum(present, 1), 0)
+        centered = np.where(mask, values - column_means, 0)
+        squares = centered ** 2
+
+        n = weights.T @ weights
+        sum_x = centered.T @ weights
+        sum_y = weights.T @ centered
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shift_x = np.where(n > 0, sum_x / n, 0)
+            shift_y = np.where(n > 0, sum_y / n, 0)
+        return cls(
+            n,
+            shift_x + column_means[:, None],
+            shift_y + column_means[None, :],
+            squares.T @ weights - sum_x * shift_x,
+            weights.T @ squares - sum_y * shift_y,
+            centered.T @ centered - sum_x * shift_y
+        )
+
+    @classmethod
+    def merge(cls, parts: List['CorrelationMoments']) -> 'CorrelationMoments':
+        """
+        Combine the moments of disjoint sets of rows over the same columns.
+
+        Args:
+            parts: Moments to combine
+
+        Returns:
+            CorrelationMoments of all rows
+        """
+        merged = parts[0]
+        for part in parts[1:]:
+            n = merged.n + part.n
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weight = np.where(n > 0, part.n / n, 0)
+            delta_x = part.mean_x - merged.mean_x
+            delta_y = part.mean_y - merged.mean_y
+            scale = merged.n * weight
+            merged = cls(
+                n,
+                merged.mean_x + delta_x * weight,
+                merged.mean_y + delta_y * weight,
+                merged.m2_x + part.m2_x + delta_x ** 2 * scale,
+                merged.m2_y + part.m2_y + delta_y ** 2 * scale,
+                merged.c_xy + part.c_xy + delta_x * delta_y * scale
+            )
+        return merged
+
+    def correlation(self) -> np.ndarray:
+        """
+        Get the Pearson correlation matrix.
+
+        Returns:
+            float32 array of shape (columns, columns), NaN where undefined
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = (self.c_xy / np.sqrt(self.m2_x * self.m2_y)).astype(np.float32)
+        corr[self.n < MIN_PERIODS] = np.nan
+        np.clip(corr, -1, 1, out=corr)
+        defined = ~np.isnan(np.diag(corr))
+        corr[np.diag_indices(corr.shape[0])] = np.where(defined, 1, np.nan)
+        return corr
+
+
+def cluster_order(corr: np.ndarray) -> np.ndarray:
+    """
+    Order columns so that strongly correlated columns sit next to each other.
+
+    Uses average-linkage hierarchical clustering on ``1 - |r|`` when SciPy is
+    available and a greedy nearest-neighbour chain otherwise.
+
+    Args:
+        corr: Square correlation matrix
+
+    Returns:
+        Array of column indices in display order
+    """
+    n_cols = corr.shape[0]
+    if n_cols <= 2:
+        return np.arange(n_cols)
+
+    distance = 1 - np.abs(np.nan_to_num(corr.astype(np.float64), nan=0.0))
+    np.fill_diagonal(distance, 0)
+    distance = np.clip((distance + distance.T) / 2, 0, 1)
+
+    try:
+        from scipy.cluster.hierarchy import linkage, leaves_list
+        from scipy.spatial.distance import squareform
+        return leaves_list(linkage(squareform(distance, checks=False), method='average'))
+    except ImportError:
+        logger.debug("SciPy not available, using greedy column ordering")
+
+    order = [int(np.argmin(distance.sum(axis=1)))]
+    remaining = np.ones(n_cols, dtype=bool)
+    remaining[order[0]] = False
+    while remaining.any():
+        candidates = np.flatnonzero(remaining)
+        nearest = candidates[np.argmin(distance[order[-1], candidates])]
+        order.append(int(nearest))
+        remaining[nearest] = False
+    return np.array(order)
+
+
+def top_pairs(corr: np.ndarray, labels: List[str], k: int = 20) -> List[Dict[str, Any]]:
+    """
+    Get the K most strongly correlated column pairs.
+
+    Args:
+        corr: Square correlation matrix
+        labels: Column names
+        k: Number of pairs to return
+
+    Returns:
+        List of ``{"x", "y", "v"}`` dicts sorted by absolute correlation
+    """
+    rows, cols = np.triu_indices(corr.shape[0], k=1)
+    strength = np.abs(corr[rows, cols])
+    strength = np.where(np.isnan(strength), -1, strength)
+    k = min(k, len(strength))
+    if k == 0:
+        return []
+    best = np.argpartition(-strength, k - 1)[:k]
+    best = best[np.argsort(-strength[best], kind='stable')]
+    return [
+        {"x": labels[rows[i]], "y": labels[cols[i]], "v": round(float(corr[rows[i], cols[i]]), 4)}
+        for i in best if strength[i] >= 0
+    ]
+
+
+def build_heatmap(df: pd.DataFrame, max_columns: int = 20, top_k: int = 20,
+                  tile_size: Optional[int] = None, max_rows: int = DEFAULT_MAX_ROWS,
+                  block_size: int = DEFAULT_BLOCK_SIZE) -> Dict[str, Any]:
+    """
+    Build a clustered correlation heatmap payload for any number of numeric columns.
+
+    The full matrix is computed over every numeric column, but only the
+    ``max_columns`` columns involved in the strongest correlations are sent
+    as cells, in clustered order, so payload size stays bounded for wide files.
+
+    Args:
+        df: Pandas DataFrame
+        max_columns: Maximum columns in the displayed matrix
+        top_k: Number of strongest pairs to report
+        tile_size: If set, also return the displayed matrix split into square tiles
+        max_rows: Rows sampled for the estimate on very long files
+        block_size: Columns per block for the matrix products
+
+    Returns:
+        Dict with heatmap data (``labels``, ``datasets`` cells, ``top_pairs``
+        and optionally ``tiles``)
+    """
+    start = time.perf_counter()
+    numeric = df.select_dtypes(include=['number'])
+    if numeric.shape[1] < 2:
+        raise ValueError("Not enough numeric columns for heatmap")
+
+    if len(numeric) > max_rows:
+        numeric = numeric.sample(max_rows, random_state=0)
+
+    labels = [str(col) for col in numeric.columns]
+    corr = correlation_matrix(numeric.to_numpy(dtype=np.float32, na_value=np.nan), block_size=block_size)
+    heatmap = heatmap_payload(corr, labels, max_columns=max_columns, top_k=top_k, tile_size=tile_size)
+
+    logger.info(f"Built correlation heatmap for {len(labels)} columns in {time.perf_counter() - start:.3f}s")
+    return heatmap
+
+
+def heatmap_payload(corr: np.ndarray, labels: List[str], max_columns: int = 20, top_k: int = 20,
+                    tile_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Format a correlation matrix as a clustered heatmap payload.
+
+    Args:
+        corr: Square correlation matrix over every numeric column
+        labels: Column names
+        max_columns: Maximum columns in the displayed matrix
+        top_k: Number of strongest pairs to report
+        tile_size: If set, also return the displayed matrix split into square tiles
+
+    Returns:
+        Dict with heatmap data
+    """
+    pairs = top_pairs(corr, labels, k=top_k)
+
+    # Keep the columns with the strongest relationships when there are too many to show
+    if len(labels) > max_columns:
+        off_diagonal = np.abs(np.nan_to_num(corr, nan=0.0))
+        np.fill_diagonal(off_diagonal, 0)
+        keep = np.sort(np.argsort(-off_diagonal.max(axis=1), kind='stable')[:max_columns])
+    else:
+        keep = np.arange(len(labels))
+
+    shown = corr[np.ix_(keep, keep)]
+    order = keep[cluster_order(shown)]
+    shown = np.round(corr[np.ix_(order, order)].astype(np.float64), 2)
+    shown_labels = [labels[i] for i in order]
+
+    # Cells in row-major order, matching the previous heatmap payload
+    size = len(shown_labels)
+    values = np.where(np.isnan(shown), 0.0, shown).ravel().tolist()
+    datasets = [
+        {"x": shown_labels[i % size], "y": shown_labels[i // size], "v": v}
+        for i, v in enumerate(values)
+    ]
+
+    heatmap = {
+        "type": "heatmap",
+        "labels": shown_labels,
+        "datasets": datasets,
+        "top_pairs": pairs,
+        "column_count": len(labels)
+    }
+
+    if tile_size:
+        heatmap["tiles"] = [
+            {
+                "row": r,
+                "col": c,
+                "values": np.where(np.isnan(shown[r:r + tile_size, c:c + tile_size]), None,
+                                   shown[r:r + tile_size, c:c + tile_size]).tolist()
+            }
+            for r in range(0, size, tile_size)
+            for c in range(0, size, tile_size)
+        ]
+        heatmap["tile_size"] = tile_size
+
+    return heatmap
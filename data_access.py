@@ -0,0 +1,357 @@
+import json
+import base64
+import logging
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from models import Conversation, Message, Report, ReportChart, SavedChart
+
+logger = logging.getLogger(__name__)
+
+# Ids bound per IN (...) query; stays well below SQLite's bound-parameter limit
+IN_QUERY_BATCH = 500
+
+# Rows per page of the history listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _int_ids(ids: Iterable[Any]) -> List[int]:
+    """Normalize ids from JSON (ints or numeric strings), dropping invalid ones."""
+    result = []
+    for value in ids:
+        try:
+            result.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return result
+
+
+def charts_by_id(chart_ids: Iterable[Any], user_id: Optional[int] = None) -> Dict[int, SavedChart]:
+    """
+    Load saved charts by id with batched IN queries.
+
+    Args:
+        chart_ids: Chart ids, possibly repeated or given as strings
+        user_id: Only return charts owned by this user, if given
+
+    Returns:
+        Dict of chart id to SavedChart; missing (or foreign) ids are absent
+    """
+    unique_ids = list(dict.fromkeys(_int_ids(chart_ids)))
+    charts = {}
+    for start in range(0, len(unique_ids), IN_QUERY_BATCH):
+        query = SavedChart.query.filter(SavedChart.id.in_(unique_ids[start:start + IN_QUERY_BATCH]))
+        if user_id is not None:
+            query = query.filter(SavedChart.user_id == user_id)
+        for chart in query.all():
+            charts[chart.id] = chart
+    return charts
+
+
+def load_charts(chart_ids: Iterable[Any], user_id: Optional[int] = None) -> List[SavedChart]:
+    """
+    Load saved charts in the given order with batched IN queries.
+
+    Args:
+        chart_ids: Chart ids in display order
+        user_id: Only return charts owned by this user, if given
+
+    Returns:
+        Charts in ``chart_ids`` order, skipping ids that were not found
+    """
+    chart_ids = _int_ids(chart_ids)
+    charts = charts_by_id(chart_ids, user_id)
+    return [charts[chart_id] for chart_id in chart_ids if chart_id in charts]
+
+
+def missing_chart_ids(chart_ids: Iterable[Any], user_id: int) -> List[Any]:
+    """
+    Find the requested chart ids that do not name one of the user's charts.
+
+    Args:
+        chart_ids: Requested chart ids, as given by the client
+        user_id: Owner the charts must belong to
+
+    Returns:
+        The ids (as given) that are invalid, missing or owned by someone else
+    """
+    chart_ids = list(chart_ids)
+    owned = charts_by_id(chart_ids, user_id)
+    missing = []
+    for chart_id in chart_ids:
+        normalized = _int_ids([chart_id])
+        if not normalized or normalized[0] not in owned:
+            missing.append(chart_id)
+    return missing
+
+
+def conversations_with_message_counts(user_id: int):
+    """
+    Build the query of a user's conversations with their message counts.
+
+    Counts come from one grouped subquery, so paging through the result
+    never runs a COUNT per conversation.
+
+    Args:
+        user_id: Owner of the conversations
+
+    Returns:
+        Query of (Conversation, message count) rows, for ``keyset_page``
+    """
+    counts = (db.session.query(Message.conversation_id, func.count(Message.id).label('message_count'))
+              .join(Conversation, Conversation.id == Message.conversation_id)
+              .filter(Conversation.user_id == user_id)
+              .group_by(Message.conversation_id).subquery())
+    return (db.session.query(Conversation, func.coalesce(counts.c.message_count, 0))
+            .outerjoin(counts, counts.c.conversation_id == Conversation.id)
+            .filter(Conversation.user_id == user_id))
+
+
+def recent_messages(conversation_id: int, limit: int) -> List[Message]:
+    """
+    Load the last messages of a conversation, oldest first.
+
+    Reads only the tail through the (conversation_id, id) index, so the cost
+    does not grow with the length of the conversation.
+
+    Args:
+        conversation_id: Conversation id
+        limit: Maximum number of messages
+
+    Returns:
+        Up to ``limit`` most recent messages in chronological order
+    """
+    messages = (Message.query.filter(Message.conversation_id == conversation_id)
+                .order_by(Message.id.desc()).limit(limit).all())
+    messages.reverse()
+    return messages
+
+
+def messages_between(conversation_id: int, after_id: int, before_id: int,
+                     limit: Optional[int] = None) -> List[Message]:
+    """
+    Load the messages of a conversation with ids strictly between two ids, oldest first.
+
+    Args:
+        conversation_id: Conversation id
+        after_id: Exclusive lower bound (0 for the start of the conversation)
+        before_id: Exclusive upper bound
+        limit: Maximum number of messages, counted from the oldest
+
+    Returns:
+        Messages in chronological order
+    """
+    query = (Message.query.filter(Message.conversation_id == conversation_id,
+                                  Message.id > after_id, Message.id < before_id)
+             .order_by(Message.id))
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def set_report_charts(report: Report, chart_ids: Iterable[Any]) -> None:
+    """
+    Set the charts of a report, in order.
+
+    Writes the ``report_charts`` links and the legacy ``chart_ids`` JSON
+    column together so both stay in sync.
+
+    Args:
+        report: Report to update (not committed)
+        chart_ids: Chart ids in display order
+    """
+    chart_ids = _int_ids(chart_ids)
+    report.chart_ids = json.dumps(chart_ids)
+    report.chart_links = [ReportChart(position=position, chart_id=chart_id)
+                          for position, chart_id in enumerate(chart_ids)]
+
+
+def load_report_charts(report_id: int) -> List[SavedChart]:
+    """
+    Load the charts of a report, in report order, with one joined query.
+
+    Args:
+        report_id: Report id
+
+    Returns:
+        Charts in display order; a chart used twice appears twice
+    """
+    rows = (db.session.query(ReportChart.position, SavedChart)
+            .join(SavedChart, SavedChart.id == ReportChart.chart_id)
+            .filter(ReportChart.report_id == report_id)
+            .order_by(ReportChart.position).all())
+    return [chart for _, chart in rows]
+
+
+def reports_with_chart_counts(user_id: int):
+    """
+    Build the query of a user's reports with their chart counts.
+
+    Args:
+        user_id: Owner of the reports
+
+    Returns:
+        Query of (Report, chart count) rows, for ``keyset_page``
+    """
+    counts = (db.session.query(ReportChart.report_id, func.count(ReportChart.position).label('chart_count'))
+              .join(Report, Report.id == ReportChart.report_id)
+              .filter(Report.user_id == user_id)
+              .group_by(ReportChart.report_id).subquery())
+    return (db.session.query(Report, func.coalesce(counts.c.chart_count, 0))
+            .outerjoin(counts, counts.c.report_id == Report.id)
+            .filter(Report.user_id == user_id))
+
+
+def encode_cursor(created_at: datetime.datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """
+    Decode a cursor from ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def keyset_page(query, model, limit: Optional[int] = None, cursor: Optional[str] = None,
+                since: Optional[str] = None) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Get one page of a listing ordered newest first on (created_at, id).
+
+    Pages are selected by comparing against the last seen key instead of an
+    OFFSET, so every page is an index range scan on
+    (user_id, created_at, id) however deep the client pages. ``cursor``
+    continues towards older rows; ``since`` returns only rows newer than
+    an earlier response (a delta refresh).
+
+    Args:
+        query: Query of ``model`` rows, or of tuples starting with ``model``
+        model: Model with ``created_at`` and ``id`` columns
+        limit: Page size, capped at MAX_PAGE_SIZE
+        cursor: ``next_cursor`` of the previous page, for older rows
+        since: ``newest_cursor`` of an earlier response, for newer rows
+
+    Returns:
+        Tuple of (rows newest first, page info with ``has_more``,
+        ``next_cursor`` and ``newest_cursor``)
+
+    Raises:
+        ValueError: On a malformed cursor, or if both cursor and since are given
+    """
+    if cursor and since:
+        raise ValueError("Use either cursor or since, not both")
+    limit = min(max(int(limit or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+
+    if since:
+        created_at, row_id = decode_cursor(since)
+        # Oldest new rows first, so repeated calls catch up without gaps
+        query = (query.filter(or_(model.created_at > created_at,
+                                  and_(model.created_at == created_at, model.id > row_id)))
+                 .order_by(model.created_at.asc(), model.id.asc()))
+    else:
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            query = query.filter(or_(model.created_at < created_at,
+                                     and_(model.created_at == created_at, model.id < row_id)))
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = [tuple(row) if not isinstance(row, model) else row for row in rows[:limit]]
+    if since:
+        rows.reverse()
+
+    def key(row):
+        entity = row if isinstance(row, model) else row[0]
+        return encode_cursor(entity.created_at, entity.id)
+
+    page = {
+        "limit": limit,
+        "has_more": has_more,
+        # Older rows are only paged from full listings; deltas are caught up with since
+        "next_cursor": key(rows[-1]) if rows and has_more and not since else None,
+        # Pages of older rows don't move the newest position the client refreshes from
+        "newest_cursor": key(rows[0]) if rows and not cursor else since
+    }
+    return rows, page
+
+
+def page_args(args) -> Dict[str, Any]:
+    """
+    Read keyset pagination parameters from request arguments.
+
+    Args:
+        args: ``request.args``
+
+    Returns:
+        Keyword arguments for ``keyset_page``
+    """
+    return {
+        "limit": args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+        "cursor": args.get('cursor') or None,
+        "since": args.get('since') or None
+    }
+
+
+def backfill_report_charts(connection) -> int:
+    """
+    Create ``report_charts`` links for reports that only have the legacy ``chart_ids`` JSON.
+
+    Runs on the given connection rather than ``db.session`` so the links are
+    written in the caller's transaction (the schema migration recording it).
+    Safe to run repeatedly; reports that already have links are skipped,
+    as are ids of charts that no longer exist.
+
+    Args:
+        connection: Connection with an open transaction
+
+    Returns:
+        Number of reports migrated
+    """
+    reports = Report.__table__
+    links = ReportChart.__table__
+    charts = SavedChart.__table__
+
+    has_links = select(links.c.report_id).where(links.c.report_id == reports.c.id).exists()
+    rows = connection.execute(select(reports.c.id, reports.c.chart_ids).where(~has_links)).all()
+
+    report_chart_ids = {}
+    for report_id, chart_ids in rows:
+        try:
+            report_chart_ids[report_id] = _int_ids(json.loads(chart_ids or '[]'))
+        except (TypeError, ValueError):
+            logger.warning(f"Report {report_id} has unreadable chart_ids, skipping")
+
+    wanted = list(dict.fromkeys(chart_id for chart_ids in report_chart_ids.values() for chart_id in chart_ids))
+    existing = set()
+    for start in range(0, len(wanted), IN_QUERY_BATCH):
+        batch = wanted[start:start + IN_QUERY_BATCH]
+        existing.update(connection.execute(select(charts.c.id).where(charts.c.id.in_(batch))).scalars())
+
+    values = []
+    migrated = 0
+    for report_id, chart_ids in report_chart_ids.items():
+        report_links = [{'report_id': report_id, 'position': position, 'chart_id': chart_id}
+                        for position, chart_id in enumerate(chart_ids) if chart_id in existing]
+        if report_links:
+            values.extend(report_links)
+            migrated += 1
+
+    if values:
+        connection.execute(links.insert(), values)
+        logger.info(f"Migrated chart links of {migrated} reports to report_charts")
+    return migrated
@@ -0,0 +1,212 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def file_cache_key(file_path: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Build a cache key identifying the current contents of a file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Tuple of (absolute path, mtime in ns, size) or None if the file is missing
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache, bounded by entry count and optionally by size."""
+
+    def __init__(self, max_entries: int = 32, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Most entries kept
+            max_bytes: Most total size kept, as measured by ``sizeof``; values
+                larger than this on their own are not cached
+            sizeof: Size of a value in bytes (required with ``max_bytes``)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Get a cached value or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes is not None and self._bytes > self.max_bytes):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted, 0)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, building it with ``factory`` on a miss.
+
+        The factory runs outside the lock, so two threads missing at the same
+        time may both build the value; the last one stored wins.
+        """
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _frame_bytes(df: Any) -> int:
+    """Get the memory used by a parsed dataframe, including its string values."""
+    return int(df.memory_usage(deep=True).sum()) if hasattr(df, 'memory_usage') else 0
+
+
+# Parsed frames are large; the size bound is what matters, the entry count only caps bookkeeping
+FRAME_CACHE_MAX_BYTES = int(os.environ.get('FRAME_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+_frame_cache = LRUCache(max_entries=64, max_bytes=FRAME_CACHE_MAX_BYTES, sizeof=_frame_bytes)
+
+
+def load_cached_dataframe(file_path: str, loader: Callable[[str], Any]) -> Any:
+    """
+    Load a dataframe through ``loader``, reusing the parsed frame while the file is unchanged.
+
+    Callers must treat the returned frame as read-only since it is shared
+    between requests.
+
+    Args:
+        file_path: Path to the data file
+        loader: Function that parses the file into a DataFrame (or returns None)
+
+    Returns:
+        pandas DataFrame or None if loading fails
+    """
+    file_key = file_cache_key(file_path)
+    if file_key is None:
+        return loader(file_path)
+
+    # Keyed by loader too, since each loader applies its own parsing rules
+    loader_name = f"{getattr(loader, '__module__', '')}.{getattr(loader, '__qualname__', repr(loader))}"
+    return _frame_cache.get_or_create((file_key, loader_name), lambda: loader(file_path))
+
+
+class DiskCachePruner:
+    """
+    Keep a directory of cached files under a size and age limit.
+
+    Cached files are evicted oldest first by modification time; readers
+    ``touch`` the files they serve, so the least recently used go first.
+    ``maybe_prune`` is cheap to call after every write: the directory is
+    scanned at most once per ``interval`` seconds.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: float, interval: float = 300):
+        """
+        Initialize the pruner.
+
+        Args:
+            directory: Cache directory (scanned recursively)
+            max_bytes: Total size to shrink the directory below
+            max_age: Seconds after which an unused file is removed
+            interval: Minimum seconds between two scans
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.interval = interval
+        self._last_run = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def touch(path: str) -> None:
+        """Mark a cached file as recently used."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def maybe_prune(self) -> None:
+        """Prune the directory unless it was pruned within the interval."""
+        with self._lock:
+            now = time.time()
+            if now - self._last_run < self.interval:
+                return
+            self._last_run = now
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Remove expired files, then the oldest ones until the directory fits in ``max_bytes``.
+
+        Returns:
+            Number of files removed
+        """
+        files = []
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        expired_before = time.time() - self.max_age
+        removed = 0
+        for mtime, size, path in files:
+            if mtime >= expired_before and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Pruned {removed} files from {self.directory} ({total} bytes left)")
+        return removed
@@ -0,0 +1,301 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+from combined_visualization import CombinedDataset, CombinedVisualizer, column_kind
+from dataset_cache import LRUCache, load_cached_dataframe
+from distribution import QuantileSketch
+from visualization import DataVisualizer
+
+logger = logging.getLogger(__name__)
+
+# Most frequent values listed per categorical column in summaries
+SUMMARY_TOP_VALUES = 10
+
+# Summarized contexts kept per (user, session) for chat
+_session_contexts = LRUCache(max_entries=64)
+
+
+class DatasetContext:
+    """
+    Request-scoped view of a selection of data files.
+
+    Every file is loaded and type-inferred once, with the same loader the
+    charts use, and profiled once. The summary, chart options,
+    visualizations and AI prompt of a request all read from the same
+    context, so they agree on column types. Time spent in each stage is
+    recorded in ``timings``.
+    """
+
+    def __init__(self, file_paths: List[str], combine_files: bool = False,
+                 visualizer: Optional[DataVisualizer] = None):
+        """
+        Initialize the context.
+
+        Args:
+            file_paths: Paths of the selected files
+            combine_files: Whether the files are analyzed as one dataset
+            visualizer: DataVisualizer whose loader parses the files
+        """
+        self.file_paths = list(file_paths)
+        self.combine_files = combine_files and len(self.file_paths) > 1
+        self.visualizer = visualizer or DataVisualizer()
+        self.timings = {}
+        self._frames = {}
+        self._profiles = {}
+        self._value_counts = {}
+        self._combined = None
+        self._summary = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Record the time spent in a block under a stage name.
+
+        Args:
+            name: Stage name; repeated stages accumulate
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def timings_ms(self) -> Dict[str, float]:
+        """Get the recorded stage timings in milliseconds."""
+        return {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()}
+
+    def release(self) -> None:
+        """Drop the references to loaded frames, keeping profiles and summary."""
+        self._frames.clear()
+
+    def frame(self, file_path: str) -> Optional[pd.DataFrame]:
+        """
+        Get the parsed dataframe of a selected file, loading it on first use.
+
+        The frame is shared with the dataset cache and must not be modified.
+
+        Args:
+            file_path: Path of a selected file
+
+        Returns:
+            Pandas DataFrame, or None if the file could not be loaded
+        """
+        if file_path not in self._frames:
+            with self.stage('load'):
+                self._frames[file_path] = load_cached_dataframe(file_path, self.visualizer._load_file)
+        return self._frames[file_path]
+
+    def profile(self, file_path: str) -> Dict[str, Any]:
+        """
+        Get the summary of one file (shape, dtypes, missing data, column statistics).
+
+        Args:
+            file_path: Path of a selected file
+
+        Returns:
+            Summary dict, or ``{"error": ...}`` if the file could not be loaded
+        """
+        if file_path in self._profiles:
+            return self._profiles[file_path]
+
+        df = self.frame(file_path)
+        with self.stage('profile'):
+            if df is None:
+                profile = {"error": f"Failed to load file {os.path.basename(file_path)}"}
+            else:
+                profile = {
+                    "shape": {"rows": df.shape[0], "columns": df.shape[1]},
+                    "columns": list(df.columns),
+                    "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+                    "missing_data": {col: int(n) for col, n in df.isnull().sum().items()},
+                    "numeric_columns": {},
+                    "categorical_columns": {}
+                }
+
+                for col in df.select_dtypes(include=['number']).columns:
+                    values = df[col]
+                    stats = {"min": values.min(), "max": values.max(), "mean": values.mean(),
+                             "median": values.median(), "std": values.std()}
+                    profile["numeric_columns"][str(col)] = {
+                        name: float(value) if not pd.isna(value) else 0 for name, value in stats.items()
+                    }
+
+                counts = {}
+                for col in df.select_dtypes(include=['object', 'category']).columns:
+                    counts[col] = df[col].value_counts()
+                    profile["categorical_columns"][str(col)] = {
+                        str(k): int(v) for k, v in counts[col].head(SUMMARY_TOP_VALUES).items()
+                    }
+                self._value_counts[file_path] = counts
+
+        self._profiles[file_path] = profile
+        return profile
+
+    def combined_dataset(self) -> CombinedDataset:
+        """Get the combined-mode dataset (schema and per-file partials) of the selection."""
+        if self._combined is None:
+            for file_path in self.file_paths:
+                self.frame(file_path)
+            with self.stage('profile'):
+                self._combined = CombinedVisualizer(self.visualizer).load(self.file_paths)
+                self._combined.profile()
+        return self._combined
+
+    def column_kinds(self) -> Dict[str, str]:
+        """
+        Get the chart kind ('number', 'category', 'datetime' or 'other') of every column.
+
+        Combined selections use the combined schema; otherwise the first
+        loadable file is described, as the dashboard charts it.
+
+        Returns:
+            Dict of column to kind
+        """
+        if self.combine_files:
+            return dict(self.combined_dataset().kinds)
+        for file_path in self.file_paths:
+            df = self.frame(file_path)
+            if df is not None:
+                return {col: column_kind(dtype) for col, dtype in df.dtypes.items()}
+        return {}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the selection, per file or as one combined dataset.
+
+        Combined summaries are merged from the per-file profiles rather than
+        computed on a concatenated frame. If any file fails to load, files are
+        summarized individually instead.
+
+        Returns:
+            Dict with ``success``, ``data`` (summaries keyed by file name, or a
+            single ``combined_data`` entry) and ``combined``
+        """
+        if self._summary is not None:
+            return self._summary
+
+        try:
+            profiles = {os.path.basename(path): self.profile(path) for path in self.file_paths}
+
+            combined = self.combine_files and not any("error" in p for p in profiles.values())
+            if self.combine_files and not combined:
+                logger.warning("Not every file could be loaded, summarizing files individually")
+
+            if combined:
+                self.combined_dataset()
+                with self.stage('summary'):
+                    data = {"combined_data": self._combined_summary()}
+            else:
+                data = profiles
+
+            self._summary = {"success": True, "data": data, "combined": combined}
+
+        except Exception as e:
+            logger.error(f"Error summarizing dataset: {str(e)}")
+            logger.error(traceback.format_exc())
+            self._summary = {"success": False, "error": str(e)}
+
+        return self._summary
+
+    def _combined_summary(self) -> Dict[str, Any]:
+        """Merge the per-file profiles into the summary of the concatenated files."""
+        dataset = self.combined_dataset()
+        frames = [(path, self.frame(path)) for path in self.file_paths]
+        rows = sum(len(df) for _, df in frames)
+
+        summary = {
+            "shape": {"rows": rows, "columns": len(dataset.columns)},
+            "columns": list(dataset.columns),
+            "dtypes": {col: str(dtype) for col, dtype in dataset.dtypes.items()},
+            "missing_data": {
+                # Files without the column contribute all their rows as missing
+                col: int(sum(int(df[col].isnull().sum()) if col in df.columns else len(df) for _, df in frames))
+                for col in dataset.columns
+            },
+            "numeric_columns": {},
+            "categorical_columns": {},
+            "source_files": [os.path.basename(path) for path in self.file_paths]
+        }
+
+        numeric_cols = dataset.columns_of('number')
+        sketches = dataset.sketches(numeric_cols)
+        for col in numeric_cols:
+            summary["numeric_columns"][str(col)] = self._merge_numeric([df[col] for _, df in frames if col in df.columns],
+                                                                       QuantileSketch.merge(sketches[col]))
+
+        for col in dataset.columns_of('category'):
+            parts = [self._value_counts[path][col] if col in self._value_counts[path] else df[col].value_counts()
+                     for path, df in frames if col in df.columns]
+            merged = pd.concat(parts).groupby(level=0, sort=False).sum().sort_values(ascending=False, kind='stable')
+            summary["categorical_columns"][str(col)] = {
+                str(k): int(v) for k, v in merged.head(SUMMARY_TOP_VALUES).items()
+            }
+
+        summary["file_breakdown"] = {source: rows for source, rows in zip(dataset.sources, dataset.rows)}
+        return summary
+
+    @staticmethod
+    def _merge_numeric(parts: List[pd.Series], sketch: QuantileSketch) -> Dict[str, float]:
+        """
+        Combine the statistics of one numeric column over several files.
+
+        Means and standard deviations are merged from per-file counts, means
+        and sums of squared deviations; the median comes from the merged
+        quantile sketch.
+        """
+        count, mean, m2 = 0, 0.0, 0.0
+        minimum, maximum = np.nan, np.nan
+        for values in parts:
+            n = int(values.count())
+            if n == 0:
+                continue
+            part_mean = float(values.mean())
+            part_m2 = float(values.var(ddof=0)) * n
+            delta = part_mean - mean
+            total = count + n
+            mean += delta * n / total
+            m2 += part_m2 + delta ** 2 * count * n / total
+            count = total
+            minimum = np.fmin(minimum, float(values.min()))
+            maximum = np.fmax(maximum, float(values.max()))
+
+        stats = {
+            "min": minimum,
+            "max": maximum,
+            "mean": mean if count else np.nan,
+            "median": float(sketch.quantiles([0.5])[0]),
+            "std": np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+        }
+        return {name: float(value) if not pd.isna(value) else 0 for name, value in stats.items()}
+
+
+def get_session_context(session_key: Hashable, fingerprint: Hashable, file_paths: List[str]) -> DatasetContext:
+    """
+    Get the summarized data context of a session's files, rebuilding it only when they change.
+
+    Cached contexts keep their profiles and summary but not the parsed frames.
+
+    Args:
+        session_key: Identifies the session, e.g. (user id, session id)
+        fingerprint: Changes whenever the session's uploads change
+        file_paths: Paths of the session's active files
+
+    Returns:
+        DatasetContext with its summary computed
+    """
+    cached = _session_contexts.get(session_key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    context = DatasetContext(file_paths)
+    context.summary()
+    context.release()
+    logger.info(f"Built session data context for {len(file_paths)} files (timings ms: {context.timings_ms()})")
+    _session_contexts.put(session_key, (fingerprint, context))
+    return context
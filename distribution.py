@@ -0,0 +1,339 @@
+import pandas as pd
+import numpy as np
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dataset_cache import LRUCache, file_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Outlier values kept per column (first ones in row order)
+MAX_OUTLIERS = 20
+
+# Upper bound on Freedman-Diaconis bins so heavy tails don't explode the payload
+MAX_HISTOGRAM_BINS = 30
+
+# Bin count used when the interquartile range is zero
+FALLBACK_BINS = 10
+
+# Points kept by a quantile sketch before it starts compressing
+SKETCH_SIZE = 8192
+
+_distribution_cache = LRUCache(max_entries=32)
+
+
+def histogram_bins(count: np.ndarray, minimum: np.ndarray, maximum: np.ndarray, iqr: np.ndarray,
+                   max_bins: int = MAX_HISTOGRAM_BINS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Choose Freedman-Diaconis bins for one or more columns.
+
+    Args:
+        count: Non-missing values per column
+        minimum: Column minimums
+        maximum: Column maximums
+        iqr: Interquartile ranges
+        max_bins: Maximum bins per column
+
+    Returns:
+        Tuple of (bin counts, lower edges, upper edges) arrays
+    """
+    data_range = maximum - minimum
+    with np.errstate(divide='ignore', invalid='ignore'):
+        width = 2 * iqr / np.cbrt(count)
+        bins = np.where(width > 0, np.ceil(data_range / width), FALLBACK_BINS)
+    bins = np.clip(np.nan_to_num(bins, nan=1), 1, max_bins).astype(int)
+
+    # Constant columns get a unit-wide range around the value, like np.histogram
+    low = np.where(data_range > 0, minimum, minimum - 0.5)
+    high = np.where(data_range > 0, maximum, maximum + 0.5)
+    return bins, low, high
+
+
+class QuantileSketch:
+    """
+    Mergeable summary of a numeric column for approximate quantiles.
+
+    Keeps every value (exact quantiles) until more than ``max_size`` have been
+    seen, then compresses runs of sorted values into weighted centroids. The
+    exact minimum and maximum are always kept. Sketches of separate files can
+    be merged into a sketch of their union.
+    """
+
+    def __init__(self, values: np.ndarray, weights: np.ndarray, minimum: float, maximum: float,
+                 max_size: int = SKETCH_SIZE):
+        """
+        Initialize the sketch.
+
+        Args:
+            values: Sorted centroid values
+            weights: Number of original values behind each centroid
+            minimum: Exact minimum
+            maximum: Exact maximum
+            max_size: Centroids kept before compressing
+        """
+        self.values = values
+        self.weights = weights
+        self.minimum = minimum
+        self.maximum = maximum
+        self.max_size = max_size
+
+    @property
+    def count(self) -> int:
+        """Number of values summarized."""
+        return int(self.weights.sum())
+
+    @classmethod
+    def from_values(cls, values: Any, max_size: int = SKETCH_SIZE) -> 'QuantileSketch':
+        """
+        Build a sketch from raw values (NaNs are ignored).
+
+        Args:
+            values: Array-like of numbers
+            max_size: Centroids kept before compressing
+
+        Returns:
+            QuantileSketch
+        """
+        values = np.asarray(values, dtype=float)
+        values = np.sort(values[~np.isnan(values)])
+        if len(values) == 0:
+            return cls(values, np.zeros(0), np.nan, np.nan, max_size)
+        sketch = cls(values, np.ones(len(values)), float(values[0]), float(values[-1]), max_size)
+        sketch._compress()
+        return sketch
+
+    @classmethod
+    def merge(cls, sketches: List['QuantileSketch']) -> 'QuantileSketch':
+        """
+        Merge sketches of disjoint sets of values.
+
+        Args:
+            sketches: Sketches to merge
+
+        Returns:
+            QuantileSketch of the union
+        """
+        sketches = [s for s in sketches if len(s.values)]
+        max_size = max((s.max_size for s in sketches), default=SKETCH_SIZE)
+        if not sketches:
+            return cls(np.zeros(0), np.zeros(0), np.nan, np.nan, max_size)
+
+        values = np.concatenate([s.values for s in sketches])
+        weights = np.concatenate([s.weights for s in sketches])
+        order = np.argsort(values, kind='stable')
+        merged = cls(values[order], weights[order], min(s.minimum for s in sketches),
+                     max(s.maximum for s in sketches), max_size)
+        merged._compress()
+        return merged
+
+    def _compress(self) -> None:
+        """Collapse runs of neighbouring values into weighted means once over capacity."""
+        if len(self.values) <= self.max_size:
+            return
+        # Equal-weight buckets along the cumulative weight
+        cumulative = np.cumsum(self.weights) - self.weights / 2
+        buckets = np.minimum((cumulative / self.weights.sum() * self.max_size).astype(int), self.max_size - 1)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        weights = np.add.reduceat(self.weights, starts)
+        self.values = np.add.reduceat(self.values * self.weights, starts) / weights
+        self.weights = weights
+
+    def quantiles(self, probabilities: List[float]) -> np.ndarray:
+        """
+        Estimate quantiles with the same linear interpolation as ``Series.quantile``.
+
+        Exact while the sketch is uncompressed.
+
+        Args:
+            probabilities: Quantile levels between 0 and 1
+
+        Returns:
+            Array of quantile values (NaN for an empty sketch)
+        """
+        probabilities = np.asarray(probabilities, dtype=float)
+        if len(self.values) == 0:
+            return np.full(len(probabilities), np.nan)
+
+        # Rank of each centroid in the full sorted data (its middle for merged runs)
+        ranks = np.cumsum(self.weights) - (self.weights + 1) / 2
+        result = np.interp(probabilities * (self.count - 1), ranks, self.values)
+        result[probabilities <= 0] = self.minimum
+        result[probabilities >= 1] = self.maximum
+        return result
+
+
+class ColumnDistributions:
+    """
+    Distribution statistics for every numeric column of a dataset.
+
+    Quartiles, whiskers, capped outlier samples and Freedman-Diaconis
+    histograms are computed for all columns together: one sort of the value
+    matrix shared by quantiles and histograms, plus one vectorized outlier
+    mask.
+    """
+
+    def __init__(self, columns: List[str], count: np.ndarray, quantiles: np.ndarray,
+                 whiskers: np.ndarray, outliers: Dict[str, List[float]],
+                 histograms: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """
+        Initialize the statistics.
+
+        Args:
+            columns: Numeric column names
+            count: Non-missing values per column
+            quantiles: Array of shape (5, columns) with min, q1, median, q3, max
+            whiskers: Array of shape (2, columns) with lower and upper whisker
+            outliers: Outlier samples keyed by column
+            histograms: (counts, bin edges) keyed by column
+        """
+        self.columns = columns
+        self.count = count
+        self.quantiles = quantiles
+        self.whiskers = whiskers
+        self.outliers = outliers
+        self.histograms = histograms
+        self._positions = {col: i for i, col in enumerate(columns)}
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, max_outliers: int = MAX_OUTLIERS,
+                       max_bins: int = MAX_HISTOGRAM_BINS) -> 'ColumnDistributions':
+        """
+        Compute the statistics for all numeric columns of a dataframe.
+
+        Args:
+            df: Pandas DataFrame
+            max_outliers: Outlier values kept per column
+            max_bins: Maximum histogram bins per column
+
+        Returns:
+            ColumnDistributions
+        """
+        start = time.perf_counter()
+        columns = df.select_dtypes(include=['number']).columns.tolist()
+        values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+        count = (~np.isnan(values)).sum(axis=0)
+
+        # NaNs sort to the end, so each column's values are its first `count` rows
+        ordered = np.sort(values, axis=0)
+        quantiles = cls._quantiles(ordered, count, [0, 0.25, 0.5, 0.75, 1])
+        minimum, q1, _, q3, maximum = quantiles
+        iqr = q3 - q1
+        whiskers = np.vstack([np.fmax(minimum, q1 - 1.5 * iqr), np.fmin(maximum, q3 + 1.5 * iqr)])
+
+        # First max_outliers outliers of each column, in row order
+        is_outlier = (values < whiskers[0]) | (values > whiskers[1])
+        outlier_cols, outlier_rows = np.nonzero(is_outlier.T)
+        bounds = np.searchsorted(outlier_cols, np.arange(len(columns) + 1))
+        outliers = {
+            col: values[outlier_rows[bounds[i]:min(bounds[i + 1], bounds[i] + max_outliers)], i].tolist()
+            for i, col in enumerate(columns)
+        }
+
+        histograms = cls._histograms(ordered, columns, count, minimum, maximum, iqr, max_bins)
+
+        logger.info(f"Computed distributions for {len(columns)} columns in {time.perf_counter() - start:.3f}s")
+        return cls(columns, count, quantiles, whiskers, outliers, histograms)
+
+    @staticmethod
+    def _quantiles(ordered: np.ndarray, count: np.ndarray, probabilities: List[float]) -> np.ndarray:
+        """
+        Compute quantiles of every column of a column-sorted matrix.
+
+        Uses the same linear interpolation as ``Series.quantile``. All-NaN
+        columns get NaN.
+        """
+        cols = np.arange(ordered.shape[1])
+        last = np.maximum(count - 1, 0)
+        result = np.full((len(probabilities), ordered.shape[1]), np.nan)
+        if ordered.shape[0] == 0:
+            return result
+
+        for i, p in enumerate(probabilities):
+            position = p * last
+            below = np.floor(position).astype(int)
+            above = np.ceil(position).astype(int)
+            fraction = position - below
+            low, high = ordered[below, cols], ordered[above, cols]
+            result[i] = low + (high - low) * fraction
+        result[:, count == 0] = np.nan
+        return result
+
+    @staticmethod
+    def _histograms(ordered: np.ndarray, columns: List[str], count: np.ndarray,
+                    minimum: np.ndarray, maximum: np.ndarray, iqr: np.ndarray,
+                    max_bins: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Bin every column with Freedman-Diaconis bin widths.
+
+        Counts come from binary searches of the bin edges in the already
+        sorted columns, with the same half-open bins (last bin closed) as
+        ``np.histogram``.
+        """
+        bins, low, high = histogram_bins(count, minimum, maximum, iqr, max_bins)
+
+        histograms = {}
+        for i, col in enumerate(columns):
+            if count[i] == 0:
+                continue
+            edges = np.linspace(low[i], high[i], bins[i] + 1)
+            below = np.searchsorted(ordered[:count[i], i], edges, side='left')
+            below[-1] = count[i]
+            histograms[col] = (np.diff(below), edges)
+        return histograms
+
+    def columns_with_data(self) -> List[str]:
+        """Get the numeric columns that have at least one value."""
+        return [col for col, n in zip(self.columns, self.count) if n > 0]
+
+    def box(self, column: str) -> Dict[str, Any]:
+        """
+        Get box plot values for a column.
+
+        Args:
+            column: Numeric column
+
+        Returns:
+            Dict with min, q1, median, q3, max (whiskers) and outliers
+        """
+        i = self._positions[column]
+        return {
+            "min": float(self.whiskers[0, i]),
+            "q1": float(self.quantiles[1, i]),
+            "median": float(self.quantiles[2, i]),
+            "q3": float(self.quantiles[3, i]),
+            "max": float(self.whiskers[1, i]),
+            "outliers": self.outliers[column]
+        }
+
+    def histogram(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the histogram of a column.
+
+        Args:
+            column: Numeric column with at least one value
+
+        Returns:
+            Tuple of (counts, bin edges)
+        """
+        return self.histograms[column]
+
+
+def get_distributions(df: pd.DataFrame, file_path: Optional[str] = None) -> ColumnDistributions:
+    """
+    Get the distribution statistics for a dataframe, reusing cached ones when possible.
+
+    Args:
+        df: Pandas DataFrame
+        file_path: Path of the file the dataframe was loaded from, if any
+
+    Returns:
+        ColumnDistributions
+    """
+    file_key = file_cache_key(file_path) if file_path else None
+    if file_key is None:
+        return ColumnDistributions.from_dataframe(df)
+
+    layout = tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+    return _distribution_cache.get_or_create((file_key, layout, len(df)),
+                                             lambda: ColumnDistributions.from_dataframe(df))
@@ -6,9 +6,6 @@ import logging
 import traceback
 from pathlib import Path
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
@@ -87,7 +84,7 @@ class DataProcessor:
                         if delim in sample_str:
                             potential_delimiters.append(delim)
                     
-                    logger.debug(f"Potential delimiters detected: {potential_delimiters}")
+                    logger.debug("Potential delimiters detected: %s", potential_delimiters)
                     
                     # Try with different encodings and potential delimiters
                     best_df = None
@@ -104,9 +101,9 @@ class DataProcessor:
                             if df.shape[1] > max_columns:
                                 best_df = df
                                 max_columns = df.shape[1]
-                                logger.debug(f"Auto-detected delimiter with encoding {encoding} found {df.shape[1]} columns")
+                                logger.debug("Auto-detected delimiter with encoding %s found %s columns", encoding, df.shape[1])
                         except Exception as e:
-                            logger.debug(f"Auto-detection failed with encoding {encoding}: {str(e)}")
+                            logger.debug("Auto-detection failed with encoding %s: %s", encoding, e)
                         
                         # Try each potential delimiter
                         for sep in potential_delimiters:
@@ -115,9 +112,9 @@ class DataProcessor:
                                 if df.shape[1] > max_columns:
                                     best_df = df
                                     max_columns = df.shape[1]
-                                    logger.debug(f"Delimiter '{sep}' with encoding {encoding} found {df.shape[1]} columns")
+                                    logger.debug("Delimiter '%s' with encoding %s found %s columns", sep, encoding, df.shape[1])
                             except Exception as e:
-                                logger.debug(f"Error with delimiter '{sep}' and encoding {encoding}: {str(e)}")
+                                logger.debug("Error with delimiter '%s' and encoding %s: %s", sep, encoding, e)
                     
                     # If we found a dataframe with columns, use it
                     if best_df is not None:
@@ -226,7 +223,7 @@ class DataProcessor:
                         best_df = df
                         max_columns = df.shape[1]
                 except Exception as e:
-                    logger.debug(f"Error inferring delimiter: {str(e)}")
+                    logger.debug("Error inferring delimiter: %s", e)
                 
                 # Try common delimiters explicitly
                 for sep in [',', '\t', '|', ';', ' ']:
@@ -235,9 +232,9 @@ class DataProcessor:
                         if df.shape[1] > max_columns:
                             best_df = df
                             max_columns = df.shape[1]
-                            logger.debug(f"Delimiter '{sep}' found {df.shape[1]} columns")
+                            logger.debug("Delimiter '%s' found %s columns", sep, df.shape[1])
                     except Exception as e:
-                        logger.debug(f"Error with delimiter '{sep}': {str(e)}")
+                        logger.debug("Error with delimiter '%s': %s", sep, e)
                 
                 # Try fixed width if other methods don't find many columns
                 if max_columns < 3:
@@ -246,9 +243,9 @@ class DataProcessor:
                         if df.shape[1] > max_columns:
                             best_df = df
                             max_columns = df.shape[1]
-                            logger.debug(f"Fixed width format found {df.shape[1]} columns")
+                            logger.debug("Fixed width format found %s columns", df.shape[1])
                     except Exception as e:
-                        logger.debug(f"Error with fixed width format: {str(e)}")
+                        logger.debug("Error with fixed width format: %s", e)
                 
                 # Use the best dataframe we found
                 if best_df is not None:
@@ -0,0 +1,64 @@
+"""
+Gunicorn settings for SmartDataHub.
+
+The app is loaded once in the master process (``preload_app``): imports,
+templates, the asset manifest and schema migrations happen before any
+worker exists, and forked workers share that memory. Each worker then only
+starts what can't cross a fork (log writer thread, render pools, job
+threads), so a new or replaced worker serves its first request within
+``WORKER_BOOT_BUDGET`` seconds.
+
+Gunicorn reads this file from the working directory, so
+``gunicorn main:app`` picks it up; settings can be overridden on the
+command line as usual.
+"""
+import os
+import time
+import multiprocessing
+
+wsgi_app = 'main:app'
+
+# main.py would start services in the master; post_fork starts them per worker instead
+os.environ['START_SERVICES'] = '0'
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# Threads keep a worker responsive while others wait on AI calls or stream answers
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+preload_app = True
+
+# AI requests can take a while; streamed answers send data as they go
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Seconds from fork to ready above which a worker's boot is logged as slow
+WORKER_BOOT_BUDGET = float(os.environ.get('WORKER_BOOT_BUDGET', 2.0))
+
+
+def when_ready(server):
+    """Finish loading in the master, right before the first workers are forked."""
+    from app import db, preload_modules
+    preload_modules()
+
+    # Connections opened by the migrations must not be shared by the workers
+    with server.app.wsgi().app_context():
+        db.engine.dispose()
+
+
+def post_fork(server, worker):
+    """Start the per-process services of a new worker."""
+    worker.boot_started = time.perf_counter()
+    from app import start_services
+    start_services(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    """Report how long the worker took to become ready."""
+    elapsed = time.perf_counter() - worker.boot_started
+    if elapsed > WORKER_BOOT_BUDGET:
+        worker.log.warning(f"Worker {worker.pid} took {elapsed:.2f}s to boot (budget {WORKER_BOOT_BUDGET:.2f}s)")
+    else:
+        worker.log.info(f"Worker {worker.pid} ready in {elapsed:.2f}s")
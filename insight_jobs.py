@@ -0,0 +1,104 @@
+import json
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from app import db
+from models import Job
+from ai_integration import get_ai_instance
+from jobs import JobError, job_handler, enqueue, SUCCEEDED, FAILED, PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+INSIGHTS_JOB = 'insights.generate'
+
+# Message shown when the AI call itself raised
+INSIGHT_FAILURE_MESSAGE = "Unable to generate AI insights at this time."
+
+# Seconds between two reads of a job that is still running, while a reader waits for it
+STATUS_POLL_INTERVAL = 0.5
+
+
+def submit_insights(user_id: int, data_summary: Dict[str, Any]) -> Job:
+    """
+    Queue the AI insights of an analysis.
+
+    ``/analyze`` returns the dashboard right away with the job; the browser
+    then collects the result by polling or over Server-Sent Events. The job
+    lives in the shared queue, so any web process can answer for it.
+
+    Args:
+        user_id: Owner of the analysis, who may read the result
+        data_summary: Summary of the analyzed data sent to the AI
+
+    Returns:
+        The queued job
+    """
+    # A failed LLM call is reported rather than retried; the user is waiting on it
+    return enqueue(INSIGHTS_JOB, {"data_summary": data_summary}, user_id=user_id,
+                   priority=PRIORITY_INTERACTIVE, max_attempts=1)
+
+
+@job_handler(INSIGHTS_JOB)
+def run_insights_job(job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler generating the AI insights of an analysis."""
+    ai_client = get_ai_instance()
+    if not ai_client:
+        raise JobError("AI service not available")
+
+    job.progress(0.1, "Generating insights")
+    return {"ai_insights": ai_client.analyze_data_initial(payload['data_summary'])}
+
+
+def insights_status(job: Job) -> Dict[str, Any]:
+    """
+    Describe an insights job for the dashboard.
+
+    Args:
+        job: Insights job
+
+    Returns:
+        Dict with ``job_id``, ``status`` (pending, done or error) and
+        ``ai_insights`` once finished
+    """
+    result = {"job_id": job.id, "status": "pending", "ai_insights": None}
+    if job.status == SUCCEEDED:
+        result.update(status="done", ai_insights=json.loads(job.result or '{}').get("ai_insights"))
+    elif job.status == FAILED:
+        result.update(status="error", ai_insights=INSIGHT_FAILURE_MESSAGE)
+    else:
+        return result
+
+    if job.started_at and job.finished_at:
+        result["duration_ms"] = round((job.finished_at - job.started_at).total_seconds() * 1000, 1)
+    return result
+
+
+def wait_for_insights(job_id: int, user_id: int, wait: float = 0) -> Optional[Dict[str, Any]]:
+    """
+    Get the status of an insights job, waiting a little for it to finish.
+
+    The job may run in any process, so this re-reads its row until it is
+    finished or ``wait`` seconds have passed. The transaction is ended after
+    every read so the waiting reader doesn't hold up the job's writes.
+
+    Args:
+        job_id: Job id
+        user_id: User asking; other users' jobs are not found
+        wait: Seconds to wait for the result before answering
+
+    Returns:
+        Status from ``insights_status``, or None if the job is unknown
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        job = Job.query.filter_by(id=job_id, user_id=user_id, kind=INSIGHTS_JOB).first()
+        status = insights_status(job) if job else None
+        db.session.rollback()
+
+        if status is None or status["status"] != "pending":
+            return status
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return status
+        time.sleep(min(STATUS_POLL_INTERVAL, remaining))
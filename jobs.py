@@ -0,0 +1,417 @@
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import datetime
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+
+# Optional - without it every process may start embedded workers
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from app import db
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# Common priorities; jobs a user is waiting on go ahead of batch work
+PRIORITY_BATCH = -10
+PRIORITY_NORMAL = 0
+PRIORITY_INTERACTIVE = 10
+
+# Seconds a worker may hold a job without reporting progress before others may take it over
+DEFAULT_LEASE_SECONDS = 300
+
+# Delay before the first retry; doubled on every further attempt
+RETRY_BACKOFF_SECONDS = 5
+
+# Seconds an idle worker waits before looking for work again
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Seconds between two checks for jobs abandoned on their last attempt
+REAP_INTERVAL = 60
+
+# Held by the one web process per host that runs embedded workers
+EMBEDDED_LOCK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'job-workers.lock')
+
+# Open lock file and the process that locked it; a forked child must lock its own
+_embedded_lock = None
+_embedded_lock_pid = None
+
+# Registered job handlers by kind
+_handlers = {}
+
+
+class JobError(Exception):
+    """Raised by a handler for failures that retrying will not fix."""
+
+
+def job_handler(kind: str) -> Callable:
+    """
+    Register a function as the handler of a job kind.
+
+    Handlers are called as ``handler(context, payload)`` inside an application
+    context and return a JSON-serializable result.
+
+    Args:
+        kind: Job kind, e.g. ``report.pdf``
+    """
+    def register(func: Callable) -> Callable:
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def enqueue(kind: str, payload: Dict[str, Any], user_id: Optional[int] = None,
+            priority: int = PRIORITY_NORMAL, max_attempts: int = 3, delay: float = 0) -> Job:
+    """
+    Add a job to the queue.
+
+    Args:
+        kind: Registered job kind
+        payload: JSON-serializable arguments for the handler
+        user_id: Owner of the job, who may read its status and result
+        priority: Higher priorities are claimed first
+        max_attempts: Attempts before the job is marked failed
+        delay: Seconds before the job may run
+
+    Returns:
+        The committed Job
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(
+        user_id=user_id,
+        kind=kind,
+        payload=json.dumps(payload),
+        status=QUEUED,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=_now() + datetime.timedelta(seconds=delay)
+    )
+    db.session.add(job)
+    db.session.commit()
+    logger.info(f"Queued job {job.id} ({kind}, priority {priority})")
+    return job
+
+
+def describe(job: Job) -> Dict[str, Any]:
+    """
+    Describe a job for API responses.
+
+    Args:
+        job: Job to describe
+
+    Returns:
+        Dict with the job's state, progress and (once finished) result or error
+    """
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "progress": job.progress,
+        "progress_message": job.progress_message,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has taken over a job whose lease expired."""
+
+
+class JobContext:
+    """Handle given to job handlers for reporting progress."""
+
+    def __init__(self, job: Job, worker_id: str, lease_seconds: int):
+        self.job_id = job.id
+        self.user_id = job.user_id
+        self.attempt = job.attempts
+        self._worker_id = worker_id
+        self._lease_seconds = lease_seconds
+
+    def _update(self, values: Dict[str, Any]) -> int:
+        """Update the job row if this worker still holds its lease."""
+        count = Job.query.filter(Job.id == self.job_id, Job.status == RUNNING,
+                                 Job.lease_owner == self._worker_id).update(values, synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """
+        Report progress and renew the lease.
+
+        Args:
+            fraction: Completed fraction between 0 and 1
+            message: Optional short description of the current step
+
+        Raises:
+            LeaseLost: If another worker has taken over the job
+        """
+        values = {
+            "progress": min(max(float(fraction), 0.0), 1.0),
+            "lease_expires_at": _now() + datetime.timedelta(seconds=self._lease_seconds)
+        }
+        if message is not None:
+            values["progress_message"] = message[:256]
+        if not self._update(values):
+            raise LeaseLost(f"Lease on job {self.job_id} was lost")
+
+
+class JobWorker:
+    """
+    Claim and run queued jobs.
+
+    Jobs are claimed with a conditional update on their status and lease, so
+    any number of workers, threads or processes, can share the database
+    without an external broker. A job whose worker died is picked up again
+    once its lease expires. Failed attempts are retried with exponential
+    backoff until ``max_attempts`` is reached.
+    """
+
+    def __init__(self, app, worker_id: Optional[str] = None, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Initialize the worker.
+
+        Args:
+            app: Flask application whose database holds the jobs
+            worker_id: Unique name of this worker, recorded as the lease owner
+            lease_seconds: Lease length; handlers renew it when reporting progress
+            poll_interval: Seconds to sleep when no job is due
+        """
+        self.app = app
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._next_reap = 0.0
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Ask the worker to stop after its current job."""
+        self._stop.set()
+
+    def run(self) -> None:
+        """Run jobs until stopped."""
+        logger.info(f"Job worker {self.worker_id} started")
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    ran = self.run_once()
+            except Exception as e:
+                logger.error(f"Job worker {self.worker_id} error: {str(e)}")
+                logger.error(traceback.format_exc())
+                ran = False
+            if not ran:
+                self._stop.wait(self.poll_interval)
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    def run_once(self) -> bool:
+        """
+        Claim and run one due job. Must be called inside an application context.
+
+        Returns:
+            True if a job was run
+        """
+        if time.monotonic() >= self._next_reap:
+            self._next_reap = time.monotonic() + REAP_INTERVAL
+            self._fail_exhausted()
+        job = self._claim()
+        if job is None:
+            return False
+        self._execute(job)
+        return True
+
+    def _fail_exhausted(self) -> None:
+        """Fail running jobs whose lease expired on their last attempt."""
+        exhausted = Job.query.filter(Job.status == RUNNING, Job.lease_expires_at < _now(),
+                                     Job.attempts >= Job.max_attempts)
+        # Read first: the update takes the write lock, and there is rarely anything to fail
+        if exhausted.with_entities(Job.id).first() is None:
+            db.session.rollback()
+            return
+        count = exhausted.update({
+            "status": FAILED,
+            "error": "Worker stopped responding",
+            "lease_owner": None,
+            "finished_at": _now()
+        }, synchronize_session=False)
+        db.session.commit()
+        if count:
+            logger.warning(f"Marked {count} abandoned jobs as failed")
+
+    def _claim(self) -> Optional[Job]:
+        """Take the lease on the highest-priority due job, if any."""
+        now = _now()
+        claimable = or_(
+            and_(Job.status == QUEUED, Job.run_after <= now),
+            # Jobs of workers that stopped renewing their lease
+            and_(Job.status == RUNNING, Job.lease_expires_at < now, Job.attempts < Job.max_attempts)
+        )
+        candidates = (Job.query.with_entities(Job.id).filter(claimable)
+                      .order_by(Job.priority.desc(), Job.run_after, Job.id).limit(5).all())
+
+        for (job_id,) in candidates:
+            # Another worker may claim the same job between the select and this update
+            count = Job.query.filter(Job.id == job_id, claimable).update({
+                "status": RUNNING,
+                "lease_owner": self.worker_id,
+                "lease_expires_at": now + datetime.timedelta(seconds=self.lease_seconds),
+                "attempts": Job.attempts + 1,
+                "started_at": now
+            }, synchronize_session=False)
+            db.session.commit()
+            if count:
+                return db.session.get(Job, job_id)
+        return None
+
+    def _execute(self, job: Job) -> None:
+        """Run a claimed job and record its outcome."""
+        context = JobContext(job, self.worker_id, self.lease_seconds)
+        handler = _handlers.get(job.kind)
+        logger.info(f"Running job {job.id} ({job.kind}, attempt {job.attempts}/{job.max_attempts})")
+
+        try:
+            if handler is None:
+                raise JobError(f"No handler registered for job kind {job.kind}")
+            result = handler(context, json.loads(job.payload))
+            finished = {
+                "status": SUCCEEDED,
+                "progress": 1.0,
+                "result": json.dumps(result),
+                "error": None,
+                "lease_owner": None,
+                "finished_at": _now()
+            }
+            if not context._update(finished):
+                raise LeaseLost(f"Lease on job {job.id} was lost")
+            logger.info(f"Job {job.id} succeeded")
+
+        except LeaseLost as e:
+            db.session.rollback()
+            logger.warning(str(e))
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+
+            retry = not isinstance(e, JobError) and job.attempts < job.max_attempts
+            if retry:
+                delay = RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                values = {"status": QUEUED, "error": str(e), "lease_owner": None,
+                          "run_after": _now() + datetime.timedelta(seconds=delay)}
+            else:
+                values = {"status": FAILED, "error": str(e), "lease_owner": None, "finished_at": _now()}
+            context._update(values)
+            if retry:
+                logger.info(f"Job {job.id} will be retried in {delay}s")
+
+
+def _lock_embedded_workers(path: str, block: bool = False) -> bool:
+    """
+    Take the host-wide lock on running embedded workers.
+
+    Args:
+        path: Lock file
+        block: Wait until the process holding the lock releases it
+
+    Returns:
+        True if this process holds the lock (or locking is unavailable)
+    """
+    global _embedded_lock, _embedded_lock_pid
+    if fcntl is None:
+        return True
+    if _embedded_lock is not None and _embedded_lock_pid == os.getpid():
+        return True
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle = open(path, 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX if block else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        if block:
+            raise
+        return False
+    # Kept open for the life of the process; the lock goes away with it
+    _embedded_lock, _embedded_lock_pid = handle, os.getpid()
+    return True
+
+
+def _run_embedded_workers(app, count: int) -> List[JobWorker]:
+    """Start ``count`` job workers on daemon threads."""
+    workers = []
+    for index in range(count):
+        worker = JobWorker(app)
+        thread = threading.Thread(target=worker.run, name=f'job-worker-{index}', daemon=True)
+        thread.start()
+        workers.append(worker)
+    return workers
+
+
+def _take_over_embedded_workers(app, count: int, lock_path: str) -> None:
+    """Wait for the process running embedded workers to exit, then run them here."""
+    try:
+        _lock_embedded_workers(lock_path, block=True)
+    except OSError as e:
+        logger.error(f"Could not lock {lock_path}; embedded job workers not started: {str(e)}")
+        return
+    logger.info(f"Process {os.getpid()} took over the embedded job workers")
+    _run_embedded_workers(app, count)
+
+
+def start_embedded_workers(app, count: int, lock_path: str = EMBEDDED_LOCK_PATH) -> List[JobWorker]:
+    """
+    Run job workers on daemon threads of the web process.
+
+    Convenient for development and single-process deployments; larger
+    deployments run ``worker.py`` processes instead and set the count to 0.
+    Only one process per host runs them: with several web workers, the
+    first to take the lock file runs the jobs and the others don't poll the
+    queue. Each of the others waits for the lock on a daemon thread, so when
+    the holder exits (a recycled worker, or old workers finishing their
+    requests during a graceful reload) one of them takes over.
+
+    Args:
+        app: Flask application
+        count: Number of worker threads
+        lock_path: Lock file shared by the processes of the host
+
+    Returns:
+        The started workers; empty if they will start once the lock is free
+    """
+    if count <= 0:
+        return []
+    if _lock_embedded_workers(lock_path):
+        return _run_embedded_workers(app, count)
+
+    logger.info(f"Embedded job workers run in another process; process {os.getpid()} takes over when it exits")
+    waiter = threading.Thread(target=_take_over_embedded_workers, args=(app, count, lock_path),
+                              name='job-worker-lock', daemon=True)
+    waiter.start()
+    return []
@@ -0,0 +1,148 @@
+import logging
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from aggregation import get_cube
+from combined_visualization import CombinedDataset, CombinedVisualizer
+from dataset_cache import LRUCache, file_cache_key
+from distribution import get_distributions
+from visualization import DataVisualizer
+
+logger = logging.getLogger(__name__)
+
+
+class _DatasetCharts:
+    """Charts computed so far for one selection of files."""
+
+    def __init__(self, file_paths: List[str], combine_files: bool):
+        self.file_paths = list(file_paths)
+        self.combine_files = combine_files
+        self.lock = threading.Lock()
+        self.frame_lock = threading.Lock()
+        self.frame = None
+        self.dataset = None
+        self.cube = None
+        self.distributions = None
+        self.charts = {}
+
+
+class LazyVisualizations:
+    """
+    Compute dashboard chart bodies on first request instead of up front.
+
+    ``/analyze`` only returns chart descriptors; each chart is generated the
+    first time it is requested and kept while the underlying files are
+    unchanged. ``prefetch`` warms likely charts on a small background pool so
+    most requests find their chart already computed.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 8):
+        """Initialize the chart store and its prefetch pool."""
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chart-prefetch')
+        self._entries = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._visualizer = DataVisualizer()
+        self._combined = CombinedVisualizer(self._visualizer)
+
+    def _entry(self, file_paths: List[str], combine_files: bool) -> _DatasetCharts:
+        """Get (or create) the chart entry for a file selection."""
+        combine_files = combine_files and len(file_paths) > 1
+        key = (tuple(file_cache_key(path) for path in file_paths), combine_files)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _DatasetCharts(file_paths, combine_files)
+                self._entries.put(key, entry)
+            return entry
+
+    def _load(self, entry: _DatasetCharts) -> None:
+        """Load the frame, aggregation cube and distribution statistics for an entry once."""
+        with entry.frame_lock:
+            if entry.frame is not None or entry.dataset is not None:
+                return
+            if entry.combine_files:
+                # Combined charts merge per-file aggregates instead of one concatenated frame
+                entry.dataset = self._combined.load(entry.file_paths)
+                return
+            frame = self._visualizer.load_visualization_frame(entry.file_paths)
+            entry.cube = get_cube(frame, file_path=entry.file_paths[0])
+            entry.distributions = get_distributions(frame, file_path=entry.file_paths[0])
+            entry.frame = frame
+
+    def _compute(self, entry: _DatasetCharts, chart_type: str) -> Dict[str, Any]:
+        """Generate one chart for an entry."""
+        try:
+            self._load(entry)
+            if entry.dataset is not None:
+                return self._combined.generate_chart(entry.dataset, chart_type)
+            return self._visualizer.generate_chart(entry.frame, chart_type, cube=entry.cube,
+                                                  distributions=entry.distributions)
+        except Exception as e:
+            logger.error(f"Error computing {chart_type}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return {"error": str(e)}
+
+    def _publish(self, entry: _DatasetCharts, chart_type: str, future: Future) -> None:
+        """Compute a chart into its future; errors are not kept, so the next request tries again."""
+        result = self._compute(entry, chart_type)
+        future.set_result(result)
+        if "error" in result:
+            with entry.lock:
+                if entry.charts.get(chart_type) is future:
+                    del entry.charts[chart_type]
+
+    def get_chart(self, file_paths: List[str], chart_type: str, combine_files: bool = False,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get a chart body, computing it in the calling thread if nobody has yet.
+
+        Args:
+            file_paths: Paths of the selected files
+            chart_type: Chart id, e.g. ``bar_chart``
+            combine_files: Whether the files are analyzed combined
+            timeout: Maximum seconds to wait for an in-flight prefetch
+
+        Returns:
+            Dict with chart data
+        """
+        entry = self._entry(file_paths, combine_files)
+        with entry.lock:
+            future = entry.charts.get(chart_type)
+            owner = future is None
+            if owner:
+                future = Future()
+                entry.charts[chart_type] = future
+
+        if owner:
+            self._publish(entry, chart_type, future)
+        return future.result(timeout=timeout)
+
+    def prefetch(self, file_paths: List[str], chart_types: List[str], combine_files: bool = False,
+                 dataset: Optional[CombinedDataset] = None) -> None:
+        """
+        Warm charts in the background, in the given order.
+
+        Args:
+            file_paths: Paths of the selected files
+            chart_types: Chart ids, most likely to be viewed first
+            combine_files: Whether the files are analyzed combined
+            dataset: Already profiled combined dataset for the files, if any
+        """
+        entry = self._entry(file_paths, combine_files)
+        if dataset is not None and entry.combine_files:
+            with entry.frame_lock:
+                if entry.dataset is None:
+                    entry.dataset = dataset
+        for chart_type in chart_types:
+            with entry.lock:
+                if chart_type in entry.charts:
+                    continue
+                future = Future()
+                entry.charts[chart_type] = future
+            self._executor.submit(self._publish, entry, chart_type, future)
+        logger.debug("Queued prefetch of %s", chart_types)
+
+
+lazy_visualizations = LazyVisualizations()
@@ -0,0 +1,148 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Chatty third-party loggers stay at WARNING unless LOG_LEVELS says otherwise
+DEFAULT_MODULE_LEVELS = {
+    'urllib3': 'WARNING',
+    'httpx': 'WARNING',
+    'httpcore': 'WARNING',
+    'openai': 'WARNING',
+    'matplotlib': 'WARNING',
+    'PIL': 'WARNING',
+    'fontTools': 'WARNING',
+    'weasyprint': 'WARNING',
+}
+
+# Listener of the configured process; rebuilt after a fork, whose child has no listener thread
+_listener = None
+_listener_pid = None
+_lock = threading.Lock()
+
+
+def parse_settings(value: Optional[str]) -> Dict[str, str]:
+    """
+    Parse ``name=value`` pairs separated by commas, e.g. ``routes=DEBUG,jobs=WARNING``.
+
+    Args:
+        value: Setting string (may be empty or None)
+
+    Returns:
+        Dict of logger name to value
+    """
+    settings = {}
+    for item in (value or '').split(','):
+        name, sep, setting = item.partition('=')
+        if sep and name.strip() and setting.strip():
+            settings[name.strip()] = setting.strip()
+    return settings
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Pass only one in every N low-level records of a call site.
+
+    Meant for debug output in loops (per column, per delimiter tried): with
+    a rate of 20 for ``file_processing``, each ``logger.debug`` line there
+    is emitted on its 1st, 21st, 41st... call. Rates apply to a logger and
+    its children; records above ``max_level`` are never dropped.
+    """
+
+    def __init__(self, rates: Dict[str, int], max_level: int = logging.DEBUG):
+        """
+        Initialize the filter.
+
+        Args:
+            rates: Sampling rate (keep 1 in N) by logger name
+            max_level: Highest level that is sampled
+        """
+        super().__init__()
+        self.rates = {name: max(int(rate), 1) for name, rate in rates.items()}
+        self.max_level = max_level
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name: str) -> int:
+        """Get the rate of a logger from its most specific configured ancestor."""
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate == 1:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % rate == 0
+
+
+def configure_logging(level: Optional[str] = None, module_levels: Optional[Dict[str, str]] = None,
+                      sample_rates: Optional[Dict[str, int]] = None, fmt: str = DEFAULT_FORMAT,
+                      stream=None) -> QueueListener:
+    """
+    Configure process-wide logging with a background writer thread.
+
+    Records pass through a QueueHandler, so the logging thread only
+    enqueues them; a QueueListener thread formats and writes them. Levels
+    and sampling rates default to the ``LOG_LEVEL``, ``LOG_LEVELS`` and
+    ``LOG_SAMPLE`` environment variables. Calling again in the same process
+    returns the existing listener; in a forked child it starts a new one.
+
+    Args:
+        level: Root level name (default ``LOG_LEVEL`` or INFO)
+        module_levels: Level names by logger name, on top of the defaults
+            for chatty libraries (default from ``LOG_LEVELS``)
+        sample_rates: Keep 1 in N debug records per call site, by logger
+            name (default from ``LOG_SAMPLE``)
+        fmt: Record format
+        stream: Output stream (default stderr)
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener, _listener_pid
+    with _lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return _listener
+
+        level = (level or os.environ.get('LOG_LEVEL') or 'INFO').upper()
+        levels = dict(DEFAULT_MODULE_LEVELS)
+        levels.update(module_levels if module_levels is not None else parse_settings(os.environ.get('LOG_LEVELS')))
+        if sample_rates is None:
+            sample_rates = {name: int(rate) for name, rate in parse_settings(os.environ.get('LOG_SAMPLE')).items()
+                            if rate.isdigit()}
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(logging.Formatter(fmt))
+
+        records = queue.SimpleQueue()
+        handler = QueueHandler(records)
+        handler.addFilter(SamplingFilter(sample_rates))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+        for name, module_level in levels.items():
+            logging.getLogger(name).setLevel(module_level.upper())
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+        atexit.register(_listener.stop)
+        return _listener
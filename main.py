@@ -1,6 +1,40 @@
+import os
+import sys
+
 from app import create_app
 
-app = create_app()
+
+def is_reloader_parent() -> bool:
+    """Whether this process is the dev server's reloader, which only restarts a child that serves requests."""
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        return False
+    # app.run below always runs in debug mode, with the reloader
+    if __name__ == '__main__':
+        return True
+    # `flask run` loads the app in the reloader too; debug mode reloads unless --no-reload is given
+    return (os.environ.get('FLASK_RUN_FROM_CLI') == 'true'
+            and os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true')
+            and '--no-reload' not in sys.argv)
+
+
+def should_start_services() -> bool:
+    """
+    Decide whether this process starts the app's background services.
+
+    Services start by default, so any WSGI server (``flask run``, uwsgi,
+    waitress, gunicorn without our config) gets working job and render
+    workers. gunicorn.conf.py sets START_SERVICES=0 because it starts them
+    in each forked worker instead.
+    """
+    if os.environ.get('START_SERVICES', '1') == '0':
+        return False
+    # Render pool processes re-import the entry script under this name
+    if __name__ == '__mp_main__':
+        return False
+    return not is_reloader_parent()
+
+
+app = create_app(start=should_start_services())
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,114 @@
+import logging
+import datetime
+from typing import Callable, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+# Registered migrations as (version, description, function)
+_migrations = []
+
+
+def migration(version: int, description: str) -> Callable:
+    """
+    Register a function as a schema migration.
+
+    Migrations are called as ``func(connection)`` in version order, each in
+    its own transaction, and recorded in ``schema_migrations`` once applied.
+    They must be safe to run on a database that already has the change:
+    new databases get every table and index from ``db.create_all`` before
+    the migrations run, and two processes starting together may both apply
+    the same migration.
+
+    Args:
+        version: Unique, increasing migration number
+        description: Short summary recorded with the version
+    """
+    def register(func: Callable) -> Callable:
+        if any(existing == version for existing, _, _ in _migrations):
+            raise ValueError(f"Duplicate migration version: {version}")
+        _migrations.append((version, description, func))
+        return func
+    return register
+
+
+def create_index(connection, table_name: str, index_name: str, *columns: str) -> None:
+    """
+    Create an index unless it already exists.
+
+    Args:
+        connection: Connection of the running migration
+        table_name: Table to index
+        index_name: Index name
+        columns: Indexed columns, in order
+    """
+    existing = {index['name'] for index in inspect(connection).get_indexes(table_name)}
+    if index_name in existing:
+        return
+    connection.execute(text(f"CREATE INDEX {index_name} ON {table_name} ({', '.join(columns)})"))
+
+
+def upgrade() -> List[int]:
+    """
+    Bring the database schema up to date. Must be called inside an application context.
+
+    Creates missing tables, then applies the migrations not yet recorded in
+    ``schema_migrations``.
+
+    Returns:
+        Versions applied by this call
+    """
+    db.create_all()
+    applied = {version for (version,) in db.session.query(SchemaMigration.version).all()}
+    db.session.commit()
+
+    newly_applied = []
+    for version, description, func in sorted(_migrations, key=lambda item: item[0]):
+        if version in applied:
+            continue
+        try:
+            with db.engine.begin() as connection:
+                func(connection)
+                connection.execute(SchemaMigration.__table__.insert().values(
+                    version=version, description=description, applied_at=datetime.datetime.utcnow()))
+        except IntegrityError:
+            # Another process recorded the same migration first
+            logger.info(f"Migration {version} was applied concurrently")
+            continue
+        newly_applied.append(version)
+        logger.info(f"Applied migration {version}: {description}")
+
+    if not newly_applied:
+        logger.info("Database schema is up to date")
+    return newly_applied
+
+
+@migration(1, "Link reports saved before report_charts existed")
+def link_legacy_report_charts(connection) -> None:
+    from data_access import backfill_report_charts
+    backfill_report_charts(connection)
+
+
+@migration(2, "Indexes for keyset pagination of conversations, saved charts and reports")
+def add_pagination_indexes(connection) -> None:
+    create_index(connection, 'conversations', 'ix_conversations_user_created', 'user_id', 'created_at', 'id')
+    create_index(connection, 'saved_charts', 'ix_saved_charts_user_created', 'user_id', 'created_at', 'id')
+    create_index(connection, 'reports', 'ix_reports_user_created', 'user_id', 'created_at', 'id')
+
+
+@migration(3, "Index for the recent message window of a conversation")
+def add_message_window_index(connection) -> None:
+    create_index(connection, 'messages', 'ix_messages_conversation_id_id', 'conversation_id', 'id')
+
+
+@migration(4, "Composite indexes for upload, message and job lookups")
+def add_lookup_indexes(connection) -> None:
+    create_index(connection, 'uploads', 'ix_uploads_session_user_active', 'session_id', 'user_id', 'active')
+    create_index(connection, 'uploads', 'ix_uploads_user_active_date', 'user_id', 'active', 'upload_date')
+    create_index(connection, 'messages', 'ix_messages_conversation_timestamp', 'conversation_id', 'timestamp')
+    create_index(connection, 'jobs', 'ix_jobs_kind_status', 'kind', 'status')
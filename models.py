@@ -31,6 +31,10 @@ class User(UserMixin, db.Model):
 class Conversation(db.Model):
     """Model for storing AI conversations."""
     __tablename__ = 'conversations'
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        db.Index('ix_conversations_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -39,6 +43,8 @@ class Conversation(db.Model):
     
     # Relationships
     messages = db.relationship('Message', backref='conversation', lazy='dynamic', cascade='all, delete-orphan')
+    summary = db.relationship('ConversationSummary', backref='conversation', uselist=False,
+                              cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Conversation {self.id}>'
@@ -46,6 +52,12 @@ class Conversation(db.Model):
 class Message(db.Model):
     """Model for storing individual messages in a conversation."""
     __tablename__ = 'messages'
+    __table_args__ = (
+        # The recent tail of a conversation, and the messages after a summary's last one
+        db.Index('ix_messages_conversation_id_id', 'conversation_id', 'id'),
+        # Full conversation view, in timestamp order
+        db.Index('ix_messages_conversation_timestamp', 'conversation_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
@@ -56,9 +68,28 @@ class Message(db.Model):
     def __repr__(self):
         return f'<Message {self.id} {"User" if self.is_user else "AI"}>'
 
+class ConversationSummary(db.Model):
+    """Model for the rolling summary of a conversation's older messages."""
+    __tablename__ = 'conversation_summaries'
+    
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id', ondelete='CASCADE'), primary_key=True)
+    content = db.Column(db.Text, nullable=False, default='')
+    through_message_id = db.Column(db.Integer, nullable=False, default=0)  # Last message folded into the summary
+    message_count = db.Column(db.Integer, nullable=False, default=0)  # Messages folded into the summary
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ConversationSummary {self.conversation_id} through {self.through_message_id}>'
+
 class Upload(db.Model):
     """Model for tracking user file uploads."""
     __tablename__ = 'uploads'
+    __table_args__ = (
+        # Active files of the current session
+        db.Index('ix_uploads_session_user_active', 'session_id', 'user_id', 'active'),
+        # A user's most recent active upload (report generation)
+        db.Index('ix_uploads_user_active_date', 'user_id', 'active', 'upload_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -76,6 +107,10 @@ class Upload(db.Model):
 class SavedChart(db.Model):
     """Model for saving user generated charts."""
     __tablename__ = 'saved_charts'
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        db.Index('ix_saved_charts_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -91,14 +126,80 @@ class SavedChart(db.Model):
 class Report(db.Model):
     """Model for saving generated reports."""
     __tablename__ = 'reports'
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        db.Index('ix_reports_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(256), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    chart_ids = db.Column(db.Text, nullable=False)  # JSON array of chart IDs
+    chart_ids = db.Column(db.Text, nullable=False)  # JSON array of chart IDs, kept in sync with chart_links
     content = db.Column(db.Text, nullable=True)  # Markdown content of the report
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
+    # Relationships
+    chart_links = db.relationship('ReportChart', backref='report', order_by='ReportChart.position',
+                                  cascade='all, delete-orphan')
+    
     def __repr__(self):
         return f'<Report {self.id}>'
+
+class ReportChart(db.Model):
+    """Model linking a report to its charts, in display order."""
+    __tablename__ = 'report_charts'
+    __table_args__ = (
+        # Reports are looked up by the primary key prefix (report_id); charts need their own index
+        db.Index('ix_report_charts_chart_id', 'chart_id'),
+    )
+    
+    report_id = db.Column(db.Integer, db.ForeignKey('reports.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)  # 0-based order of the chart in the report
+    chart_id = db.Column(db.Integer, db.ForeignKey('saved_charts.id'), nullable=False)
+    
+    def __repr__(self):
+        return f'<ReportChart {self.report_id}:{self.position} {self.chart_id}>'
+
+class Job(db.Model):
+    """Model for background jobs run by the job workers."""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Workers claim the highest-priority due job first
+        db.Index('ix_jobs_claim', 'status', 'priority', 'run_after'),
+        # Pending jobs of a kind, checked before queueing a duplicate
+        db.Index('ix_jobs_kind_status', 'kind', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    kind = db.Column(db.String(64), nullable=False)  # Registered handler name
+    payload = db.Column(db.Text, nullable=False)  # JSON arguments for the handler
+    status = db.Column(db.String(16), nullable=False, default='queued')  # queued, running, succeeded, failed
+    priority = db.Column(db.Integer, nullable=False, default=0)  # Higher runs first
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    progress = db.Column(db.Float, nullable=False, default=0.0)  # 0 to 1
+    progress_message = db.Column(db.String(256), nullable=True)
+    result = db.Column(db.Text, nullable=True)  # JSON result of the handler
+    error = db.Column(db.Text, nullable=True)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    lease_owner = db.Column(db.String(64), nullable=True)  # Worker currently running the job
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+class SchemaMigration(db.Model):
+    """Model recording the schema migrations applied to the database."""
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(256), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchemaMigration {self.version}>'
@@ -0,0 +1,173 @@
+import os
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from logging_config import configure_logging
+from dataset_cache import DiskCachePruner
+
+logger = logging.getLogger(__name__)
+
+# Bump when the HTML to PDF conversion changes so cached documents are re-rendered
+RENDER_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'reports')
+
+# Cached documents are pruned, least recently used first, beyond this size or age
+DEFAULT_CACHE_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# Workers are forked from a single-threaded server process, never from a web
+# worker whose other threads may hold locks the child would inherit
+POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+if POOL_CONTEXT.get_start_method() == 'forkserver':
+    # Also passes sys.path to the server; the default would re-import __main__ there
+    POOL_CONTEXT.set_forkserver_preload(['chart_renderer', 'pdf_renderer'])
+
+
+def _init_worker() -> None:
+    """Import WeasyPrint and load its fonts once per worker process."""
+    # A forked worker inherits the parent's log queue but not its writer thread
+    configure_logging()
+    from weasyprint import HTML
+    HTML(string='<p>warm-up</p>').write_pdf()
+
+
+def write_pdf(html: str) -> bytes:
+    """Convert an HTML document to PDF with WeasyPrint."""
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf()
+
+
+class PdfRenderer:
+    """
+    Render HTML documents to PDF in a pool of warmed-up worker processes.
+
+    Documents are cached on disk under a key the caller derives from
+    everything that affects the output, so downloading an unchanged report
+    again serves the stored file without rendering. The cache is pruned to
+    a size and age limit, least recently used documents first.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_workers: int = 1,
+                 cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, cache_max_age: float = DEFAULT_CACHE_MAX_AGE):
+        """Initialize the renderer; worker processes start on ``warm`` or first use."""
+        self.cache_dir = cache_dir
+        self._pruner = DiskCachePruner(cache_dir, cache_max_bytes, cache_max_age)
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Get the worker pool, starting it if needed."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                                     mp_context=POOL_CONTEXT)
+            return self._executor
+
+    def _reset_pool(self) -> None:
+        """Drop a broken pool so the next call starts a fresh one."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def warm(self) -> None:
+        """Start the worker processes in the background so they are ready for the first export."""
+        # Worker processes that import the app must not start pools of their own
+        if multiprocessing.parent_process() is not None:
+            return
+        try:
+            pool = self._pool()
+            for _ in range(self.max_workers):
+                pool.submit(int)
+            logger.info(f"Warming {self.max_workers} PDF render workers")
+        except Exception as e:
+            logger.warning(f"Could not start PDF render workers: {str(e)}")
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def cache_key(self, *parts: str) -> str:
+        """
+        Build the content hash identifying a rendered document.
+
+        Args:
+            parts: Everything the document depends on (content, template version, ...)
+
+        Returns:
+            Hex digest, also usable as a strong ETag
+        """
+        digest = hashlib.sha256()
+        for part in (str(RENDER_VERSION),) + parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        """Get the file path of a cached document."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pdf")
+
+    def cached_path(self, key: str) -> Optional[str]:
+        """
+        Get the path of an already rendered document.
+
+        Args:
+            key: Key from ``cache_key``
+
+        Returns:
+            File path, or None if the document has not been rendered
+        """
+        path = self._cache_path(key)
+        if not os.path.isfile(path):
+            return None
+        self._pruner.touch(path)
+        return path
+
+    def render(self, key: str, build_html: Callable[[], str], timeout: float = 120) -> str:
+        """
+        Get the PDF file for a key, rendering it in a worker process on a cache miss.
+
+        Args:
+            key: Key from ``cache_key``
+            build_html: Builds the HTML document; only called on a cache miss
+            timeout: Maximum seconds to wait for the render
+
+        Returns:
+            Path of the PDF file
+        """
+        path = self.cached_path(key)
+        if path is not None:
+            logger.debug("PDF cache hit for %s", key[:12])
+            return path
+
+        html = build_html()
+        try:
+            pdf_content = self._pool().submit(write_pdf, html).result(timeout=timeout)
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise RuntimeError("PDF render worker died")
+
+        path = self._cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf_content)
+        os.replace(tmp_path, path)
+        logger.info(f"Rendered PDF {key[:12]} ({len(pdf_content)} bytes)")
+        self._pruner.maybe_prune()
+        return path
+
+
+pdf_renderer = PdfRenderer()
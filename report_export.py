@@ -0,0 +1,338 @@
+import os
+import html
+import json
+import base64
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app import db
+from models import Report, Upload
+from data_access import load_report_charts
+from file_processing import DataProcessor
+from ai_integration import get_ai_instance
+from chart_renderer import chart_renderer, RENDER_VERSION as CHART_RENDER_VERSION
+from pdf_renderer import pdf_renderer
+from jobs import JobError, job_handler
+
+logger = logging.getLogger(__name__)
+
+# Bump when the report HTML template or styling changes so cached PDFs are re-rendered
+REPORT_TEMPLATE_VERSION = 1
+
+
+def report_charts(report: Report) -> List[Dict[str, Any]]:
+    """
+    Get the saved charts of a report, in report order.
+
+    Args:
+        report: Report whose charts to load
+
+    Returns:
+        List of chart dicts (id, chart_type, chart_title, chart_data, chart_config, created_at)
+    """
+    charts = []
+    for chart in load_report_charts(report.id):
+        charts.append({
+            "id": chart.id,
+            "chart_type": chart.chart_type,
+            "chart_title": chart.chart_title,
+            "chart_data": chart.chart_data,
+            "chart_config": chart.chart_config,
+            "created_at": chart.created_at.isoformat()
+        })
+    return charts
+
+
+def recent_data_summary(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Summarize a file the user uploaded in the last 24 hours, for report context.
+
+    Args:
+        user_id: Report owner
+
+    Returns:
+        Data summary dict, or None if there is no recent readable upload
+    """
+    cutoff_time = datetime.now() - timedelta(hours=24)
+    latest_upload = Upload.query.filter(Upload.user_id == user_id,
+                                        Upload.upload_date >= cutoff_time,
+                                        Upload.active == True).first()
+    if not latest_upload:
+        return None
+
+    # Try to get data summary from the file
+    try:
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], latest_upload.filename)
+        processor = DataProcessor()
+        data_result = processor.process_file(file_path)
+        if data_result.get("success", False):
+            return data_result.get("summary", None)
+    except Exception as e:
+        logger.warning(f"Could not get data summary for report: {str(e)}")
+    return None
+
+
+def ensure_report_content(report: Report, charts: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Get the Markdown content of a report, generating and saving it with the AI if missing.
+
+    Args:
+        report: Report to get the content of
+        charts: The report's charts, from ``report_charts``
+
+    Returns:
+        Markdown content, or None if it is missing and the AI service is unavailable
+    """
+    if report.content:
+        return report.content
+
+    ai_client = get_ai_instance()
+    if not ai_client:
+        return None
+
+    # Generate the report content
+    content = ai_client.generate_report(charts, recent_data_summary(report.user_id))
+
+    # Update the report with the generated content
+    report.content = content
+    db.session.add(report)
+    db.session.commit()
+    return content
+
+
+def build_report_html(report: Report, content: str, charts: List[Dict[str, Any]]) -> str:
+    """
+    Build the printable HTML of a report, with its charts rendered as images.
+
+    Args:
+        report: Report being exported
+        content: Markdown content of the report
+        charts: The report's charts, from ``report_charts``
+
+    Returns:
+        HTML document
+    """
+    # Convert markdown to HTML
+    import markdown
+    html_content = markdown.markdown(content)
+
+    # Chart images are rendered server-side and reused across exports
+    chart_html = ""
+    images = chart_renderer.render_many(charts, image_format='png')
+    for chart, image in zip(charts, images):
+        if image is None:
+            continue
+        encoded = base64.b64encode(image).decode('ascii')
+        chart_html += f"""
+        <div class="report-chart">
+            <img src="data:image/png;base64,{encoded}" alt="{html.escape(chart['chart_title'] or '')}">
+        </div>
+        """
+    if chart_html:
+        chart_html = f'<h2>Charts</h2>{chart_html}'
+
+    # Add proper styling
+    styled_html = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>{report.title}</title>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                line-height: 1.6;
+                margin: 20px;
+                color: #333;
+            }}
+            h1 {{
+                color: #2c3e50;
+                border-bottom: 1px solid #eee;
+                padding-bottom: 10px;
+            }}
+            h2 {{
+                color: #3498db;
+                margin-top: 25px;
+            }}
+            h3 {{
+                color: #2980b9;
+            }}
+            table {{
+                border-collapse: collapse;
+                width: 100%;
+                margin: 20px 0;
+            }}
+            th, td {{
+                border: 1px solid #ddd;
+                padding: 8px;
+            }}
+            th {{
+                background-color: #f2f2f2;
+                text-align: left;
+            }}
+            .report-header {{
+                margin-bottom: 30px;
+            }}
+            .report-header .date {{
+                color: #7f8c8d;
+                font-size: 0.9em;
+            }}
+            .report-header .description {{
+                font-style: italic;
+                color: #666;
+                margin: 10px 0;
+            }}
+            .report-chart {{
+                margin: 20px 0;
+                page-break-inside: avoid;
+            }}
+            .report-chart img {{
+                width: 100%;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="report-header">
+            <h1>{report.title}</h1>
+            <div class="date">Generated on {(report.created_at or datetime.now()).strftime('%Y-%m-%d')}</div>
+            <div class="description">{report.description or ""}</div>
+        </div>
+        {html_content}
+        {chart_html}
+    </body>
+    </html>
+    """
+
+    return styled_html
+
+
+def report_pdf_key(report: Report, content: str, charts: List[Dict[str, Any]]) -> str:
+    """
+    Build the cache key (and ETag) of a report's PDF.
+
+    Args:
+        report: Report being exported
+        content: Markdown content of the report
+        charts: The report's charts, from ``report_charts``
+
+    Returns:
+        Hex digest of everything the rendered document depends on
+    """
+    chart_parts = json.dumps([[chart.get('chart_title') or '', chart.get('chart_data')] for chart in charts])
+    created = report.created_at.isoformat() if report.created_at else ''
+    return pdf_renderer.cache_key(REPORT_TEMPLATE_VERSION, CHART_RENDER_VERSION, report.title,
+                                  report.description or '', created, content, chart_parts)
+
+
+def render_report_pdf(report: Report, content: str, charts: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """
+    Render a report as a PDF document, reusing the cached file if nothing changed.
+
+    Args:
+        report: Report being exported
+        content: Markdown content of the report
+        charts: The report's charts, from ``report_charts``
+
+    Returns:
+        Tuple of (PDF file path, cache key usable as a strong ETag)
+    """
+    key = report_pdf_key(report, content, charts)
+    path = pdf_renderer.render(key, lambda: build_report_html(report, content, charts))
+    return path, key
+
+
+def generate_ai_report(prompt: str, title: str, description: str,
+                       file_paths: List[str]) -> Dict[str, Any]:
+    """
+    Draft a report with the AI from a user prompt.
+
+    Args:
+        prompt: The user's request
+        title: Report title, if specified
+        description: Report description, if specified
+        file_paths: Selected data files; the first one is summarized for context
+
+    Returns:
+        Dict with ``response`` (the AI answer) and ``report_content`` (Markdown)
+    """
+    data_summary = None
+    if file_paths:
+        try:
+            # Get summaries of the files
+            processor = DataProcessor()
+            data_summary = processor.process_file(file_paths[0])
+        except Exception as e:
+            logger.error(f"Error processing files: {str(e)}")
+
+    ai_client = get_ai_instance()
+    if not ai_client:
+        raise JobError("AI service not available")
+
+    # Prepare a better prompt that includes details about the user's request and the selected charts
+    enhanced_prompt = f"""
+    User request: {prompt}
+    
+    Report title: {title if title else 'Not specified'}
+    Report description: {description if description else 'Not specified'}
+    
+    Please create a comprehensive report that addresses the user's request.
+    Focus on insights and patterns in the data represented by the charts.
+    The report should be well-structured with headings and bullet points where appropriate.
+    Use markdown formatting for the report structure.
+    """
+
+    # Generate the response
+    ai_response = ai_client.chat(enhanced_prompt, chat_history=None, file_data=data_summary)
+
+    # Generate a more polished report content
+    report_content = f"""
+    # {title or 'Data Analysis Report'}
+    
+    {ai_response}
+    """
+
+    return {
+        "response": ai_response,
+        "report_content": report_content
+    }
+
+
+@job_handler('report.ai_generate')
+def run_ai_report_job(job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler drafting a report with the AI (see ``generate_ai_report``)."""
+    job.progress(0.1, "Generating report")
+    return generate_ai_report(payload.get('prompt', ''), payload.get('title', ''),
+                              payload.get('description', ''), payload.get('file_paths', []))
+
+
+@job_handler('report.pdf')
+def run_report_pdf_job(job, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler rendering a report's PDF into the PDF cache."""
+    report = Report.query.filter_by(id=payload['report_id'], user_id=job.user_id).first()
+    if not report:
+        raise JobError("Report not found")
+
+    charts = report_charts(report)
+    if not charts:
+        raise JobError("No charts found in report")
+
+    job.progress(0.1, "Writing report")
+    content = ensure_report_content(report, charts)
+    if content is None:
+        # Retried: the AI service may come back
+        raise RuntimeError("AI service not available")
+
+    job.progress(0.5, "Rendering PDF")
+    path, key = render_report_pdf(report, content, charts)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return {
+        "report_id": report.id,
+        "filename": f"report_{report.id}_{timestamp}.pdf",
+        "mimetype": "application/pdf",
+        "size": os.path.getsize(path),
+        "cache_key": key
+    }
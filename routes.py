@@ -5,90 +5,83 @@ import logging
 import time
 import traceback
 import io
-import pandas as pd
-import numpy as np
+import mimetypes
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from werkzeug.utils import secure_filename
 from flask import (
     Blueprint, render_template, request, jsonify, current_app,
     session, send_from_directory, abort, redirect, url_for, flash,
-    make_response, send_file
+    make_response, send_file, Response, stream_with_context
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 from urllib.parse import urlparse
 from flask_login import current_user, login_user, logout_user, login_required
 
 from app import db
-from models import User, Conversation, Message, Upload, SavedChart, Report
+from models import User, Conversation, Message, Upload, SavedChart, Report, Job
 from file_processing import DataProcessor
 from ai_integration import get_ai_instance
-from visualization import DataVisualizer
+from visualization import DataVisualizer, to_columnar_payload, COLUMNAR_FORMAT
+from transport import negotiated_response, optimize_response
+from assets import built_asset, IMMUTABLE_MAX_AGE
+from aggregation import get_cube
+from distribution import get_distributions
+from dataset_context import DatasetContext, get_session_context
+from lazy_visualizations import lazy_visualizations
+from chart_renderer import chart_renderer, IMAGE_MIMETYPES
+from insight_jobs import submit_insights, wait_for_insights
+from jobs import JobError, enqueue, describe, PRIORITY_INTERACTIVE
+from conversation_memory import chat_context, schedule_summary
+from report_export import (
+    report_charts, ensure_report_content, render_report_pdf, generate_ai_report
+)
+from pdf_renderer import pdf_renderer
+from data_access import (
+    load_charts, missing_chart_ids, conversations_with_message_counts,
+    set_report_charts, load_report_charts, reports_with_chart_counts,
+    keyset_page, page_args
+)
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Create a Blueprint for routes
 main = Blueprint('main', __name__)
 
+@main.after_request
+def compress_and_tag_response(response):
+    """Compress large payloads and answer unchanged GETs with 304 (see ``optimize_response``)."""
+    return optimize_response(response)
+
 # Initialize data processor and visualizer
 data_processor = DataProcessor()
 data_visualizer = DataVisualizer()
 
-# Helper function to load a DataFrame dynamically
-def load_dataframe(file_path):
-    try:
-        _, ext = os.path.splitext(file_path)
-        ext = ext.lower()
-        if ext == '.csv':
-            try:
-                df = pd.read_csv(file_path)
-            except UnicodeDecodeError:
-                df = pd.read_csv(file_path, encoding='latin1')
-        elif ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-        elif ext == '.json':
-            try:
-                df = pd.read_json(file_path)
-            except ValueError:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                if isinstance(data, dict):
-                    df = pd.DataFrame.from_dict(data, orient='index')
-                else:
-                    df = pd.DataFrame(data)
-        elif ext in ['.txt', '.dat']:
-            df = pd.read_csv(file_path, sep=None, engine='python')
-        else:
-            logger.warning(f"Unsupported file type: {ext}")
-            return None
-        logger.info(f"Loaded dataframe from {file_path} with shape: {df.shape}")
-        return df
-    except Exception as e:
-        logger.error(f"Error loading file {file_path}: {str(e)}")
-        logger.error(traceback.format_exc())
-        return None
-
 @main.route('/')
 def index():
     """Render the landing page."""
     logger.info("Rendering landing page")
     return render_template('index.html')
 
-@main.route('/static/js/dashboard.js')
-def serve_dashboard_js():
-    """Serve the latest version of dashboard.js with no caching."""
-    logger.info("Serving dashboard.js with no caching")
-    # Get the application's root folder
-    root_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    # Create response with the file
-    response = make_response(send_from_directory(os.path.join(root_folder, 'static/js'), 'dashboard.js'))
-    # Set headers to prevent caching
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+@main.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """
+    Serve a fingerprinted static asset built by ``assets.py``.
+    
+    The file name changes with the content, so the response may be cached
+    for a year without revalidation. Precompressed copies are sent to
+    clients that accept them.
+    """
+    build_dir = current_app.config['ASSET_BUILD_DIR']
+    send_name, encoding = built_asset(build_dir, filename, request.accept_encodings)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(build_dir, send_name, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
     return response
 
 @main.route('/login', methods=['GET', 'POST'])
@@ -331,7 +324,7 @@ def upload_files():
     Handle file uploads, save them, and return a response.
     """
     logger.info("Handling file upload request")
-    logger.debug(f"Request files: {request.files}")
+    logger.debug("Request files: %s", request.files)
 
     try:
         # Check if we should clear previous files
@@ -339,18 +332,18 @@ def upload_files():
         # Force clear_previous to True to ensure we get fresh analysis for every upload
         # This ensures we don't have stale data when uploading new files
         clear_previous = True
-        logger.debug(f"Clear previous files flag: {clear_previous}")
+        logger.debug("Clear previous files flag: %s", clear_previous)
         
         # Check if any files were uploaded
         uploaded_files = []
         if 'files[]' in request.files:
             uploaded_files = request.files.getlist('files[]')
-            logger.debug(f"Found files under 'files[]': {[f.filename for f in uploaded_files]}")
+            logger.debug("Found files under 'files[]': %s", [f.filename for f in uploaded_files])
         else:
             for key in request.files:
                 if request.files.getlist(key):
                     uploaded_files = request.files.getlist(key)
-                    logger.debug(f"Found files under '{key}': {[f.filename for f in uploaded_files]}")
+                    logger.debug("Found files under '%s': %s", key, [f.filename for f in uploaded_files])
                     break
 
         if not uploaded_files or uploaded_files[0].filename == '':
@@ -471,10 +464,10 @@ def analyze_data():
         else:
             combine_files = bool(combine_param)
         
-        logger.debug(f"Analysis parameters: file_indices={file_indices}, combine_files={combine_files}")
+        logger.debug("Analysis parameters: file_indices=%s, combine_files=%s", file_indices, combine_files)
         
         session_id = session['session_id']
-        logger.debug(f"Using session_id: {session_id}")
+        logger.debug("Using session_id: %s", session_id)
         upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
         session_folder = os.path.join(upload_folder, session_id)
 
@@ -503,7 +496,7 @@ def analyze_data():
                 # Convert indices to integers and filter files
                 indices = [int(i) for i in file_indices]
                 files = [all_files[i] for i in indices if 0 <= i < len(all_files)]
-                logger.debug(f"Selected files by indices {indices}: {files}")
+                logger.debug("Selected files by indices %s: %s", indices, files)
                 
                 # If only one file is selected, don't combine regardless of settings
                 if len(files) == 1:
@@ -515,21 +508,26 @@ def analyze_data():
                 files = all_files
                 logger.debug("Falling back to using all files")
         
-        logger.debug(f"Found files: {files}")
+        logger.debug("Found files: %s", files)
         logger.info(f"Processing {len(files)} files (combine_files: {combine_files})")
         
         # Create a deep copy of the selected file list to avoid any reference issues
         selected_files = list(files)
         
-        # Process data with combine_files flag
-        processed_data = process_files_directly(selected_files, combine_files)
+        # Remember the selection so chart bodies can be fetched lazily
+        session['analysis_files'] = [os.path.basename(f) for f in selected_files]
+        session['analysis_combine'] = combine_files
+        
+        # Every file is loaded, type-inferred and profiled once for the whole request
+        context = DatasetContext(selected_files, combine_files)
+        processed_data = context.summary()
 
         if not processed_data.get("success", False):
             logger.warning("File processing failed")
             return jsonify({"success": False, "error": "File processing failed", "details": processed_data}), 500
 
         # Generate dashboard data with the selected files 
-        dashboard_data = generate_dashboard_data_from_files(processed_data, selected_files, session_id, combine_files)
+        dashboard_data = generate_dashboard_data_from_files(context, session_id)
         
         # Add file information to response
         dashboard_data["files"] = [os.path.basename(f) for f in selected_files]
@@ -551,202 +549,73 @@ def analyze_data():
                     "data_overview": processed_data,
                     "combine_files": combine_files
                 }
-                ai_insights = ai_client.analyze_data_initial(data_summary)
-                dashboard_data["ai_insights"] = ai_insights
+                # The LLM call runs in the background; the dashboard collects it
+                # through the job handle instead of waiting here
+                job_id = submit_insights(current_user.id, data_summary).id
+                dashboard_data["ai_insights"] = None
+                dashboard_data["ai_insights_job"] = {
+                    "id": job_id,
+                    "status": "pending",
+                    "status_url": url_for('main.get_insights', job_id=job_id),
+                    "stream_url": url_for('main.stream_insights', job_id=job_id)
+                }
             else:
                 dashboard_data["ai_insights"] = "AI analysis is not available at the moment."
         except Exception as ai_error:
             logger.error(f"Error generating AI insights: {str(ai_error)}")
             dashboard_data["ai_insights"] = "Unable to generate AI insights at this time."
 
-        return jsonify(dashboard_data)
+        dashboard_data["timings"] = context.timings_ms()
+        logger.info(f"Analyze timings (ms): {dashboard_data['timings']}")
+
+        return negotiated_response(dashboard_data)
 
     except Exception as e:
         logger.error(f"Exception in analyze_data: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"success": False, "error": str(e)}), 500
 
-def process_files_directly(file_paths, combine_files=False):
+def session_data_context(session_id):
     """
-    Direct file processing to extract summary data from files.
+    Get the cached data context of the current user's active session files.
     
-    Args:
-        file_paths: List of paths to files to process
-        combine_files: If True, combines all files into one dataframe for analysis
+    The context is rebuilt only when the session's Upload rows change
+    (new uploads, removals or toggled files).
     
+    Args:
+        session_id: Current session ID
+        
     Returns:
-        Dictionary with processed data information
+        DatasetContext, or None if the session has no active files
     """
-    results = {"success": False}
-    file_data = {}
-    combined_df = None
+    uploads = Upload.query.filter_by(session_id=session_id, user_id=current_user.id).order_by(Upload.id).all()
+    fingerprint = tuple((u.id, u.filename, u.file_size, u.upload_date, u.active) for u in uploads)
     
-    try:
-        if combine_files and len(file_paths) > 1:
-            logger.info(f"Processing {len(file_paths)} files in combined mode")
-            all_dfs = []
-            
-            # First try to load all files
-            for file_path in file_paths:
-                file_name = os.path.basename(file_path)
-                _, ext = os.path.splitext(file_path)
-                ext = ext.lower()
-                
-                try:
-                    if ext == '.csv':
-                        df = pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip')
-                    elif ext in ['.xlsx', '.xls']:
-                        df = pd.read_excel(file_path)
-                    elif ext == '.json':
-                        df = pd.read_json(file_path)
-                    else:
-                        df = pd.read_csv(file_path, sep=None, engine='python', on_bad_lines='skip')
-                    
-                    # Add a source column to track which file the data came from
-                    df['_source_file'] = file_name
-                    all_dfs.append(df)
-                    logger.info(f"Successfully loaded file {file_name} with shape {df.shape}")
-                except Exception as file_error:
-                    logger.error(f"Error loading file {file_name} for combined analysis: {str(file_error)}")
-                    # If any file fails, we'll fall back to individual processing
-                    combine_files = False
-                    break
-            
-            # If all files loaded successfully, combine them
-            if combine_files and all_dfs:
-                try:
-                    combined_df = pd.concat(all_dfs, ignore_index=True)
-                    logger.info(f"Combined {len(all_dfs)} files into dataframe with shape {combined_df.shape}")
-                    
-                    # Process the combined dataframe
-                    summary = {
-                        "shape": {"rows": combined_df.shape[0], "columns": combined_df.shape[1]},
-                        "columns": list(combined_df.columns),
-                        "dtypes": {col: str(combined_df[col].dtype) for col in combined_df.columns},
-                        "missing_data": {col: int(combined_df[col].isnull().sum()) for col in combined_df.columns},
-                        "numeric_columns": {},
-                        "categorical_columns": {},
-                        "source_files": [os.path.basename(f) for f in file_paths]
-                    }
-                    
-                    for col in combined_df.select_dtypes(include=['number']).columns:
-                        if col == '_source_file':
-                            continue
-                        summary["numeric_columns"][str(col)] = {
-                            "min": float(combined_df[col].min()) if not pd.isna(combined_df[col].min()) else 0,
-                            "max": float(combined_df[col].max()) if not pd.isna(combined_df[col].max()) else 0,
-                            "mean": float(combined_df[col].mean()) if not pd.isna(combined_df[col].mean()) else 0,
-                            "median": float(combined_df[col].median()) if not pd.isna(combined_df[col].median()) else 0,
-                            "std": float(combined_df[col].std()) if not pd.isna(combined_df[col].std()) else 0
-                        }
-                    
-                    for col in combined_df.select_dtypes(include=['object', 'category']).columns:
-                        value_counts = combined_df[col].value_counts().head(10).to_dict()
-                        # Convert keys to strings (in case they're not)
-                        str_value_counts = {str(k): int(v) for k, v in value_counts.items()}
-                        summary["categorical_columns"][str(col)] = str_value_counts
-                    
-                    # Add file breakdown information
-                    summary["file_breakdown"] = combined_df['_source_file'].value_counts().to_dict()
-                    
-                    # Store as combined data
-                    file_data["combined_data"] = summary
-                    
-                    # Set success flag and return
-                    results = {
-                        "success": True,
-                        "data": file_data,
-                        "combined": True
-                    }
-                    return results
-                    
-                except Exception as combine_error:
-                    logger.error(f"Error combining files: {str(combine_error)}")
-                    logger.error(traceback.format_exc())
-                    # Fall back to individual processing
-                    combine_files = False
-        
-        # If not combining or combining failed, process files individually
-        logger.info(f"Processing {len(file_paths)} files individually")
-        for file_path in file_paths:
-            file_name = os.path.basename(file_path)
-            _, ext = os.path.splitext(file_path)
-            ext = ext.lower()
-
-            try:
-                if ext == '.csv':
-                    df = pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip')
-                elif ext in ['.xlsx', '.xls']:
-                    df = pd.read_excel(file_path)
-                elif ext == '.json':
-                    df = pd.read_json(file_path)
-                else:
-                    df = pd.read_csv(file_path, sep=None, engine='python', on_bad_lines='skip')
-
-                logger.info(f"Successfully loaded file {file_name} with shape {df.shape}")
-
-                summary = {
-                    "shape": {"rows": df.shape[0], "columns": df.shape[1]},
-                    "columns": list(df.columns),
-                    "dtypes": {col: str(df[col].dtype) for col in df.columns},
-                    "missing_data": {col: int(df[col].isnull().sum()) for col in df.columns},
-                    "numeric_columns": {},
-                    "categorical_columns": {}
-                }
-
-                for col in df.select_dtypes(include=['number']).columns:
-                    summary["numeric_columns"][str(col)] = {
-                        "min": float(df[col].min()) if not pd.isna(df[col].min()) else 0,
-                        "max": float(df[col].max()) if not pd.isna(df[col].max()) else 0,
-                        "mean": float(df[col].mean()) if not pd.isna(df[col].mean()) else 0,
-                        "median": float(df[col].median()) if not pd.isna(df[col].median()) else 0,
-                        "std": float(df[col].std()) if not pd.isna(df[col].std()) else 0
-                    }
-
-                for col in df.select_dtypes(include=['object', 'category']).columns:
-                    value_counts = df[col].value_counts().head(10).to_dict()
-                    # Convert keys to strings (in case they're not)
-                    str_value_counts = {str(k): int(v) for k, v in value_counts.items()}
-                    summary["categorical_columns"][str(col)] = str_value_counts
-
-                file_data[file_name] = summary
-
-            except Exception as file_error:
-                logger.error(f"Error processing file {file_name}: {str(file_error)}")
-                logger.error(traceback.format_exc())
-                file_data[file_name] = {"error": str(file_error)}
-
-        results = {
-            "success": True,
-            "data": file_data,
-            "combined": False
-        }
-
-    except Exception as e:
-        logger.error(f"Error in process_files_directly: {str(e)}")
-        logger.error(traceback.format_exc())
-        results = {
-            "success": False,
-            "error": str(e)
-        }
-
-    return results
+    upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+    session_folder = os.path.join(upload_folder, session_id)
+    files = [os.path.join(session_folder, u.filename) for u in uploads
+             if u.active and os.path.isfile(os.path.join(session_folder, u.filename))]
+    if not files:
+        return None
+    
+    return get_session_context((current_user.id, session_id), fingerprint, files)
 
-def generate_dashboard_data_from_files(processed_data, file_paths, session_id, combine_files=False):
+def generate_dashboard_data_from_files(context, session_id):
     """
     Generate dashboard data based on processed files.
     
     Args:
-        processed_data: Dictionary with processed data information
-        file_paths: List of paths to files
+        context: DatasetContext of the selected files
         session_id: Current session ID
-        combine_files: Whether files were combined for analysis
         
     Returns:
         Dictionary with dashboard data
     """
+    processed_data = context.summary()
+    file_paths = context.file_paths
+    combine_files = context.combine_files
     logger.info(f"Generating dashboard data from {len(file_paths)} files")
-    logger.debug(f"Processed data keys: {processed_data.keys()}")
+    logger.debug("Processed data keys: %s", processed_data.keys())
     
     dashboard_data = {
         "metrics": {},
@@ -762,7 +631,7 @@ def generate_dashboard_data_from_files(processed_data, file_paths, session_id, c
         unique_columns = set()
         file_count = len(file_paths)
         
-        logger.debug(f"Processing metrics with is_combined={is_combined}, file_count={file_count}")
+        logger.debug("Processing metrics with is_combined=%s, file_count=%s", is_combined, file_count)
         
         # Check if we have any data to process
         if "data" not in processed_data or not processed_data["data"]:
@@ -782,11 +651,11 @@ def generate_dashboard_data_from_files(processed_data, file_paths, session_id, c
         if is_combined:
             # For combined analysis, metrics are already aggregated
             combined_info = processed_data.get("data", {}).get("combined_data", {})
-            logger.debug(f"Combined info keys: {combined_info.keys() if combined_info else 'None'}")
+            logger.debug("Combined info keys: %s", combined_info.keys() if combined_info else 'None')
             
             if "shape" in combined_info:
                 shape_info = combined_info["shape"]
-                logger.debug(f"Shape info: {shape_info}")
+                logger.debug("Shape info: %s", shape_info)
                 total_rows = shape_info.get("rows", 0)
                 total_columns = shape_info.get("columns", 0)
                 unique_columns = set(combined_info.get("columns", []))
@@ -795,14 +664,14 @@ def generate_dashboard_data_from_files(processed_data, file_paths, session_id, c
                 logger.warning("No shape information found in combined data")
         else:
             # For individual file analysis, sum up metrics
-            logger.debug(f"Data keys in processed_data: {processed_data.get('data', {}).keys()}")
+            logger.debug("Data keys in processed_data: %s", processed_data.get('data', {}).keys())
             
             for file_name, file_info in processed_data.get("data", {}).items():
                 # Skip the combined_data key if it exists but we're in individual mode
                 if file_name == "combined_data":
                     continue
                     
-                logger.debug(f"Processing file metrics for {file_name}")
+                logger.debug("Processing file metrics for %s", file_name)
                 
                 if "shape" in file_info:
                     file_rows = file_info["shape"].get("rows", 0)
@@ -813,7 +682,7 @@ def generate_dashboard_data_from_files(processed_data, file_paths, session_id, c
                     total_columns = max(total_columns, file_cols)  # Using max for total columns
                     unique_columns.update(file_columns)
                     
-                    logger.debug(f"File {file_name}: rows={file_rows}, cols={file_cols}, columns={len(file_columns)}")
+                    logger.debug("File %s: rows=%s, cols=%s, columns=%s", file_name, file_rows, file_cols, len(file_columns))
                 else:
                     logger.warning(f"No shape information found for file {file_name}")
             
@@ -835,54 +704,60 @@ def generate_dashboard_data_from_files(processed_data, file_paths, session_id, c
         # Generate chart options
         chart_options = []
         
-        # Load the first file to generate chart previews
-        if file_paths:
-            df = load_dataframe(file_paths[0])
-            if df is not None:
-                # Generate chart options based on data types
-                chart_types = [
-                    {"id": "line_chart", "name": "Line Chart", "icon": "chart-line"},
-                    {"id": "bar_chart", "name": "Bar Chart", "icon": "chart-bar"},
-                    {"id": "pie_chart", "name": "Pie Chart", "icon": "chart-pie"},
-                    {"id": "histogram", "name": "Histogram", "icon": "chart-column"},
-                    {"id": "scatter_plot", "name": "Scatter Plot", "icon": "circle-dot"},
-                    {"id": "box_plot", "name": "Box Plot", "icon": "chart-boxplot"},
-                    {"id": "radar_chart", "name": "Radar Chart", "icon": "spider"},
-                    {"id": "bubble_chart", "name": "Bubble Chart", "icon": "circle"}
-                ]
+        # Chart suitability from the same parsed columns the charts are built from
+        with context.stage('chart_options'):
+            kinds = list(context.column_kinds().values())
+        if kinds:
+            chart_types = [
+                {"id": "line_chart", "name": "Line Chart", "icon": "chart-line"},
+                {"id": "bar_chart", "name": "Bar Chart", "icon": "chart-bar"},
+                {"id": "pie_chart", "name": "Pie Chart", "icon": "chart-pie"},
+                {"id": "histogram", "name": "Histogram", "icon": "chart-column"},
+                {"id": "scatter_plot", "name": "Scatter Plot", "icon": "circle-dot"},
+                {"id": "box_plot", "name": "Box Plot", "icon": "chart-boxplot"},
+                {"id": "radar_chart", "name": "Radar Chart", "icon": "spider"},
+                {"id": "bubble_chart", "name": "Bubble Chart", "icon": "circle"}
+            ]
+            
+            # Add suitable chart types based on data columns
+            has_numeric = kinds.count('number') > 0
+            has_categorical = kinds.count('category') > 0
+            has_datetime = kinds.count('datetime') > 0
+            has_multiple_numeric = kinds.count('number') >= 2
+            
+            for chart_type in chart_types:
+                is_suitable = False
                 
-                # Add suitable chart types based on data columns
-                has_numeric = len(df.select_dtypes(include=['number']).columns) > 0
-                has_categorical = len(df.select_dtypes(include=['object', 'category']).columns) > 0
-                has_datetime = len(df.select_dtypes(include=['datetime']).columns) > 0
-                has_multiple_numeric = len(df.select_dtypes(include=['number']).columns) >= 2
+                if chart_type["id"] in ["line_chart"]:
+                    is_suitable = has_numeric and has_datetime
+                elif chart_type["id"] in ["bar_chart"]:
+                    is_suitable = has_numeric and has_categorical
+                elif chart_type["id"] in ["pie_chart"]:
+                    is_suitable = has_categorical
+                elif chart_type["id"] in ["histogram", "box_plot"]:
+                    is_suitable = has_numeric
+                elif chart_type["id"] in ["scatter_plot", "bubble_chart"]:
+                    is_suitable = has_multiple_numeric
+                elif chart_type["id"] in ["radar_chart"]:
+                    is_suitable = has_multiple_numeric and has_categorical
                 
-                for chart_type in chart_types:
-                    is_suitable = False
-                    
-                    if chart_type["id"] in ["line_chart"]:
-                        is_suitable = has_numeric and has_datetime
-                    elif chart_type["id"] in ["bar_chart"]:
-                        is_suitable = has_numeric and has_categorical
-                    elif chart_type["id"] in ["pie_chart"]:
-                        is_suitable = has_categorical
-                    elif chart_type["id"] in ["histogram", "box_plot"]:
-                        is_suitable = has_numeric
-                    elif chart_type["id"] in ["scatter_plot", "bubble_chart"]:
-                        is_suitable = has_multiple_numeric
-                    elif chart_type["id"] in ["radar_chart"]:
-                        is_suitable = has_multiple_numeric and has_categorical
-                    
-                    chart_options.append({
-                        "id": chart_type["id"],
-                        "name": chart_type["name"],
-                        "icon": chart_type["icon"],
-                        "suitable": is_suitable
-                    })
-                
-                # Generate some initial visualizations
-                visualizer = DataVisualizer()
-                dashboard_data["visualizations"] = visualizer.generate_visualizations(file_paths)
+                chart_options.append({
+                    "id": chart_type["id"],
+                    "name": chart_type["name"],
+                    "icon": chart_type["icon"],
+                    "suitable": is_suitable,
+                    "url": url_for('main.get_visualization', chart_type=chart_type["id"])
+                })
+            
+            # Chart bodies are computed on first request; warm the suitable
+            # ones in the order the dashboard lists them, reusing the
+            # combined schema this request already profiled
+            lazy_visualizations.prefetch(
+                file_paths,
+                [option["id"] for option in chart_options if option["suitable"]],
+                combine_files,
+                dataset=context.combined_dataset() if combine_files else None
+            )
         
         dashboard_data["chart_options"] = chart_options
         
@@ -893,6 +768,152 @@ def generate_dashboard_data_from_files(processed_data, file_paths, session_id, c
     
     return dashboard_data
 
+# Request keys describing a user-chosen chart (columns, aggregation, filters)
+CUSTOM_CHART_KEYS = ['x', 'y', 'group', 'size', 'aggregation', 'filters', 'max_points']
+
+# Upper bound on charts per batch request
+MAX_BATCH_CHARTS = 20
+
+# Shared pool for computing batched charts concurrently
+chart_batch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='chart-batch')
+
+def select_session_file(file_index):
+    """
+    Resolve a file index to a data file in the current session folder.
+    
+    Args:
+        file_index: Index into the session's files (int or numeric string)
+        
+    Returns:
+        Tuple of (file_path, None) or (None, error response)
+    """
+    if 'session_id' not in session:
+        logger.warning("No active session found for chart generation")
+        return None, (jsonify({"success": False, "error": "No active session"}), 400)
+        
+    session_id = session['session_id']
+    upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+    session_folder = os.path.join(upload_folder, session_id)
+    
+    if not os.path.exists(session_folder):
+        logger.warning(f"Session folder not found: {session_folder}")
+        return None, (jsonify({"success": False, "error": "No files found for session"}), 404)
+        
+    # Get all files in session folder
+    files = [os.path.join(session_folder, f) for f in os.listdir(session_folder)
+            if os.path.isfile(os.path.join(session_folder, f))]
+            
+    if not files:
+        logger.warning(f"No files found in session folder: {session_folder}")
+        return None, (jsonify({"success": False, "error": "No files found"}), 404)
+    
+    # Log available files for debugging
+    logger.debug("Available files: %s", [os.path.basename(f) for f in files])
+    
+    # Safely handle file index
+    if isinstance(file_index, str):
+        try:
+            file_index = int(file_index)
+        except ValueError:
+            logger.warning(f"Invalid file index format: {file_index}, defaulting to 0")
+            file_index = 0
+            
+    # Use the specified file if index is valid, otherwise use the first file
+    if 0 <= file_index < len(files):
+        file_path = files[file_index]
+        logger.info(f"Using file at index {file_index}: {os.path.basename(file_path)}")
+    else:
+        file_path = files[0]
+        logger.warning(f"File index {file_index} out of range, using first file: {os.path.basename(file_path)}")
+        
+    return file_path, None
+
+def build_chart(visualizer, df, file_path, data, cube=None, distributions=None):
+    """
+    Generate one chart described by an /api/chart style request body.
+    
+    Args:
+        visualizer: DataVisualizer instance
+        df: Loaded dataframe
+        file_path: Path the dataframe was loaded from (cache key for cube/statistics)
+        data: Request body with chart_type and optional custom spec keys
+        cube: Optional pre-built aggregation cube for the dataframe
+        distributions: Optional pre-computed distribution statistics for the dataframe
+        
+    Returns:
+        Tuple of (full-precision chart data, custom spec or None)
+        
+    Raises:
+        ValueError: If the request describes an invalid chart
+    """
+    chart_type = data.get('chart_type')
+    
+    # User-chosen columns, aggregation and filters
+    spec = None
+    if any(data.get(key) is not None for key in CUSTOM_CHART_KEYS):
+        spec = {key: data.get(key) for key in CUSTOM_CHART_KEYS}
+        spec['chart_type'] = chart_type
+        chart_data = visualizer.generate_custom_chart(df, spec, cube=cube or get_cube(df, file_path))
+    elif chart_type == 'line_chart':
+        chart_data = visualizer.generate_line_chart(df)
+    elif chart_type == 'bar_chart':
+        chart_data = visualizer.generate_bar_chart(df, cube=cube or get_cube(df, file_path))
+    elif chart_type == 'pie_chart':
+        chart_data = visualizer.generate_pie_chart(df, cube=cube or get_cube(df, file_path))
+    elif chart_type == 'histogram':
+        # Histograms of every numeric column come from one distribution pass
+        distributions = distributions or get_distributions(df, file_path)
+        column = data.get('column')
+        if column is not None and column not in distributions.columns_with_data():
+            raise ValueError(f"Column {column} has no numeric values")
+        chart_data = visualizer.generate_histogram(df, distributions=distributions, column=column)
+    elif chart_type == 'scatter_plot':
+        chart_data = visualizer.generate_scatter_plot(df)
+    elif chart_type == 'box_plot':
+        chart_data = visualizer.generate_box_plot(df, distributions=distributions or get_distributions(df, file_path))
+    elif chart_type == 'radar_chart':
+        chart_data = visualizer.generate_radar_chart(df, cube=cube or get_cube(df, file_path))
+    elif chart_type == 'bubble_chart':
+        chart_data = visualizer.generate_bubble_chart(df)
+    else:
+        raise ValueError(f"Unsupported chart type: {chart_type}")
+        
+    return chart_data, spec
+
+def encode_chart(chart_data, data):
+    """
+    Apply the payload options of a request body to chart data sent to the client.
+    
+    Saved charts keep the full-precision data; only the response is reduced.
+    
+    Args:
+        chart_data: Chart data from ``build_chart``
+        data: Request body with optional ``payload_format``, ``float32`` and ``precision``
+        
+    Returns:
+        Chart data in the requested encoding
+    """
+    # Opt-in compact payload: parallel arrays, optionally float32 / fewer significant digits
+    if data.get('payload_format', 'points') != COLUMNAR_FORMAT:
+        return chart_data
+    precision = data.get('precision')
+    try:
+        precision = int(precision) if precision is not None else None
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid precision: {precision}, ignoring")
+        precision = None
+    return to_columnar_payload(chart_data, float32=bool(data.get('float32', False)), precision=precision)
+
+def new_saved_chart(user_id, chart_type, file_path, chart_data, spec):
+    """Create (but do not commit) a SavedChart row for a generated chart."""
+    return SavedChart(
+        user_id=user_id,
+        chart_type=chart_type,
+        chart_title=f"{chart_type.replace('_', ' ').title()} - {os.path.basename(file_path)}",
+        chart_data=json.dumps(chart_data),
+        chart_config=json.dumps(spec) if spec else None
+    )
+
 @main.route('/api/chart', methods=['POST'])
 @login_required
 def generate_chart():
@@ -906,97 +927,287 @@ def generate_chart():
         
         logger.info(f"Chart generation request received - Type: {chart_type}, File Index: {file_index}")
         
-        if 'session_id' not in session:
-            logger.warning("No active session found for chart generation")
-            return jsonify({"success": False, "error": "No active session"}), 400
+        file_path, error_response = select_session_file(file_index)
+        if error_response:
+            return error_response
             
-        session_id = session['session_id']
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-        session_folder = os.path.join(upload_folder, session_id)
+        # Load dataframe from selected file with the same parsing as the dashboard
+        # (parsed once while the file is unchanged)
+        logger.debug("Loading dataframe from %s", file_path)
+        df = DatasetContext([file_path]).frame(file_path)
         
-        if not os.path.exists(session_folder):
-            logger.warning(f"Session folder not found: {session_folder}")
-            return jsonify({"success": False, "error": "No files found for session"}), 404
+        if df is None:
+            return jsonify({"success": False, "error": "Could not load file"}), 500
             
-        # Get all files in session folder
-        files = [os.path.join(session_folder, f) for f in os.listdir(session_folder)
-                if os.path.isfile(os.path.join(session_folder, f))]
-                
-        if not files:
-            logger.warning(f"No files found in session folder: {session_folder}")
-            return jsonify({"success": False, "error": "No files found"}), 404
+        try:
+            chart_data, spec = build_chart(DataVisualizer(), df, file_path, data)
+        except ValueError as spec_error:
+            logger.warning(f"Invalid chart spec: {str(spec_error)}")
+            return jsonify({"success": False, "error": str(spec_error)}), 400
+            
+        # Save the generated chart
+        saved_chart = new_saved_chart(current_user.id, chart_type, file_path, chart_data, spec)
         
-        # Log available files for debugging
-        logger.debug(f"Available files: {[os.path.basename(f) for f in files]}")
+        db.session.add(saved_chart)
+        db.session.commit()
         
-        # Safely handle file index
-        if isinstance(file_index, str):
-            try:
-                file_index = int(file_index)
-            except ValueError:
-                logger.warning(f"Invalid file index format: {file_index}, defaulting to 0")
-                file_index = 0
-                
-        # Use the specified file if index is valid, otherwise use the first file
-        if 0 <= file_index < len(files):
-            file_path = files[file_index]
-            logger.info(f"Using file at index {file_index}: {os.path.basename(file_path)}")
-        else:
-            file_path = files[0]
-            logger.warning(f"File index {file_index} out of range, using first file: {os.path.basename(file_path)}")
+        return negotiated_response({
+            "success": True,
+            "chart_id": saved_chart.id,
+            "chart_data": encode_chart(chart_data, data)
+        })
+        
+    except Exception as e:
+        logger.error(f"Error generating chart: {str(e)}")
+        logger.error(traceback.format_exc())
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@main.route('/api/charts/batch', methods=['POST'])
+@login_required
+def generate_charts_batch():
+    """
+    Generate several charts from one load of a file, streaming results as NDJSON.
+    
+    The body holds ``file_index``, optional ``save`` (default true), default
+    payload options (``payload_format``, ``float32``, ``precision``) and a
+    ``charts`` list whose items take the same keys as /api/chart. Charts are
+    computed concurrently and one line is written per chart as soon as it is
+    ready: ``{"index", "chart_type", "success", "chart_data" | "error"}``.
+    Saved charts are committed in a single transaction, after which a final
+    ``{"done": true, "chart_ids": {...}}`` line maps chart index to id.
+    """
+    try:
+        data = request.get_json() or {}
+        specs = data.get('charts')
+        save = bool(data.get('save', True))
+        
+        if not isinstance(specs, list) or not specs:
+            return jsonify({"success": False, "error": "No charts requested"}), 400
+        if len(specs) > MAX_BATCH_CHARTS:
+            return jsonify({"success": False, "error": f"At most {MAX_BATCH_CHARTS} charts per batch"}), 400
+        if not all(isinstance(spec, dict) for spec in specs):
+            return jsonify({"success": False, "error": "Each chart must be an object"}), 400
             
-        # Load dataframe from selected file
-        logger.debug(f"Loading dataframe from {file_path}")
-        df = load_dataframe(file_path)
+        logger.info(f"Batch chart request received - {len(specs)} charts, File Index: {data.get('file_index', 0)}")
         
+        file_path, error_response = select_session_file(data.get('file_index', 0))
+        if error_response:
+            return error_response
+            
+        df = DatasetContext([file_path]).frame(file_path)
         if df is None:
             return jsonify({"success": False, "error": "Could not load file"}), 500
             
+        # Batch-level payload options apply to every chart unless overridden
+        defaults = {key: data[key] for key in ('payload_format', 'float32', 'precision') if key in data}
+        specs = [{**defaults, **spec} for spec in specs]
+        
+        # Build shared aggregates once up front instead of racing in the workers
+        chart_types = {spec.get('chart_type') for spec in specs}
+        needs_cube = any(spec.get(key) is not None for spec in specs for key in CUSTOM_CHART_KEYS) \
+            or bool(chart_types & DataVisualizer.CUBE_CHARTS)
+        cube = get_cube(df, file_path) if needs_cube else None
+        distributions = get_distributions(df, file_path) if chart_types & DataVisualizer.DISTRIBUTION_CHARTS else None
+        
         visualizer = DataVisualizer()
+        futures = {
+            chart_batch_executor.submit(build_chart, visualizer, df, file_path, spec, cube, distributions): index
+            for index, spec in enumerate(specs)
+        }
+        user_id = current_user.id
         
-        if chart_type == 'line_chart':
-            chart_data = visualizer.generate_line_chart(df)
-        elif chart_type == 'bar_chart':
-            chart_data = visualizer.generate_bar_chart(df)
-        elif chart_type == 'pie_chart':
-            chart_data = visualizer.generate_pie_chart(df)
-        elif chart_type == 'histogram':
-            chart_data = visualizer.generate_histogram(df)
-        elif chart_type == 'scatter_plot':
-            chart_data = visualizer.generate_scatter_plot(df)
-        elif chart_type == 'box_plot':
-            chart_data = visualizer.generate_box_plot(df)
-        elif chart_type == 'radar_chart':
-            chart_data = visualizer.generate_radar_chart(df)
-        elif chart_type == 'bubble_chart':
-            chart_data = visualizer.generate_bubble_chart(df)
-        else:
-            return jsonify({"success": False, "error": f"Unsupported chart type: {chart_type}"}), 400
+        def stream_results():
+            saved = {}
+            for future in as_completed(futures):
+                index = futures[future]
+                chart_type = specs[index].get('chart_type')
+                try:
+                    chart_data, spec = future.result()
+                    line = {"index": index, "chart_type": chart_type, "success": True,
+                            "chart_data": encode_chart(chart_data, specs[index])}
+                    if save:
+                        saved[index] = new_saved_chart(user_id, chart_type, file_path, chart_data, spec)
+                        db.session.add(saved[index])
+                except ValueError as spec_error:
+                    logger.warning(f"Invalid chart spec in batch: {str(spec_error)}")
+                    line = {"index": index, "chart_type": chart_type, "success": False, "error": str(spec_error)}
+                except Exception as e:
+                    logger.error(f"Error generating batched {chart_type}: {str(e)}")
+                    logger.error(traceback.format_exc())
+                    line = {"index": index, "chart_type": chart_type, "success": False, "error": str(e)}
+                yield json.dumps(line) + "\n"
+                
+            try:
+                if saved:
+                    db.session.commit()
+                done = {"done": True, "success": True,
+                        "chart_ids": {str(index): chart.id for index, chart in saved.items()}}
+            except Exception as e:
+                logger.error(f"Error saving batched charts: {str(e)}")
+                logger.error(traceback.format_exc())
+                db.session.rollback()
+                done = {"done": True, "success": False, "error": str(e), "chart_ids": {}}
+            yield json.dumps(done) + "\n"
             
-        # Save the generated chart
-        chart_json = json.dumps(chart_data)
-        saved_chart = SavedChart(
-            user_id=current_user.id,
-            chart_type=chart_type,
-            chart_title=f"{chart_type.replace('_', ' ').title()} - {os.path.basename(file_path)}",
-            chart_data=chart_json
-        )
+        return Response(stream_with_context(stream_results()), mimetype='application/x-ndjson')
         
-        db.session.add(saved_chart)
-        db.session.commit()
+    except Exception as e:
+        logger.error(f"Error generating chart batch: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
+# Longest a polling request may wait for insights, in seconds
+MAX_INSIGHTS_WAIT = 25
+
+# Seconds between keep-alive comments on the insights event stream
+INSIGHTS_HEARTBEAT = 15
+
+@main.route('/api/insights/<int:job_id>', methods=['GET'])
+@login_required
+def get_insights(job_id):
+    """
+    Get the status of a background AI insights job.
+    
+    Query parameters:
+        wait: Seconds to wait for the result before answering (long polling)
+    """
+    try:
+        try:
+            wait = min(max(float(request.args.get('wait', 0)), 0), MAX_INSIGHTS_WAIT)
+        except ValueError:
+            wait = 0
+            
+        status = wait_for_insights(job_id, current_user.id, wait=wait)
+        if status is None:
+            return jsonify({"success": False, "error": "Insights job not found"}), 404
+            
+        return jsonify({"success": True, **status})
         
-        return jsonify({
-            "success": True,
-            "chart_id": saved_chart.id,
+    except Exception as e:
+        logger.error(f"Error getting insights job {job_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@main.route('/api/insights/<int:job_id>/stream', methods=['GET'])
+@login_required
+def stream_insights(job_id):
+    """
+    Deliver a background AI insights job as Server-Sent Events.
+    
+    Sends comment heartbeats while the job runs and a single ``insights``
+    event with the final status, then closes the stream.
+    """
+    user_id = current_user.id
+    if wait_for_insights(job_id, user_id) is None:
+        return jsonify({"success": False, "error": "Insights job not found"}), 404
+        
+    def events():
+        while True:
+            status = wait_for_insights(job_id, user_id, wait=INSIGHTS_HEARTBEAT)
+            if status is None:
+                return
+            if status["status"] != "pending":
+                yield f"event: insights\ndata: {json.dumps(status)}\n\n"
+                return
+            yield ": keep-alive\n\n"
+            
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@main.route('/api/visualizations/<chart_type>', methods=['GET'])
+@login_required
+def get_visualization(chart_type):
+    """
+    Get one dashboard chart for the files selected in the last analysis.
+    """
+    try:
+        if 'session_id' not in session or not session.get('analysis_files'):
+            logger.warning("No analysis found for lazy visualization")
+            return jsonify({"success": False, "error": "No active analysis"}), 400
+            
+        if chart_type not in DataVisualizer.CHART_GENERATORS:
+            return jsonify({"success": False, "error": f"Unsupported chart type: {chart_type}"}), 400
+            
+        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+        session_folder = os.path.join(upload_folder, session['session_id'])
+        file_paths = [os.path.join(session_folder, name) for name in session['analysis_files']
+                      if os.path.isfile(os.path.join(session_folder, name))]
+                      
+        if not file_paths:
+            return jsonify({"success": False, "error": "No files found for session"}), 404
+            
+        chart_data = lazy_visualizations.get_chart(file_paths, chart_type, session.get('analysis_combine', False))
+        
+        return negotiated_response({
+            "success": "error" not in chart_data,
+            "chart_type": chart_type,
             "chart_data": chart_data
         })
         
     except Exception as e:
-        logger.error(f"Error generating chart: {str(e)}")
+        logger.error(f"Error getting visualization {chart_type}: {str(e)}")
         logger.error(traceback.format_exc())
-        db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
 
+def start_chat_turn(message, conversation_id, session_id):
+    """
+    Record a user chat message and gather what the AI needs to answer it.
+    
+    Gets (or creates) the conversation and adds the user message to the
+    database session without committing it.
+    
+    Args:
+        message: The user's message
+        conversation_id: Existing conversation ID, or None for a new conversation
+        session_id: Current session ID, used for the data context
+        
+    Returns:
+        Tuple of (conversation, chat history, file data, summary of the
+        messages before the history), or None if the conversation does not exist
+    """
+    # Get or create conversation
+    if conversation_id:
+        conversation = Conversation.query.filter_by(id=conversation_id, user_id=current_user.id).first()
+        if not conversation:
+            return None
+    else:
+        # Create new conversation
+        conversation = Conversation(
+            user_id=current_user.id,
+            title=f"Conversation {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        )
+        db.session.add(conversation)
+        db.session.commit()
+        
+    # Recent messages plus a summary of older ones, read before the new message is added
+    summary, chat_history = chat_context(conversation.id)
+    
+    # Save user message
+    user_message = Message(
+        conversation_id=conversation.id,
+        is_user=True,
+        content=message
+    )
+    db.session.add(user_message)
+    
+    # Get file data if available (summarized once per set of session uploads)
+    file_data = None
+    if session_id:
+        context = session_data_context(session_id)
+        if context is not None:
+            file_data = context.summary()
+        
+    return conversation, chat_history, file_data, summary
+
+def schedule_conversation_summary(conversation_id):
+    """Queue a summary update for a conversation if one is due; failures only get logged."""
+    try:
+        schedule_summary(conversation_id, current_user.id)
+    except Exception as e:
+        logger.error(f"Error scheduling conversation summary: {str(e)}")
+        db.session.rollback()
+
 @main.route('/api/chat', methods=['POST'])
 @login_required
 def chat_with_ai():
@@ -1012,53 +1223,17 @@ def chat_with_ai():
         if not message:
             return jsonify({"success": False, "error": "No message provided"}), 400
             
-        # Get or create conversation
-        if conversation_id:
-            conversation = Conversation.query.filter_by(id=conversation_id, user_id=current_user.id).first()
-            if not conversation:
-                return jsonify({"success": False, "error": "Conversation not found"}), 404
-        else:
-            # Create new conversation
-            conversation = Conversation(
-                user_id=current_user.id,
-                title=f"Conversation {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            )
-            db.session.add(conversation)
-            db.session.commit()
-            
-        # Save user message
-        user_message = Message(
-            conversation_id=conversation.id,
-            is_user=True,
-            content=message
-        )
-        db.session.add(user_message)
+        turn = start_chat_turn(message, conversation_id, session_id)
+        if turn is None:
+            return jsonify({"success": False, "error": "Conversation not found"}), 404
+        conversation, chat_history, file_data, summary = turn
         
         # Get AI response
         ai_client = get_ai_instance()
         
         if ai_client:
-            # Get file data if available
-            file_data = None
-            if session_id:
-                upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-                session_folder = os.path.join(upload_folder, session_id)
-                
-                if os.path.exists(session_folder):
-                    files = [os.path.join(session_folder, f) for f in os.listdir(session_folder)
-                            if os.path.isfile(os.path.join(session_folder, f))]
-                    
-                    if files:
-                        file_data = process_files_directly(files)
-            
-            # Get chat history
-            chat_history = []
-            for msg in conversation.messages.order_by(Message.timestamp).all():
-                role = "user" if msg.is_user else "assistant"
-                chat_history.append({"role": role, "content": msg.content})
-            
             # Generate AI response
-            ai_response_text = ai_client.chat(message, chat_history, file_data)
+            ai_response_text = ai_client.chat(message, chat_history, file_data, summary)
             
             # Save AI response
             ai_message = Message(
@@ -1068,6 +1243,7 @@ def chat_with_ai():
             )
             db.session.add(ai_message)
             db.session.commit()
+            schedule_conversation_summary(conversation.id)
             
             return jsonify({
                 "success": True,
@@ -1086,29 +1262,133 @@ def chat_with_ai():
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
 
+@main.route('/api/chat/stream', methods=['POST'])
+@login_required
+def stream_chat_with_ai():
+    """
+    Process user message and stream the AI response as Server-Sent Events.
+    
+    Sends a ``start`` event with the conversation ID, one unnamed event per
+    token (``{"token": ...}``) and a ``done`` event once the response has
+    been saved. If the client disconnects early, the partial response is
+    saved so the conversation stays consistent.
+    """
+    try:
+        data = request.get_json()
+        message = data.get('message')
+        conversation_id = data.get('conversation_id')
+        session_id = session.get('session_id')
+        
+        if not message:
+            return jsonify({"success": False, "error": "No message provided"}), 400
+            
+        ai_client = get_ai_instance()
+        if not ai_client:
+            return jsonify({
+                "success": False,
+                "error": "AI service is not available"
+            }), 503
+            
+        turn = start_chat_turn(message, conversation_id, session_id)
+        if turn is None:
+            return jsonify({"success": False, "error": "Conversation not found"}), 404
+        conversation, chat_history, file_data, summary = turn
+        
+        # Save the user message before the response starts streaming
+        db.session.commit()
+        conversation_id = conversation.id
+        
+    except Exception as e:
+        logger.error(f"Error in stream_chat_with_ai: {str(e)}")
+        logger.error(traceback.format_exc())
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+        
+    def events():
+        parts = []
+        saved = False
+        
+        def save_response():
+            ai_message = Message(
+                conversation_id=conversation_id,
+                is_user=False,
+                content="".join(parts)
+            )
+            db.session.add(ai_message)
+            db.session.commit()
+            return ai_message
+            
+        try:
+            yield f"event: start\ndata: {json.dumps({'conversation_id': conversation_id})}\n\n"
+            
+            start = time.perf_counter()
+            for token in ai_client.stream_chat(message, chat_history, file_data, summary):
+                if not parts:
+                    logger.info(f"First chat token after {time.perf_counter() - start:.2f}s")
+                parts.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+                
+            ai_message = save_response()
+            saved = True
+            schedule_conversation_summary(conversation_id)
+            done = {
+                "success": True,
+                "conversation_id": conversation_id,
+                "message_id": ai_message.id,
+                "response": ai_message.content
+            }
+            yield f"event: done\ndata: {json.dumps(done)}\n\n"
+            
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {str(e)}")
+            logger.error(traceback.format_exc())
+            db.session.rollback()
+            yield f"event: error\ndata: {json.dumps({'success': False, 'error': str(e)})}\n\n"
+            
+        finally:
+            # Keep what was generated if the client went away mid-stream
+            if parts and not saved:
+                try:
+                    save_response()
+                except Exception as e:
+                    logger.error(f"Error saving partial chat response: {str(e)}")
+                    db.session.rollback()
+                    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @main.route('/api/conversations', methods=['GET'])
 @login_required
 def get_conversations():
     """
-    Get user conversations.
+    Get user conversations, newest first, one page at a time.
+    
+    Query parameters: ``limit``, ``cursor`` (the previous page's
+    ``next_cursor``) or ``since`` (an earlier ``newest_cursor``, for only
+    newer conversations).
     """
     try:
-        conversations = Conversation.query.filter_by(user_id=current_user.id).order_by(Conversation.created_at.desc()).all()
+        # Conversations and their message counts come from a single grouped query
+        conversations, page = keyset_page(conversations_with_message_counts(current_user.id),
+                                          Conversation, **page_args(request.args))
         
         result = []
-        for conv in conversations:
+        for conv, message_count in conversations:
             result.append({
                 "id": conv.id,
                 "title": conv.title,
                 "created_at": conv.created_at.isoformat(),
-                "message_count": conv.messages.count()
+                "message_count": message_count
             })
             
         return jsonify({
             "success": True,
-            "conversations": result
+            "conversations": result,
+            "page": page
         })
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting conversations: {str(e)}")
         logger.error(traceback.format_exc())
@@ -1217,21 +1497,19 @@ def report_ai_generate():
             
         # Get the charts
         charts = []
-        for chart_id in chart_ids:
-            chart = SavedChart.query.filter_by(id=chart_id, user_id=current_user.id).first()
-            if chart:
-                chart_data = json.loads(chart.chart_data)
-                chart_config = json.loads(chart.chart_config) if chart.chart_config else {}
-                charts.append({
-                    "id": chart.id,
-                    "title": chart.chart_title,
-                    "type": chart.chart_type,
-                    "data": chart_data,
-                    "config": chart_config
-                })
+        for chart in load_charts(chart_ids, user_id=current_user.id):
+            chart_data = json.loads(chart.chart_data)
+            chart_config = json.loads(chart.chart_config) if chart.chart_config else {}
+            charts.append({
+                "id": chart.id,
+                "title": chart.chart_title,
+                "type": chart.chart_type,
+                "data": chart_data,
+                "config": chart_config
+            })
         
-        # Get session data if available
-        data_summary = None
+        # Get session files if available
+        selected_files = []
         if 'session_id' in session and file_indices:
             session_id = session['session_id']
             # Get files from the session
@@ -1251,51 +1529,24 @@ def report_ai_generate():
                         if os.path.isfile(os.path.join(session_folder, upload.filename))]
                 
                 # Filter files by indices if provided
-                if file_indices:
-                    try:
-                        selected_files = [all_files[i] for i in file_indices if 0 <= i < len(all_files)]
-                        if selected_files:
-                            # Get summaries of the files
-                            processor = DataProcessor()
-                            combine_files = len(selected_files) > 1
-                            data_summary = processor.process_file(selected_files[0])
-                    except Exception as e:
-                        logger.error(f"Error processing files: {str(e)}")
+                selected_files = [all_files[i] for i in file_indices if 0 <= i < len(all_files)]
+        
+        # Long-running: hand the LLM call to the job workers if requested
+        if wants_async():
+            job = enqueue('report.ai_generate', {
+                "prompt": prompt,
+                "title": title,
+                "description": description,
+                "file_paths": selected_files
+            }, user_id=current_user.id, priority=PRIORITY_INTERACTIVE)
+            return job_accepted(job)
         
         # Generate report with AI
         try:
-            ai_client = get_ai_instance()
-            if not ai_client:
-                return jsonify({"success": False, "error": "AI service not available"}), 503
-                
-            # Prepare a better prompt that includes details about the user's request and the selected charts
-            enhanced_prompt = f"""
-            User request: {prompt}
-            
-            Report title: {title if title else 'Not specified'}
-            Report description: {description if description else 'Not specified'}
-            
-            Please create a comprehensive report that addresses the user's request.
-            Focus on insights and patterns in the data represented by the charts.
-            The report should be well-structured with headings and bullet points where appropriate.
-            Use markdown formatting for the report structure.
-            """
-            
-            # Generate the response
-            ai_response = ai_client.chat(enhanced_prompt, chat_history=None, file_data=data_summary)
-            
-            # Generate a more polished report content
-            report_content = f"""
-            # {title or 'Data Analysis Report'}
-            
-            {ai_response}
-            """
-            
-            return jsonify({
-                "success": True,
-                "response": ai_response,
-                "report_content": report_content
-            })
+            result = generate_ai_report(prompt, title, description, selected_files)
+            return jsonify({"success": True, **result})
+        except JobError as ai_error:
+            return jsonify({"success": False, "error": str(ai_error)}), 503
         except Exception as ai_error:
             logger.error(f"AI report generation error: {str(ai_error)}")
             return jsonify({"success": False, "error": f"Error generating AI report: {str(ai_error)}"}), 500
@@ -1320,11 +1571,10 @@ def generate_report():
         if not chart_ids:
             return jsonify({"success": False, "error": "No charts selected"}), 400
             
-        # Verify all charts belong to the user
-        for chart_id in chart_ids:
-            chart = SavedChart.query.filter_by(id=chart_id).first()
-            if not chart or chart.user_id != current_user.id:
-                return jsonify({"success": False, "error": f"Chart {chart_id} not found or not owned by user"}), 404
+        # Verify all charts belong to the user (one batched query)
+        missing = missing_chart_ids(chart_ids, current_user.id)
+        if missing:
+            return jsonify({"success": False, "error": f"Chart {missing[0]} not found or not owned by user"}), 404
                 
         # Get the content from the request if available
         content = data.get('content', '')
@@ -1334,9 +1584,9 @@ def generate_report():
             user_id=current_user.id,
             title=title,
             description=description,
-            chart_ids=json.dumps(chart_ids),
             content=content
         )
+        set_report_charts(report, chart_ids)
         
         db.session.add(report)
         db.session.commit()
@@ -1357,10 +1607,14 @@ def generate_report():
 @login_required
 def get_saved_charts():
     """
-    Get user's saved charts.
+    Get user's saved charts, newest first, one page at a time.
+    
+    Takes the same ``limit``, ``cursor`` and ``since`` parameters as
+    ``/api/conversations``.
     """
     try:
-        charts = SavedChart.query.filter_by(user_id=current_user.id).order_by(SavedChart.created_at.desc()).all()
+        charts, page = keyset_page(SavedChart.query.filter_by(user_id=current_user.id),
+                                   SavedChart, **page_args(request.args))
         
         result = []
         for chart in charts:
@@ -1373,9 +1627,12 @@ def get_saved_charts():
             
         return jsonify({
             "success": True,
-            "charts": result
+            "charts": result,
+            "page": page
         })
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting saved charts: {str(e)}")
         logger.error(traceback.format_exc())
@@ -1395,7 +1652,7 @@ def get_chart(chart_id):
             
         chart_data = json.loads(chart.chart_data)
         
-        return jsonify({
+        return negotiated_response({
             "success": True,
             "chart": {
                 "id": chart.id,
@@ -1411,31 +1668,65 @@ def get_chart(chart_id):
         logger.error(traceback.format_exc())
         return jsonify({"success": False, "error": str(e)}), 500
 
+@main.route('/api/charts/<int:chart_id>/image', methods=['GET'])
+@login_required
+def get_chart_image(chart_id):
+    """
+    Get a saved chart rendered as an image (``?format=png`` or ``svg``).
+    """
+    try:
+        image_format = request.args.get('format', 'png').lower()
+        if image_format not in IMAGE_MIMETYPES:
+            return jsonify({"success": False, "error": f"Unsupported image format: {image_format}"}), 400
+            
+        chart = SavedChart.query.filter_by(id=chart_id, user_id=current_user.id).first()
+        
+        if not chart:
+            return jsonify({"success": False, "error": "Chart not found"}), 404
+            
+        image = chart_renderer.render(chart.chart_data, chart.chart_title or '', image_format=image_format)
+        if image is None:
+            return jsonify({"success": False, "error": "Could not render chart"}), 500
+            
+        return send_file(io.BytesIO(image), mimetype=IMAGE_MIMETYPES[image_format],
+                         download_name=f"chart_{chart_id}.{image_format}")
+        
+    except Exception as e:
+        logger.error(f"Error rendering chart image: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @main.route('/api/reports', methods=['GET'])
 @login_required
 def get_reports():
     """
-    Get user's reports.
+    Get user's reports, newest first, one page at a time.
+    
+    Takes the same ``limit``, ``cursor`` and ``since`` parameters as
+    ``/api/conversations``.
     """
     try:
-        reports = Report.query.filter_by(user_id=current_user.id).order_by(Report.created_at.desc()).all()
+        reports, page = keyset_page(reports_with_chart_counts(current_user.id), Report,
+                                    **page_args(request.args))
         
         result = []
-        for report in reports:
-            chart_ids = json.loads(report.chart_ids)
+        for report, chart_count in reports:
             result.append({
                 "id": report.id,
                 "title": report.title,
                 "description": report.description,
-                "chart_count": len(chart_ids),
+                "chart_count": chart_count,
                 "created_at": report.created_at.isoformat()
             })
             
         return jsonify({
             "success": True,
-            "reports": result
+            "reports": result,
+            "page": page
         })
         
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting reports: {str(e)}")
         logger.error(traceback.format_exc())
@@ -1453,18 +1744,15 @@ def get_report(report_id):
         if not report:
             return jsonify({"success": False, "error": "Report not found"}), 404
             
-        chart_ids = json.loads(report.chart_ids)
         charts = []
         
-        for chart_id in chart_ids:
-            chart = SavedChart.query.filter_by(id=chart_id).first()
-            if chart:
-                charts.append({
-                    "id": chart.id,
-                    "title": chart.chart_title,
-                    "type": chart.chart_type,
-                    "data": json.loads(chart.chart_data)
-                })
+        for chart in load_report_charts(report.id):
+            charts.append({
+                "id": chart.id,
+                "title": chart.chart_title,
+                "type": chart.chart_type,
+                "data": json.loads(chart.chart_data)
+            })
                 
         return jsonify({
             "success": True,
@@ -1499,61 +1787,21 @@ def download_report(report_id):
         if not report:
             return jsonify({"success": False, "error": "Report not found"}), 404
             
-        chart_ids = json.loads(report.chart_ids)
-        charts = []
-        
-        for chart_id in chart_ids:
-            chart = SavedChart.query.filter_by(id=chart_id).first()
-            if chart:
-                charts.append({
-                    "id": chart.id,
-                    "chart_type": chart.chart_type,
-                    "chart_title": chart.chart_title,
-                    "chart_data": chart.chart_data,
-                    "chart_config": chart.chart_config,
-                    "created_at": chart.created_at.isoformat()
-                })
+        charts = report_charts(report)
         
         if not charts:
             return jsonify({"success": False, "error": "No charts found in report"}), 400
             
-        # Get latest file data if available
-        from datetime import timedelta
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        latest_upload = Upload.query.filter(Upload.user_id == current_user.id, 
-                                           Upload.upload_date >= cutoff_time,
-                                           Upload.active == True).first()
-                                           
-        data_summary = None
-        if latest_upload:
-            # Try to get data summary from the file
-            try:
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], latest_upload.filename)
-                processor = DataProcessor()
-                data_result = processor.process_file(file_path)
-                if data_result.get("success", False):
-                    data_summary = data_result.get("summary", None)
-            except Exception as e:
-                logger.warning(f"Could not get data summary for report: {str(e)}")
-                
-        # Check if the report already has content
-        content = None
-        if report.content:
-            content = report.content
-        else:
-            # Need to generate content
-            ai_client = get_ai_instance()
-            
-            if not ai_client:
-                return jsonify({"success": False, "error": "AI service not available"}), 503
-                
-            # Generate the report content
-            content = ai_client.generate_report(charts, data_summary)
+        # PDF exports may need the LLM and a slow render: run them as a job if requested
+        if report_format == 'pdf' and wants_async():
+            job = enqueue('report.pdf', {"report_id": report.id}, user_id=current_user.id,
+                          priority=PRIORITY_INTERACTIVE)
+            return job_accepted(job)
             
-            # Update the report with the generated content
-            report.content = content
-            db.session.add(report)
-            db.session.commit()
+        # Check if the report already has content (generating it if needed)
+        content = ensure_report_content(report, charts)
+        if content is None:
+            return jsonify({"success": False, "error": "AI service not available"}), 503
         
         # Set filename and mimetype based on format
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -1562,85 +1810,9 @@ def download_report(report_id):
             mimetype = 'application/pdf'
             
             try:
-                # Convert markdown to HTML
-                import markdown
-                html_content = markdown.markdown(content)
-                
-                # Add proper styling
-                styled_html = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>{report.title}</title>
-                    <style>
-                        body {{
-                            font-family: Arial, sans-serif;
-                            line-height: 1.6;
-                            margin: 20px;
-                            color: #333;
-                        }}
-                        h1 {{
-                            color: #2c3e50;
-                            border-bottom: 1px solid #eee;
-                            padding-bottom: 10px;
-                        }}
-                        h2 {{
-                            color: #3498db;
-                            margin-top: 25px;
-                        }}
-                        h3 {{
-                            color: #2980b9;
-                        }}
-                        table {{
-                            border-collapse: collapse;
-                            width: 100%;
-                            margin: 20px 0;
-                        }}
-                        th, td {{
-                            border: 1px solid #ddd;
-                            padding: 8px;
-                        }}
-                        th {{
-                            background-color: #f2f2f2;
-                            text-align: left;
-                        }}
-                        .report-header {{
-                            margin-bottom: 30px;
-                        }}
-                        .report-header .date {{
-                            color: #7f8c8d;
-                            font-size: 0.9em;
-                        }}
-                        .report-header .description {{
-                            font-style: italic;
-                            color: #666;
-                            margin: 10px 0;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="report-header">
-                        <h1>{report.title}</h1>
-                        <div class="date">Generated on {datetime.now().strftime('%Y-%m-%d')}</div>
-                        <div class="description">{report.description or ""}</div>
-                    </div>
-                    {html_content}
-                </body>
-                </html>
-                """
-                
-                # Convert HTML to PDF using WeasyPrint
-                from weasyprint import HTML
-                pdf_content = HTML(string=styled_html).write_pdf()
-                
-                # Return PDF content
-                return send_file(
-                    io.BytesIO(pdf_content),
-                    download_name=filename,
-                    mimetype=mimetype,
-                    as_attachment=True
-                )
+                # Unchanged reports are served from the PDF cache, with ETag and range support
+                pdf_path, etag = render_report_pdf(report, content, charts)
+                return send_pdf_file(pdf_path, filename, etag)
                 
             except Exception as e:
                 logger.error(f"PDF conversion error: {str(e)}")
@@ -1664,6 +1836,120 @@ def download_report(report_id):
         logger.error(traceback.format_exc())
         return jsonify({"success": False, "error": str(e)}), 500
 
+def send_pdf_file(path, filename, etag):
+    """
+    Send a cached PDF as a download.
+    
+    The file is served with a strong ETag (its cache key), so browsers can
+    revalidate with If-None-Match and resume with Range requests.
+    
+    Args:
+        path: Path of the cached PDF
+        filename: Download file name
+        etag: Cache key of the PDF
+        
+    Returns:
+        Flask response
+    """
+    response = send_file(path, download_name=filename, mimetype='application/pdf',
+                         as_attachment=True, conditional=True, etag=etag)
+    response.cache_control.private = True
+    return response
+
+def wants_async():
+    """Check whether the client asked for a long-running request to run as a background job."""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def job_accepted(job):
+    """
+    Build the 202 response for a queued job.
+    
+    Args:
+        job: The queued Job
+        
+    Returns:
+        Flask response pointing at the job's status endpoint
+    """
+    status_url = url_for('main.get_job', job_id=job.id)
+    response = jsonify({
+        "success": True,
+        "job": describe(job),
+        "status_url": status_url
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+@main.route('/api/jobs', methods=['GET'])
+@login_required
+def get_jobs():
+    """
+    Get the user's most recent background jobs.
+    """
+    try:
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        jobs = Job.query.filter_by(user_id=current_user.id).order_by(Job.id.desc()).limit(limit).all()
+        
+        return jsonify({
+            "success": True,
+            "jobs": [describe(job) for job in jobs]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting jobs: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@main.route('/api/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """
+    Get the status, progress and result of a background job.
+    """
+    try:
+        job = Job.query.filter_by(id=job_id, user_id=current_user.id).first()
+        
+        if not job:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+            
+        result = {"success": True, "job": describe(job)}
+        if job.kind == 'report.pdf' and job.status == 'succeeded':
+            result["download_url"] = url_for('main.download_job_result', job_id=job.id)
+            
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error getting job: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@main.route('/api/jobs/<int:job_id>/download', methods=['GET'])
+@login_required
+def download_job_result(job_id):
+    """
+    Download the file produced by a finished export job.
+    """
+    try:
+        job = Job.query.filter_by(id=job_id, user_id=current_user.id).first()
+        
+        if not job or job.kind != 'report.pdf':
+            return jsonify({"success": False, "error": "Job not found"}), 404
+            
+        if job.status != 'succeeded':
+            return jsonify({"success": False, "error": f"Job is {job.status}"}), 409
+            
+        result = json.loads(job.result)
+        path = pdf_renderer.cached_path(result["cache_key"])
+        if path is None:
+            return jsonify({"success": False, "error": "Job result has expired"}), 410
+            
+        return send_pdf_file(path, result["filename"], result["cache_key"])
+        
+    except Exception as e:
+        logger.error(f"Error downloading job result: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @main.route('/help', methods=['GET'])
 def help_page():
     """
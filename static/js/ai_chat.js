@@ -117,7 +117,7 @@ document.addEventListener('DOMContentLoaded', function() {
         const loadingId = addLoadingMessage();
         
         try {
-            const response = await fetch('/api/chat', {
+            const response = await fetch('/api/chat/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -128,34 +128,123 @@ document.addEventListener('DOMContentLoaded', function() {
                 }),
             });
             
-            const data = await response.json();
+            const contentType = response.headers.get('Content-Type') || '';
+            if (!response.ok || !response.body || !contentType.startsWith('text/event-stream')) {
+                // Streaming not available: fall back to the regular endpoint's response shape
+                const data = await response.json();
+                removeLoadingMessage(loadingId);
+                handleChatResponse(data);
+                return;
+            }
+            
+            await readChatStream(response, loadingId);
+        } catch (error) {
+            console.error('Error sending message:', error);
             
             // Remove loading indicator
             removeLoadingMessage(loadingId);
             
-            if (data.success) {
-                // Store conversation ID
+            // Add error message
+            addMessage("I'm sorry, there was a network error. Please check your connection and try again.", false);
+        }
+    }
+    
+    // Show a complete (non-streamed) chat response
+    function handleChatResponse(data) {
+        if (data.success) {
+            // Store conversation ID
+            currentConversationId = data.conversation_id;
+            
+            // Add AI response
+            addMessage(data.response, false);
+            
+            // Show new suggested prompts if available
+            if (data.suggested_prompts && data.suggested_prompts.length > 0) {
+                suggestedPrompts.style.display = 'flex';
+                displaySuggestedPrompts(data.suggested_prompts);
+            }
+        } else {
+            addMessage("I'm sorry, I encountered an error processing your request. Please try again.", false);
+        }
+    }
+    
+    // Render a Server-Sent Events chat response as its tokens arrive
+    async function readChatStream(response, loadingId) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+        let messageDiv = null;
+        let renderPending = false;
+        let finished = false;
+        
+        // Re-render the Markdown at most once per frame
+        const render = () => {
+            renderPending = false;
+            messageDiv.querySelector('.message-content').innerHTML = formatMessageContent(text);
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        };
+        
+        const handleEvent = (name, data) => {
+            if (name === 'start') {
                 currentConversationId = data.conversation_id;
-                
-                // Add AI response
-                addMessage(data.response, false);
-                
-                // Show new suggested prompts if available
-                if (data.suggested_prompts && data.suggested_prompts.length > 0) {
-                    suggestedPrompts.style.display = 'flex';
-                    displaySuggestedPrompts(data.suggested_prompts);
+            } else if (name === 'message') {
+                if (!messageDiv) {
+                    // First token: replace the loading indicator with the response
+                    removeLoadingMessage(loadingId);
+                    messageDiv = addMessage('', false);
                 }
-            } else {
+                text += data.token;
+                if (!renderPending) {
+                    renderPending = true;
+                    requestAnimationFrame(render);
+                }
+            } else if (name === 'done') {
+                finished = true;
+                text = data.response;
+                if (!messageDiv) {
+                    removeLoadingMessage(loadingId);
+                    messageDiv = addMessage('', false);
+                }
+                render();
+            } else if (name === 'error') {
+                finished = true;
+                removeLoadingMessage(loadingId);
                 addMessage("I'm sorry, I encountered an error processing your request. Please try again.", false);
             }
-        } catch (error) {
-            console.error('Error sending message:', error);
+        };
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
             
-            // Remove loading indicator
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let name = 'message';
+                const dataLines = [];
+                block.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        name = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        dataLines.push(line.slice(5).trim());
+                    }
+                });
+                if (dataLines.length) {
+                    handleEvent(name, JSON.parse(dataLines.join('\n')));
+                }
+            }
+        }
+        
+        if (!finished) {
             removeLoadingMessage(loadingId);
-            
-            // Add error message
-            addMessage("I'm sorry, there was a network error. Please check your connection and try again.", false);
+            if (!messageDiv) {
+                addMessage("I'm sorry, the response was interrupted. Please try again.", false);
+            }
         }
     }
     
@@ -176,6 +265,8 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Scroll to bottom
         chatMessages.scrollTop = chatMessages.scrollHeight;
+        
+        return messageDiv;
     }
     
     // Add loading message
@@ -320,7 +411,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const data = await response.json();
             
             if (data.success && data.conversations) {
-                displayConversations(data.conversations);
+                displayConversations(data.conversations, data.page);
             } else {
                 conversationsList.innerHTML = '<div class="empty-state">No conversations found</div>';
             }
@@ -330,8 +421,29 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Load the next page of older conversations
+    async function loadMoreConversations(button, cursor) {
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+        
+        try {
+            const response = await fetch(`/api/conversations?cursor=${encodeURIComponent(cursor)}`);
+            const data = await response.json();
+            
+            if (!data.success) {
+                throw new Error(data.error || 'Failed to load conversations');
+            }
+            button.remove();
+            appendConversations(data.conversations, data.page);
+        } catch (error) {
+            console.error('Error loading more conversations:', error);
+            button.disabled = false;
+            button.innerHTML = '<i class="fas fa-redo"></i> Retry';
+        }
+    }
+    
     // Display conversations
-    function displayConversations(conversations) {
+    function displayConversations(conversations, page) {
         const conversationsList = document.getElementById('conversationsList');
         conversationsList.innerHTML = '';
         
@@ -340,6 +452,13 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
+        appendConversations(conversations, page);
+    }
+    
+    // Append a page of conversations, with a "Load more" button if older ones remain
+    function appendConversations(conversations, page) {
+        const conversationsList = document.getElementById('conversationsList');
+        
         conversations.forEach(conversation => {
             const conv = document.createElement('div');
             conv.className = 'conversation-item';
@@ -381,6 +500,14 @@ document.addEventListener('DOMContentLoaded', function() {
                 deleteConversation(conversation.id, conv);
             });
         });
+        
+        if (page && page.has_more && page.next_cursor) {
+            const loadMoreBtn = document.createElement('button');
+            loadMoreBtn.className = 'load-more-btn';
+            loadMoreBtn.innerHTML = '<i class="fas fa-chevron-down"></i> Load more';
+            loadMoreBtn.addEventListener('click', () => loadMoreConversations(loadMoreBtn, page.next_cursor));
+            conversationsList.appendChild(loadMoreBtn);
+        }
     }
     
     // View conversation
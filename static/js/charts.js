@@ -9,6 +9,9 @@ class ChartManager {
         this.chartData = {};
         // Store chart options
         this.chartOptions = [];
+        // Chart requests waiting to be sent as one batch
+        this.pendingCharts = [];
+        this.pendingFlush = null;
         
         // Set colors based on current mode
         this.initColors();
@@ -77,6 +80,63 @@ class ChartManager {
         }
     }
 
+    // Fetch an API payload, asking for MessagePack when its decoder (msgpack.js) is loaded
+    static async fetchPayload(url, options = {}) {
+        const accept = [];
+        if (typeof MessagePack !== 'undefined') accept.push('application/msgpack');
+        accept.push('application/json;q=0.5');
+        
+        const response = await fetch(url, {
+            ...options,
+            headers: { ...(options.headers || {}), 'Accept': accept.join(', ') }
+        });
+        const contentType = response.headers.get('Content-Type') || '';
+        
+        if (contentType.startsWith('application/msgpack')) {
+            return MessagePack.decode(new Uint8Array(await response.arrayBuffer()));
+        }
+        return response.json();
+    }
+
+    // Expand a compact columnar payload back into per-point datasets
+    static expandPayload(chartData) {
+        if (!chartData || chartData.format !== 'columnar') {
+            return chartData;
+        }
+        
+        // Rebuild [{x, y, ...}, ...] from parallel arrays
+        const expandPoints = (packed) => {
+            const columns = packed.columns || {};
+            const dictionaries = packed.dictionaries || {};
+            const keys = Object.keys(columns);
+            const points = new Array(packed.length);
+            for (let i = 0; i < packed.length; i++) {
+                const point = {};
+                for (const key of keys) {
+                    const value = columns[key][i];
+                    point[key] = dictionaries[key] ? dictionaries[key][value] : value;
+                }
+                points[i] = point;
+            }
+            return points;
+        };
+        
+        const isPacked = (value) => value && !Array.isArray(value) && typeof value === 'object' && value.columns;
+        const expanded = { ...chartData };
+        delete expanded.format;
+        
+        if (isPacked(chartData.datasets)) {
+            // Heatmap cells are stored directly in "datasets"
+            expanded.datasets = expandPoints(chartData.datasets);
+        } else {
+            expanded.datasets = (chartData.datasets || []).map(dataset => (
+                isPacked(dataset.data) ? { ...dataset, data: expandPoints(dataset.data) } : dataset
+            ));
+        }
+        
+        return expanded;
+    }
+
     // Initialize chart options based on API response
     setChartOptions(options) {
         this.chartOptions = options;
@@ -95,7 +155,7 @@ class ChartManager {
             // Save a fresh copy of the chart data
             for (const chartType in data) {
                 if (data.hasOwnProperty(chartType) && data[chartType]) {
-                    this.chartData[chartType] = JSON.parse(JSON.stringify(data[chartType]));
+                    this.chartData[chartType] = ChartManager.expandPayload(JSON.parse(JSON.stringify(data[chartType])));
                     console.log(`Stored fresh data for chart type: ${chartType}`);
                 }
             }
@@ -252,22 +312,14 @@ class ChartManager {
         } else {
             // Request chart data from the server
             try {
-                const response = await fetch('/api/chart', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        chart_type: chartType,
-                        file_index: window.sessionData?.selectedFileIndices?.[0] || 0  // Use selected file index if available
-                    }),
-                });
-                
-                const data = await response.json();
+                // Dashboard charts are computed lazily behind their descriptor URL
+                const option = this.chartOptions.find(o => o.id === chartType);
+                const data = option?.url ? await ChartManager.fetchPayload(option.url) : await this.requestChart(chartType);
                 
                 if (data.success) {
-                    this.chartData[chartType] = data.chart_data;
-                    this.renderChart(chartType, data.chart_data);
+                    const chartData = ChartManager.expandPayload(data.chart_data);
+                    this.chartData[chartType] = chartData;
+                    this.renderChart(chartType, chartData);
                 } else {
                     console.error('Error generating chart:', data.error);
                     this.showChartError(chartType, data.error || 'Failed to generate chart');
@@ -279,6 +331,71 @@ class ChartManager {
         }
     }
 
+    // Queue a chart request; requests made together go out as one batch
+    requestChart(chartType) {
+        return new Promise((resolve, reject) => {
+            this.pendingCharts.push({ chartType, resolve, reject });
+            if (!this.pendingFlush) {
+                this.pendingFlush = setTimeout(() => this.flushChartRequests(), 0);
+            }
+        });
+    }
+
+    // Send queued chart requests to /api/charts/batch and resolve each as its line streams in
+    async flushChartRequests() {
+        const batch = this.pendingCharts;
+        this.pendingCharts = [];
+        this.pendingFlush = null;
+        
+        try {
+            const response = await fetch('/api/charts/batch', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    file_index: window.sessionData?.selectedFileIndices?.[0] || 0,  // Use selected file index if available
+                    payload_format: 'columnar',
+                    float32: true,
+                    charts: batch.map(request => ({ chart_type: request.chartType }))
+                }),
+            });
+            
+            if (!response.ok) {
+                const error = await response.json().catch(() => ({}));
+                batch.forEach(request => request.resolve({ success: false, error: error.error || 'Failed to generate chart' }));
+                return;
+            }
+            
+            // One JSON object per line, in completion order
+            const handleLine = (line) => {
+                if (!line.trim()) return;
+                const result = JSON.parse(line);
+                if (!result.done && batch[result.index]) {
+                    batch[result.index].resolve(result);
+                }
+            };
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
+            }
+            handleLine(buffer);
+            
+            // Settle anything the server did not answer
+            batch.forEach(request => request.resolve({ success: false, error: 'No result returned for chart' }));
+        } catch (error) {
+            batch.forEach(request => request.reject(error));
+        }
+    }
+
     // Render a chart with data
     renderChart(chartType, chartData) {
         const canvasId = `chart-${chartType}`;
@@ -1203,7 +1320,9 @@ class ChartManager {
                 body: JSON.stringify({
                     chart_type: chartType,
                     chart_title: chartTitle,
-                    file_index: 0  // Default to first file
+                    file_index: 0,  // Default to first file
+                    payload_format: 'columnar',
+                    float32: true
                 }),
             });
             
@@ -1215,7 +1334,7 @@ class ChartManager {
                 
                 // Update the chart data if needed
                 if (data.chart_data) {
-                    this.chartData[chartType] = data.chart_data;
+                    this.chartData[chartType] = ChartManager.expandPayload(data.chart_data);
                 }
                 
                 // Close modal if open
@@ -92,6 +92,10 @@ document.addEventListener('DOMContentLoaded', function() {
         combineFiles: false
     };
     
+    // Background AI insights job the insights panel is waiting for
+    let activeInsightsJob = null;
+    let insightsSource = null;
+    
     // Initialize event listeners
     initEventListeners();
     
@@ -374,7 +378,8 @@ document.addEventListener('DOMContentLoaded', function() {
             // Clear the metrics grid
             metricsGrid.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i> Calculating metrics...</div>';
             
-            // Clear AI insights
+            // Clear AI insights (and stop waiting for a previous analysis)
+            cancelInsights();
             aiInsightsContent.innerHTML = "<div class='loading-message'>Generating insights...</div>";
             
             // Clean up previous charts to avoid rendering conflicts
@@ -486,7 +491,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // Fetch analysis from server
     async function fetchAnalysis(sessionId, fileIndices = [], combineFiles = false) {
         try {
-            const response = await fetch('/api/analyze', {
+            return await ChartManager.fetchPayload('/api/analyze', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -497,8 +502,6 @@ document.addEventListener('DOMContentLoaded', function() {
                     combine_files: combineFiles
                 })
             });
-            
-            return await response.json();
         } catch (error) {
             console.error('Error fetching analysis:', error);
             throw error;
@@ -565,50 +568,16 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
             }, 100);
             
-            // Display AI insights
+            // Display AI insights; they usually arrive later from a background job
             if (results.ai_insights) {
-                // Use the marked library for proper Markdown rendering if available
-                if (typeof marked !== 'undefined') {
-                    try {
-                        // Configure marked options
-                        marked.setOptions({
-                            breaks: true,              // Add <br> on single line breaks
-                            gfm: true,                 // GitHub Flavored Markdown
-                            headerIds: false,          // Don't add IDs to headers
-                            mangle: false,             // Don't mangle email addresses
-                            smartLists: true,          // Use smarter list behavior
-                            smartypants: true,         // Use "smart" typographic punctuation
-                            xhtml: false               // Don't close tags with a slash
-                        });
-                        
-                        // Parse Markdown to HTML
-                        aiInsightsContent.innerHTML = marked.parse(results.ai_insights);
-                    } catch (e) {
-                        console.error('Error parsing Markdown for AI insights:', e);
-                        // Fall back to basic formatting if marked fails
-                        aiInsightsContent.innerHTML = formatBasicMarkdown(results.ai_insights);
-                    }
-                } else {
-                    // Fall back to basic formatting if marked isn't available
-                    aiInsightsContent.innerHTML = formatBasicMarkdown(results.ai_insights);
-                }
+                renderInsights(results.ai_insights);
+            } else if (results.ai_insights_job) {
+                aiInsightsContent.innerHTML = "<div class='loading-message'>Generating insights...</div>";
+                loadInsights(results.ai_insights_job);
             } else {
                 aiInsightsContent.innerHTML = "<div class='empty-message'>No AI insights available for this data.</div>";
             }
             
-            // Helper function for basic Markdown formatting
-            function formatBasicMarkdown(content) {
-                return content
-                    .replace(/# (.*)/g, '<h1>$1</h1>')
-                    .replace(/## (.*)/g, '<h2>$1</h2>')
-                    .replace(/### (.*)/g, '<h3>$1</h3>')
-                    .replace(/\*\*([^*]+)\*\*/g, '<strong>$1</strong>')
-                    .replace(/\*([^*]+)\*/g, '<em>$1</em>')
-                    .replace(/- (.*)/g, '<ul><li>$1</li></ul>')
-                    .replace(/<\/ul><ul>/g, '')  // Combine consecutive list items
-                    .replace(/\n/g, '<br>');
-            }
-            
             // Safely scroll to dashboard section
             try {
                 dashboardSection.scrollIntoView({ behavior: 'smooth' });
@@ -628,6 +597,114 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Display metrics
+    // Render AI insights Markdown into the insights panel
+    function renderInsights(content) {
+        // Use the marked library for proper Markdown rendering if available
+        if (typeof marked !== 'undefined') {
+            try {
+                // Configure marked options
+                marked.setOptions({
+                    breaks: true,              // Add <br> on single line breaks
+                    gfm: true,                 // GitHub Flavored Markdown
+                    headerIds: false,          // Don't add IDs to headers
+                    mangle: false,             // Don't mangle email addresses
+                    smartLists: true,          // Use smarter list behavior
+                    smartypants: true,         // Use "smart" typographic punctuation
+                    xhtml: false               // Don't close tags with a slash
+                });
+                
+                // Parse Markdown to HTML
+                aiInsightsContent.innerHTML = marked.parse(content);
+            } catch (e) {
+                console.error('Error parsing Markdown for AI insights:', e);
+                // Fall back to basic formatting if marked fails
+                aiInsightsContent.innerHTML = formatBasicMarkdown(content);
+            }
+        } else {
+            // Fall back to basic formatting if marked isn't available
+            aiInsightsContent.innerHTML = formatBasicMarkdown(content);
+        }
+    }
+    
+    // Helper function for basic Markdown formatting
+    function formatBasicMarkdown(content) {
+        return content
+            .replace(/# (.*)/g, '<h1>$1</h1>')
+            .replace(/## (.*)/g, '<h2>$1</h2>')
+            .replace(/### (.*)/g, '<h3>$1</h3>')
+            .replace(/\*\*([^*]+)\*\*/g, '<strong>$1</strong>')
+            .replace(/\*([^*]+)\*/g, '<em>$1</em>')
+            .replace(/- (.*)/g, '<ul><li>$1</li></ul>')
+            .replace(/<\/ul><ul>/g, '')  // Combine consecutive list items
+            .replace(/\n/g, '<br>');
+    }
+    
+    // Stop waiting for the current insights job
+    function cancelInsights() {
+        activeInsightsJob = null;
+        if (insightsSource) {
+            insightsSource.close();
+            insightsSource = null;
+        }
+    }
+    
+    // Collect background AI insights over Server-Sent Events, or by long polling
+    function loadInsights(job) {
+        cancelInsights();
+        activeInsightsJob = job.id;
+        
+        const finish = (status) => {
+            if (activeInsightsJob !== job.id) return;
+            activeInsightsJob = null;
+            if (status && status.ai_insights) {
+                renderInsights(status.ai_insights);
+            } else {
+                aiInsightsContent.innerHTML = "<div class='empty-message'>No AI insights available for this data.</div>";
+            }
+        };
+        
+        if (!window.EventSource || !job.stream_url) {
+            pollInsights(job, finish);
+            return;
+        }
+        
+        const source = new EventSource(job.stream_url);
+        insightsSource = source;
+        source.addEventListener('insights', (event) => {
+            source.close();
+            if (insightsSource === source) insightsSource = null;
+            finish(JSON.parse(event.data));
+        });
+        source.onerror = () => {
+            // Fall back to polling if the stream is cut (e.g. by a buffering proxy)
+            source.close();
+            if (insightsSource === source) insightsSource = null;
+            if (activeInsightsJob === job.id) pollInsights(job, finish);
+        };
+    }
+    
+    async function pollInsights(job, finish) {
+        try {
+            while (activeInsightsJob === job.id) {
+                const response = await fetch(`${job.status_url}?wait=20`);
+                if (!response.ok) {
+                    throw new Error(`Server returned ${response.status}`);
+                }
+                const status = await response.json();
+                if (status.status !== 'pending') {
+                    finish(status);
+                    return;
+                }
+            }
+        } catch (error) {
+            console.error('Error loading AI insights:', error);
+            if (activeInsightsJob === job.id) {
+                activeInsightsJob = null;
+                aiInsightsContent.innerHTML = "<div class='error-message'>Unable to load AI insights. Please try again.</div>";
+            }
+        }
+    }
+    
     function displayMetrics(metrics) {
         console.log('Displaying metrics:', metrics);
         if (!metrics) {
@@ -683,9 +760,36 @@ document.addEventListener('DOMContentLoaded', function() {
         sessionData.metrics = { ...metrics };
     }
     
-    // Load saved charts
+    // Paging position of the saved charts grid
+    const savedChartsPage = { nextCursor: null, newestCursor: null };
+    
+    // Load saved charts; once loaded, only charts saved since the last load are fetched
     async function loadSavedCharts() {
         const savedChartsGrid = document.getElementById('savedChartsGrid');
+        
+        if (savedChartsPage.newestCursor && savedChartsGrid.querySelector('.saved-chart-card')) {
+            try {
+                const response = await fetch(`/api/charts/saved?since=${encodeURIComponent(savedChartsPage.newestCursor)}&limit=200`);
+                const data = await response.json();
+                
+                if (data.success && data.charts) {
+                    savedChartsPage.newestCursor = data.page.newest_cursor;
+                    if (data.page.has_more) {
+                        // Too many new charts to merge; start over from the newest
+                        savedChartsPage.newestCursor = null;
+                        return loadSavedCharts();
+                    }
+                    // Delta rows are newest first; insert oldest first so the newest ends up on top
+                    data.charts.slice().reverse().forEach(chart => {
+                        savedChartsGrid.insertBefore(createSavedChartCard(chart), savedChartsGrid.firstChild);
+                    });
+                    return;
+                }
+            } catch (error) {
+                console.error('Error refreshing saved charts:', error);
+            }
+        }
+        
         savedChartsGrid.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i> Loading saved charts...</div>';
         
         try {
@@ -693,7 +797,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const data = await response.json();
             
             if (data.success && data.charts) {
-                displaySavedCharts(data.charts);
+                displaySavedCharts(data.charts, data.page);
             } else {
                 savedChartsGrid.innerHTML = '<div class="empty-state">No saved charts found</div>';
             }
@@ -703,59 +807,98 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Load the next page of older saved charts
+    async function loadMoreSavedCharts(button) {
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+        
+        try {
+            const response = await fetch(`/api/charts/saved?cursor=${encodeURIComponent(savedChartsPage.nextCursor)}`);
+            const data = await response.json();
+            
+            if (!data.success) {
+                throw new Error(data.error || 'Failed to load charts');
+            }
+            button.remove();
+            appendSavedCharts(data.charts, data.page);
+        } catch (error) {
+            console.error('Error loading more saved charts:', error);
+            button.disabled = false;
+            button.innerHTML = '<i class="fas fa-redo"></i> Retry';
+        }
+    }
+    
     // Display saved charts
-    function displaySavedCharts(charts) {
+    function displaySavedCharts(charts, page) {
         const savedChartsGrid = document.getElementById('savedChartsGrid');
         savedChartsGrid.innerHTML = '';
+        savedChartsPage.newestCursor = page ? page.newest_cursor : null;
         
         if (charts.length === 0) {
             savedChartsGrid.innerHTML = '<div class="empty-state">No saved charts found</div>';
             return;
         }
         
-        charts.forEach(chart => {
-            const card = document.createElement('div');
-            card.className = 'saved-chart-card';
-            card.innerHTML = `
-                <div class="saved-chart-header">
-                    <h4>${chart.title}</h4>
-                </div>
-                <div class="saved-chart-body">
-                    <canvas id="saved-chart-${chart.id}"></canvas>
-                </div>
-                <div class="saved-chart-footer">
-                    <div class="chart-date">${new Date(chart.created_at).toLocaleDateString()}</div>
-                    <div class="saved-chart-actions">
-                        <button class="view-chart-btn" data-id="${chart.id}">
-                            <i class="fas fa-eye"></i> View
-                        </button>
-                        <button class="delete-chart-btn" data-id="${chart.id}">
-                            <i class="fas fa-trash"></i> Delete
-                        </button>
-                    </div>
+        appendSavedCharts(charts, page);
+    }
+    
+    // Append a page of saved charts, with a "Load more" button if older charts remain
+    function appendSavedCharts(charts, page) {
+        const savedChartsGrid = document.getElementById('savedChartsGrid');
+        charts.forEach(chart => savedChartsGrid.appendChild(createSavedChartCard(chart)));
+        
+        savedChartsPage.nextCursor = page && page.has_more ? page.next_cursor : null;
+        if (savedChartsPage.nextCursor) {
+            const loadMoreBtn = document.createElement('button');
+            loadMoreBtn.className = 'load-more-btn';
+            loadMoreBtn.innerHTML = '<i class="fas fa-chevron-down"></i> Load more';
+            loadMoreBtn.addEventListener('click', () => loadMoreSavedCharts(loadMoreBtn));
+            savedChartsGrid.appendChild(loadMoreBtn);
+        }
+    }
+    
+    // Create the card of a saved chart and start loading its data
+    function createSavedChartCard(chart) {
+        const card = document.createElement('div');
+        card.className = 'saved-chart-card';
+        card.innerHTML = `
+            <div class="saved-chart-header">
+                <h4>${chart.title}</h4>
+            </div>
+            <div class="saved-chart-body">
+                <canvas id="saved-chart-${chart.id}"></canvas>
+            </div>
+            <div class="saved-chart-footer">
+                <div class="chart-date">${new Date(chart.created_at).toLocaleDateString()}</div>
+                <div class="saved-chart-actions">
+                    <button class="view-chart-btn" data-id="${chart.id}">
+                        <i class="fas fa-eye"></i> View
+                    </button>
+                    <button class="delete-chart-btn" data-id="${chart.id}">
+                        <i class="fas fa-trash"></i> Delete
+                    </button>
                 </div>
-            `;
-            savedChartsGrid.appendChild(card);
-            
-            // Add event listeners to buttons
-            card.querySelector('.view-chart-btn').addEventListener('click', () => {
-                viewSavedChart(chart.id);
-            });
-            
-            card.querySelector('.delete-chart-btn').addEventListener('click', () => {
-                deleteSavedChart(chart.id, card);
-            });
-            
-            // Load chart data and render
-            loadSavedChart(chart.id);
+            </div>
+        `;
+        
+        // Add event listeners to buttons
+        card.querySelector('.view-chart-btn').addEventListener('click', () => {
+            viewSavedChart(chart.id);
         });
+        
+        card.querySelector('.delete-chart-btn').addEventListener('click', () => {
+            deleteSavedChart(chart.id, card);
+        });
+        
+        // Load chart data and render; the canvas is looked up once the data arrives
+        loadSavedChart(chart.id);
+        return card;
     }
     
     // Load individual saved chart
     async function loadSavedChart(chartId) {
         try {
-            const response = await fetch(`/api/charts/${chartId}`);
-            const data = await response.json();
+            const data = await ChartManager.fetchPayload(`/api/charts/${chartId}`);
             
             if (data.success && data.chart) {
                 const canvas = document.getElementById(`saved-chart-${chartId}`);
@@ -800,6 +943,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 chartConfig = chartData.data;
             }
             
+            // Expand compact columnar payloads saved by /api/chart
+            if (typeof ChartManager !== 'undefined') {
+                chartConfig = ChartManager.expandPayload(chartConfig);
+            }
+            
             // Create chart instance
             canvas.chartInstance = new Chart(ctx, {
                 type: chartData.type,
@@ -907,6 +1055,7 @@ document.addEventListener('DOMContentLoaded', function() {
         // Reset UI components
         fileList.innerHTML = '';
         metricsGrid.innerHTML = '';
+        cancelInsights();
         aiInsightsContent.innerHTML = '<div class="empty-state">Upload and analyze data to see AI insights</div>';
         
         // Hide dashboard section
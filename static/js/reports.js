@@ -400,9 +400,21 @@ document.addEventListener('DOMContentLoaded', function() {
             const format = 'pdf'; // Set to PDF format
             
             try {
+                // PDF exports run as a background job; follow its progress, then download the file
+                const response = await fetch(`/api/reports/${reportId}/download?format=${format}&async=1`);
+                const data = await response.json();
+                if (response.status !== 202 || !data.success) {
+                    throw new Error(data.error || `Server returned ${response.status}`);
+                }
+                
+                const job = await waitForJob(data.status_url, (progress, message) => {
+                    const spinner = loadingIndicator.querySelector('.loading-spinner');
+                    spinner.innerHTML = `<i class="fas fa-spinner fa-spin"></i> ${message || 'Generating report...'} (${Math.round(progress * 100)}%)`;
+                });
+                
                 // Create a hidden anchor element to trigger the download
                 const downloadLink = document.createElement('a');
-                downloadLink.href = `/api/reports/${reportId}/download?format=${format}`;
+                downloadLink.href = job.download_url;
                 downloadLink.download = `report_${reportId}.pdf`;
                 document.body.appendChild(downloadLink);
                 downloadLink.click();
@@ -438,6 +450,28 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Poll a background job until it finishes, reporting its progress
+    async function waitForJob(statusUrl, onProgress) {
+        while (true) {
+            const response = await fetch(statusUrl);
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.error || 'Job not found');
+            }
+            
+            const job = data.job;
+            if (job.status === 'succeeded') {
+                return data;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Job failed');
+            }
+            
+            onProgress(job.progress, job.progress_message);
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+    
     // Download current report in modal
     function downloadCurrentReport() {
         const reportId = this.dataset ? this.dataset.reportId : null;
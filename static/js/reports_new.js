@@ -25,9 +25,14 @@ document.addEventListener('DOMContentLoaded', function() {
         },
         aiChat: [],
         reportContent: '',
-        uploadedFiles: [] // Track newly uploaded files
+        uploadedFiles: [], // Track newly uploaded files
+        availableCharts: [] // Saved charts loaded so far for selection
     };
     
+    // Paging positions of the reports list and the chart selection grid
+    const reportsPage = { nextCursor: null, newestCursor: null };
+    const chartsPage = { nextCursor: null };
+    
     // Initialize reports functionality
     initReports();
     
@@ -286,6 +291,26 @@ document.addEventListener('DOMContentLoaded', function() {
     window.loadReports = async function() {
         if (!reportsList) return;
         
+        // Once the list is loaded, only fetch the reports created since
+        if (reportsPage.newestCursor && reportsList.querySelector('.report-card')) {
+            try {
+                const response = await fetch(`/api/reports?since=${encodeURIComponent(reportsPage.newestCursor)}&limit=200`);
+                const data = await response.json();
+                
+                if (data.success && data.reports && !data.page.has_more) {
+                    reportsPage.newestCursor = data.page.newest_cursor;
+                    data.reports.slice().reverse().forEach(report => {
+                        reportsList.insertBefore(createReportCard(report), reportsList.firstChild);
+                    });
+                    loadFilesForReportCreation();
+                    loadChartsForReportCreation();
+                    return;
+                }
+            } catch (error) {
+                console.error('Error refreshing reports:', error);
+            }
+        }
+        
         reportsList.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i> Loading reports...</div>';
         
         try {
@@ -293,7 +318,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const data = await response.json();
             
             if (data.success && data.reports) {
-                displayReportsList(data.reports);
+                displayReportsList(data.reports, data.page);
                 
                 // Load file selection and available charts for report creation
                 loadFilesForReportCreation();
@@ -411,7 +436,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const data = await response.json();
             
             if (data.success && data.charts && data.charts.length > 0) {
-                displayChartSelection(data.charts);
+                displayChartSelection(data.charts, data.page);
             } else {
                 availableChartsGrid.innerHTML = `
                     <div class="empty-state">
@@ -426,9 +451,31 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Load the next page of older charts into the selection grid
+    async function loadMoreChartsForReportCreation(button) {
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+        
+        try {
+            const response = await fetch(`/api/charts/saved?cursor=${encodeURIComponent(chartsPage.nextCursor)}`);
+            const data = await response.json();
+            
+            if (!data.success) {
+                throw new Error(data.error || 'Failed to load charts');
+            }
+            button.remove();
+            appendChartSelection(data.charts, data.page);
+        } catch (error) {
+            console.error('Error loading more charts:', error);
+            button.disabled = false;
+            button.innerHTML = '<i class="fas fa-redo"></i> Retry';
+        }
+    }
+    
     // Display chart selection for report creation
-    function displayChartSelection(charts) {
+    function displayChartSelection(charts, page) {
         availableChartsGrid.innerHTML = '';
+        reportState.availableCharts = [];
         
         if (charts.length === 0) {
             availableChartsGrid.innerHTML = `
@@ -440,9 +487,19 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
+        appendChartSelection(charts, page);
+    }
+    
+    // Append a page of selectable charts, with a "Load more" button if older charts remain
+    function appendChartSelection(charts, page) {
+        reportState.availableCharts = reportState.availableCharts.concat(charts);
+        
         charts.forEach(chart => {
             const chartCard = document.createElement('div');
             chartCard.className = 'report-chart-card';
+            if (reportState.selectedCharts.includes(chart.id)) {
+                chartCard.classList.add('selected');
+            }
             chartCard.dataset.chartId = chart.id;
             chartCard.innerHTML = `
                 <div class="report-chart-preview">
@@ -466,16 +523,30 @@ document.addEventListener('DOMContentLoaded', function() {
                     // Select
                     this.classList.add('selected');
                     reportState.selectedCharts.push(chartId);
-                    updateSelectedChartsList(charts);
+                    updateSelectedChartsList();
                 }
             });
             
             availableChartsGrid.appendChild(chartCard);
         });
+        
+        chartsPage.nextCursor = page && page.has_more ? page.next_cursor : null;
+        if (chartsPage.nextCursor) {
+            availableChartsGrid.appendChild(createLoadMoreButton(loadMoreChartsForReportCreation));
+        }
+    }
+    
+    // Create a "Load more" button that calls loader(button) when clicked
+    function createLoadMoreButton(loader) {
+        const button = document.createElement('button');
+        button.className = 'load-more-btn';
+        button.innerHTML = '<i class="fas fa-chevron-down"></i> Load more';
+        button.addEventListener('click', () => loader(button));
+        return button;
     }
     
     // Update the selected charts pills display
-    function updateSelectedChartsList(allCharts) {
+    function updateSelectedChartsList(allCharts = reportState.availableCharts) {
         if (!selectedChartsGrid) return;
         
         if (reportState.selectedCharts.length === 0) {
@@ -815,8 +886,9 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Display reports list
-    function displayReportsList(reports) {
+    function displayReportsList(reports, page) {
         reportsList.innerHTML = '';
+        reportsPage.newestCursor = page ? page.newest_cursor : null;
         
         if (reports.length === 0) {
             reportsList.innerHTML = `
@@ -829,67 +901,101 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        reports.forEach(report => {
-            const card = document.createElement('div');
-            card.className = 'report-card';
+        appendReports(reports, page);
+    }
+    
+    // Append a page of reports, with a "Load more" button if older reports remain
+    function appendReports(reports, page) {
+        reports.forEach(report => reportsList.appendChild(createReportCard(report)));
+        
+        reportsPage.nextCursor = page && page.has_more ? page.next_cursor : null;
+        if (reportsPage.nextCursor) {
+            reportsList.appendChild(createLoadMoreButton(loadMoreReports));
+        }
+    }
+    
+    // Load the next page of older reports
+    async function loadMoreReports(button) {
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Loading...';
+        
+        try {
+            const response = await fetch(`/api/reports?cursor=${encodeURIComponent(reportsPage.nextCursor)}`);
+            const data = await response.json();
             
-            // Create chart tags HTML
-            let chartTagsHtml = '';
-            if (report.charts && report.charts.length > 0) {
-                const maxTagsToShow = 3;
-                const chartTags = report.charts.slice(0, maxTagsToShow).map(chart => 
-                    `<div class="report-chart-tag">${formatChartType(chart.type)}</div>`
-                ).join('');
-                
-                // Add indicator for additional charts
-                if (report.charts.length > maxTagsToShow) {
-                    chartTagsHtml = `
-                        ${chartTags}
-                        <div class="report-chart-tag">+${report.charts.length - maxTagsToShow} more</div>
-                    `;
-                } else {
-                    chartTagsHtml = chartTags;
-                }
+            if (!data.success) {
+                throw new Error(data.error || 'Failed to load reports');
             }
+            button.remove();
+            appendReports(data.reports, data.page);
+        } catch (error) {
+            console.error('Error loading more reports:', error);
+            button.disabled = false;
+            button.innerHTML = '<i class="fas fa-redo"></i> Retry';
+        }
+    }
+    
+    // Create the card of a report in the list
+    function createReportCard(report) {
+        const card = document.createElement('div');
+        card.className = 'report-card';
+        
+        // Create chart tags HTML
+        let chartTagsHtml = '';
+        if (report.charts && report.charts.length > 0) {
+            const maxTagsToShow = 3;
+            const chartTags = report.charts.slice(0, maxTagsToShow).map(chart => 
+                `<div class="report-chart-tag">${formatChartType(chart.type)}</div>`
+            ).join('');
             
-            card.innerHTML = `
-                <div class="report-header">
-                    <div class="report-title">${report.title}</div>
-                    <div class="report-date">${new Date(report.created_at).toLocaleDateString()}</div>
-                </div>
-                <div class="report-body">
-                    <div class="report-description">${report.description || 'No description provided'}</div>
-                    <div class="report-charts">
-                        ${chartTagsHtml}
-                    </div>
-                </div>
-                <div class="report-actions">
-                    <button class="report-action-btn view-report-btn" data-id="${report.id}">
-                        <i class="fas fa-eye"></i> View
-                    </button>
-                    <button class="report-action-btn download-report-btn" data-id="${report.id}">
-                        <i class="fas fa-download"></i> Download
-                    </button>
-                    <button class="report-action-btn delete-report-btn" data-id="${report.id}">
-                        <i class="fas fa-trash"></i> Delete
-                    </button>
+            // Add indicator for additional charts
+            if (report.charts.length > maxTagsToShow) {
+                chartTagsHtml = `
+                    ${chartTags}
+                    <div class="report-chart-tag">+${report.charts.length - maxTagsToShow} more</div>
+                `;
+            } else {
+                chartTagsHtml = chartTags;
+            }
+        }
+        
+        card.innerHTML = `
+            <div class="report-header">
+                <div class="report-title">${report.title}</div>
+                <div class="report-date">${new Date(report.created_at).toLocaleDateString()}</div>
+            </div>
+            <div class="report-body">
+                <div class="report-description">${report.description || 'No description provided'}</div>
+                <div class="report-charts">
+                    ${chartTagsHtml}
                 </div>
-            `;
-            reportsList.appendChild(card);
-            
-            // Add event listeners
-            card.querySelector('.view-report-btn').addEventListener('click', () => {
-                viewReport(report.id);
-            });
-            
-            card.querySelector('.download-report-btn').addEventListener('click', () => {
-                downloadReport(report.id);
-            });
-            
-            card.querySelector('.delete-report-btn').addEventListener('click', () => {
-                deleteReport(report.id, card);
-            });
+            </div>
+            <div class="report-actions">
+                <button class="report-action-btn view-report-btn" data-id="${report.id}">
+                    <i class="fas fa-eye"></i> View
+                </button>
+                <button class="report-action-btn download-report-btn" data-id="${report.id}">
+                    <i class="fas fa-download"></i> Download
+                </button>
+                <button class="report-action-btn delete-report-btn" data-id="${report.id}">
+                    <i class="fas fa-trash"></i> Delete
+                </button>
+            </div>
+        `;
+        
+        // Add event listeners
+        card.querySelector('.view-report-btn').addEventListener('click', () => {
+            viewReport(report.id);
+        });
+        
+        card.querySelector('.download-report-btn').addEventListener('click', () => {
+            downloadReport(report.id);
         });
+        
+        card.querySelector('.delete-report-btn').addEventListener('click', () => {
+            deleteReport(report.id, card);
+        });
+        return card;
     }
     
     // View report
@@ -1036,6 +1142,11 @@ document.addEventListener('DOMContentLoaded', function() {
     function renderReportChart(canvas, chartData) {
         if (!canvas || !chartData || !chartData.data) return;
         
+        // Expand compact columnar payloads saved by /api/chart
+        if (typeof ChartManager !== 'undefined') {
+            chartData = { ...chartData, data: ChartManager.expandPayload(chartData.data) };
+        }
+        
         const ctx = canvas.getContext('2d');
         
         try {
@@ -1106,7 +1217,11 @@ document.addEventListener('DOMContentLoaded', function() {
             `;
             document.body.appendChild(loadingOverlay);
             
-            const response = await fetch(`/api/reports/${reportId}/download?format=pdf`);
+            // The PDF is produced by a background job; follow its progress, then fetch the file
+            const response = await fetchReportPdf(reportId, (progress, message) => {
+                loadingOverlay.querySelector('p').textContent =
+                    `${message || 'Generating report PDF...'} (${Math.round(progress * 100)}%)`;
+            });
             
             if (!response.ok) {
                 let errorMessage = 'Failed to download report';
@@ -1151,6 +1266,35 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // Queue a report PDF export and return the response for the finished file
+    async function fetchReportPdf(reportId, onProgress) {
+        const queued = await fetch(`/api/reports/${reportId}/download?format=pdf&async=1`);
+        if (queued.status !== 202) {
+            // Errors (or a server without background jobs) come back directly
+            return queued;
+        }
+        
+        const { status_url: statusUrl } = await queued.json();
+        while (true) {
+            const statusResponse = await fetch(statusUrl);
+            const data = await statusResponse.json();
+            if (!data.success) {
+                throw new Error(data.error || 'Export job not found');
+            }
+            
+            const job = data.job;
+            if (job.status === 'succeeded') {
+                return fetch(data.download_url);
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Failed to generate report PDF');
+            }
+            
+            onProgress(job.progress, job.progress_message);
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+    
     // Download current report from modal
     function downloadCurrentReport() {
         const reportId = this.dataset.reportId;
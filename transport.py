@@ -0,0 +1,204 @@
+import gzip
+import hashlib
+import logging
+import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+from flask import current_app, request, make_response
+
+# Optional binary encoder - JSON is always available as a fallback
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Optional compression - gzip is always available as a fallback
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Bodies smaller than this are sent uncompressed; the saving would not cover the overhead
+MIN_COMPRESS_SIZE = 1024
+
+# Response types worth compressing (binary chart encodings still compress well)
+COMPRESSIBLE_MIMETYPES = {JSON_MIMETYPE, MSGPACK_MIMETYPE,
+                          'text/html', 'text/plain', 'text/css', 'text/javascript', 'application/javascript'}
+
+
+def available_mimetypes():
+    """
+    Get the response mimetypes supported by this server, JSON first.
+
+    Returns:
+        List of mimetype strings
+    """
+    mimetypes = [JSON_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    return mimetypes
+
+
+def plain_value(value: Any) -> Any:
+    """
+    Convert a value that JSON and MessagePack can't encode natively.
+
+    Both encodings use this, so a payload decodes to the same data whichever
+    the client asked for.
+
+    Args:
+        value: Value found in a payload
+
+    Returns:
+        Equivalent built-in value
+
+    Raises:
+        TypeError: If the value has no equivalent
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    # Also covers pandas Timestamps
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    # Decimal, UUID and dataclasses as Flask encodes them; TypeError for anything else
+    return current_app.json.default(value)
+
+
+def encode_json(payload: Dict[str, Any]) -> bytes:
+    """
+    Encode a payload as JSON, like ``jsonify`` but converting values with ``plain_value``.
+
+    Args:
+        payload: Payload
+
+    Returns:
+        Encoded bytes
+    """
+    return (current_app.json.dumps(payload, default=plain_value) + "\n").encode('utf-8')
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    """
+    Encode a payload as MessagePack.
+
+    Args:
+        payload: Payload
+
+    Returns:
+        Encoded bytes
+    """
+    return msgpack.packb(payload, use_bin_type=True, default=plain_value)
+
+
+def negotiated_response(payload: Dict[str, Any], status: int = 200, mimetype: Optional[str] = None):
+    """
+    Build a response for a payload using the encoding the client prefers.
+
+    Clients opt into MessagePack through the ``Accept`` header
+    (``application/msgpack``); everything else gets JSON. If MessagePack
+    encoding fails the payload is sent as JSON instead.
+
+    Args:
+        payload: JSON-compatible payload
+        status: HTTP status code
+        mimetype: Force a mimetype instead of negotiating
+
+    Returns:
+        Flask response
+    """
+    mimetype = mimetype or request.accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIMETYPE)
+
+    body = None
+    if mimetype == MSGPACK_MIMETYPE and msgpack is not None:
+        try:
+            body = encode_msgpack(payload)
+        except Exception as e:
+            logger.warning(f"MessagePack encoding failed, falling back to JSON: {str(e)}")
+
+    if body is None:
+        body, mimetype = encode_json(payload), JSON_MIMETYPE
+    response = make_response(body)
+    response.headers['Content-Type'] = mimetype
+
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
+
+
+def negotiated_encoding() -> Optional[str]:
+    """
+    Pick the content encoding for the current request from ``Accept-Encoding``.
+
+    Returns:
+        ``'br'`` (if brotli is installed), ``'gzip'``, or None for identity
+    """
+    encodings = ['gzip'] if brotli is None else ['br', 'gzip']
+    best = request.accept_encodings.best_match(encodings)
+    return best if best and request.accept_encodings[best] else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with ``br`` or ``gzip``."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def optimize_response(response):
+    """
+    Add a strong ETag to a response and compress it for the client.
+
+    Meant for ``after_request``. Only GET and HEAD responses get an ETag: a
+    hash of the uncompressed body tagged with the chosen encoding, so each
+    representation has its own validator, and requests whose
+    ``If-None-Match`` matches get a 304 with no body. POST responses (chart
+    and analysis requests) can't be revalidated, so their bodies are not
+    hashed. Bodies of at least MIN_COMPRESS_SIZE bytes are gzip or brotli
+    encoded.
+
+    Streamed and file responses, error responses and responses that are
+    already encoded are passed through unchanged.
+
+    Args:
+        response: Flask response
+
+    Returns:
+        The same response, or a 304 Not Modified response
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    try:
+        body = response.get_data()
+        encoding = negotiated_encoding() if len(body) >= MIN_COMPRESS_SIZE else None
+        response.vary.add('Accept-Encoding')
+
+        if request.method in ('GET', 'HEAD'):
+            digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            response.set_etag(f"{digest}-{encoding}" if encoding else digest)
+            if not response.cache_control.no_store:
+                # Let browsers keep the body but revalidate it on every use
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if encoding:
+            response.set_data(compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+
+    except Exception as e:
+        logger.warning(f"Could not optimize response, sending it unchanged: {str(e)}")
+
+    return response
@@ -7,18 +7,66 @@ import traceback
 import time
 from typing import Dict, Any, List, Optional, Union
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+from aggregation import AggregationCube, get_cube
+from correlation import build_heatmap
+from distribution import ColumnDistributions, get_distributions
+from dataset_cache import load_cached_dataframe
+
 logger = logging.getLogger(__name__)
 
 class DataVisualizer:
     """Class for generating visualizations from data files."""
 
+    # Dataset colors for multi-series charts
+    CHART_PALETTE = [
+        "rgba(168, 85, 247, 0.7)",
+        "rgba(79, 209, 197, 0.7)",
+        "rgba(245, 158, 11, 0.7)",
+        "rgba(239, 68, 68, 0.7)",
+        "rgba(16, 185, 129, 0.7)",
+        "rgba(59, 130, 246, 0.7)",
+        "rgba(236, 72, 153, 0.7)",
+        "rgba(124, 58, 237, 0.7)"
+    ]
+
+    # Default point budgets for parameterized charts (categories for bar/pie, points otherwise)
+    DEFAULT_POINT_BUDGETS = {
+        "bar": 20,
+        "pie": 8,
+        "line": 200,
+        "scatter": 500,
+        "bubble": 200,
+        "histogram": 30
+    }
+
+    # Aggregations the cube can answer directly
+    CUBE_AGGREGATIONS = {"count", "sum", "mean", "min", "max"}
+
+    FILTER_OPERATORS = {"eq", "ne", "gt", "gte", "lt", "lte", "in", "not_in", "between", "contains"}
+
     def __init__(self):
         """Initialize the DataVisualizer."""
         logger.info("DataVisualizer initialized")
 
+    # Chart generators by chart id, in the order the dashboard lists them
+    CHART_GENERATORS = {
+        "line_chart": "generate_line_chart",
+        "bar_chart": "generate_bar_chart",
+        "pie_chart": "generate_pie_chart",
+        "histogram": "generate_histogram",
+        "scatter_plot": "generate_scatter_plot",
+        "box_plot": "generate_box_plot",
+        "radar_chart": "generate_radar_chart",
+        "bubble_chart": "generate_bubble_chart",
+        "heatmap": "generate_heatmap"
+    }
+
+    # Generators that accept a pre-built aggregation cube
+    CUBE_CHARTS = {"bar_chart", "pie_chart", "radar_chart"}
+
+    # Generators that accept pre-computed distribution statistics
+    DISTRIBUTION_CHARTS = {"histogram", "box_plot"}
+
     def generate_visualizations(self, data_files: List[str], combine_files: bool = False) -> Dict[str, Any]:
         """
         Generate visualizations from a list of data files.
@@ -31,66 +79,22 @@ class DataVisualizer:
             Dict containing visualization data
         """
         try:
-            if not data_files:
-                logger.warning("No data files provided")
-                return {"error": "No data files provided"}
-                
-            logger.info(f"Generating visualizations for {len(data_files)} files (combine_files={combine_files})")
-            logger.debug(f"Files to process: {[os.path.basename(f) for f in data_files]}")
-
             if combine_files and len(data_files) > 1:
-                logger.info(f"Generating visualizations for {len(data_files)} combined files")
-                
-                # Load and combine all dataframes
-                dfs = []
-                for file_path in data_files:
-                    file_name = os.path.basename(file_path)
-                    logger.debug(f"Loading file for combined analysis: {file_name}")
-                    df = self._load_file(file_path)
-                    if df is not None:
-                        # Add source column
-                        df['_source_file'] = file_name
-                        dfs.append(df)
-                        logger.debug(f"Added file {file_name} with shape {df.shape} to combined analysis")
-                    else:
-                        logger.warning(f"Failed to load file {file_name} for combined analysis")
-                
-                if not dfs:
-                    logger.error("Failed to load any files for visualization")
-                    return {"error": "Failed to load any files"}
-                
-                # Combine all dataframes
-                try:
-                    df = pd.concat(dfs, ignore_index=True)
-                    logger.info(f"Combined {len(dfs)} files into dataframe with shape {df.shape}")
-                except Exception as e:
-                    logger.error(f"Error combining dataframes: {str(e)}")
-                    # Fall back to first file
-                    df = dfs[0]
-                    logger.warning(f"Falling back to first file with shape {df.shape}")
-            else:
-                # Just process the file(s) provided
-                file_to_process = data_files[0]  # Start with the first file by default
-                file_name = os.path.basename(file_to_process)
-                logger.info(f"Generating visualizations for single file: {file_name}")
+                # Imported here because the combined engine builds on this class
+                from combined_visualization import CombinedVisualizer
+                return CombinedVisualizer(self).generate_visualizations(data_files)
+
+            df = self.load_visualization_frame(data_files)
 
-                # Load the dataframe
-                df = self._load_file(file_to_process)
-                if df is None:
-                    logger.error(f"Failed to load file {file_name} for visualization")
-                    return {"error": f"Failed to load file {file_name}"}
+            # Categorical charts are all answered from one aggregation cube,
+            # distribution charts from one pass over the numeric columns
+            cube = get_cube(df, file_path=data_files[0])
+            distributions = get_distributions(df, file_path=data_files[0])
 
             # Generate visualizations
             visualizations = {
-                "line_chart": self.generate_line_chart(df),
-                "bar_chart": self.generate_bar_chart(df),
-                "pie_chart": self.generate_pie_chart(df),
-                "histogram": self.generate_histogram(df),
-                "scatter_plot": self.generate_scatter_plot(df),
-                "heatmap": self.generate_heatmap(df),
-                "box_plot": self.generate_box_plot(df),
-                "radar_chart": self.generate_radar_chart(df),
-                "bubble_chart": self.generate_bubble_chart(df)
+                chart_type: self.generate_chart(df, chart_type, cube=cube, distributions=distributions)
+                for chart_type in self.CHART_GENERATORS
             }
 
             logger.info(f"Generated {len(visualizations)} visualizations")
@@ -101,6 +105,65 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
+    def load_visualization_frame(self, data_files: List[str]) -> pd.DataFrame:
+        """
+        Load the dataframe that single-file visualizations are generated from.
+
+        Combined selections never build one frame; see ``combined_visualization``.
+        Parsed files are shared through the dataset cache, so the returned
+        frame must not be modified in place.
+
+        Args:
+            data_files: List of paths to data files (the first one is used)
+
+        Returns:
+            Pandas DataFrame
+
+        Raises:
+            ValueError: If no file could be loaded
+        """
+        if not data_files:
+            logger.warning("No data files provided")
+            raise ValueError("No data files provided")
+
+        logger.debug("Files to process: %s", [os.path.basename(f) for f in data_files])
+
+        # Just process the file(s) provided
+        file_to_process = data_files[0]  # Start with the first file by default
+        file_name = os.path.basename(file_to_process)
+        logger.info(f"Generating visualizations for single file: {file_name}")
+
+        # Load the dataframe
+        df = load_cached_dataframe(file_to_process, self._load_file)
+        if df is None:
+            logger.error(f"Failed to load file {file_name} for visualization")
+            raise ValueError(f"Failed to load file {file_name}")
+        return df
+
+    def generate_chart(self, df: pd.DataFrame, chart_type: str, cube: Optional[AggregationCube] = None,
+                       distributions: Optional[ColumnDistributions] = None) -> Dict[str, Any]:
+        """
+        Generate data for a single chart type.
+
+        Args:
+            df: Pandas DataFrame
+            chart_type: Chart id, e.g. ``bar_chart``
+            cube: Optional pre-built aggregation cube for the dataframe
+            distributions: Optional pre-computed distribution statistics for the dataframe
+
+        Returns:
+            Dict with chart data
+        """
+        if chart_type not in self.CHART_GENERATORS:
+            return {"error": f"Unsupported chart type: {chart_type}"}
+
+        generator = getattr(self, self.CHART_GENERATORS[chart_type])
+        if chart_type in self.CUBE_CHARTS:
+            return generator(df, cube=cube)
+        if chart_type in self.DISTRIBUTION_CHARTS:
+            return generator(df, distributions=distributions)
+        return generator(df)
+
     def _load_file(self, file_path: str) -> Optional[pd.DataFrame]:
         """
         Load a file into a pandas DataFrame.
@@ -131,14 +194,14 @@ class DataVisualizer:
                                 
                             # Check if file might be tab-delimited
                             if b'\t' in sample:
-                                logger.debug(f"Detected tab delimiter in {os.path.basename(file_path)}")
+                                logger.debug("Detected tab delimiter in %s", os.path.basename(file_path))
                                 df = pd.read_csv(file_path, encoding=encoding, sep='\t', on_bad_lines='skip')
                             else:
                                 df = pd.read_csv(file_path, encoding=encoding, on_bad_lines='skip')
                             
                             # Check if we have a reasonable number of columns
                             if df.shape[1] <= 1 and ',' in str(sample):
-                                logger.debug(f"Single column detected, trying comma delimiter for {os.path.basename(file_path)}")
+                                logger.debug("Single column detected, trying comma delimiter for %s", os.path.basename(file_path))
                                 df = pd.read_csv(file_path, encoding=encoding, sep=',', on_bad_lines='skip')
                                 
                             # Check if we need to try more delimiters for proper column detection
@@ -147,12 +210,12 @@ class DataVisualizer:
                                     try:
                                         test_df = pd.read_csv(file_path, encoding=encoding, sep=sep, on_bad_lines='skip')
                                         if test_df.shape[1] > df.shape[1]:
-                                            logger.debug(f"Found better delimiter '{sep}' with {test_df.shape[1]} columns")
+                                            logger.debug("Found better delimiter '%s' with %s columns", sep, test_df.shape[1])
                                             df = test_df
                                     except:
                                         continue
                             
-                            logger.debug(f"Successfully loaded with encoding {encoding}, shape: {df.shape}")
+                            logger.debug("Successfully loaded with encoding %s, shape: %s", encoding, df.shape)
                             break
                         except UnicodeDecodeError:
                             continue
@@ -160,7 +223,7 @@ class DataVisualizer:
                             logger.warning(f"Error with encoding {encoding}: {str(e)}")
                     else:
                         # If all standard approaches fail, try with engine='python' which is more flexible
-                        logger.debug(f"Trying python engine for {os.path.basename(file_path)}")
+                        logger.debug("Trying python engine for %s", os.path.basename(file_path))
                         df = pd.read_csv(file_path, encoding='latin1', engine='python', on_bad_lines='skip')
                         
                 except Exception as csv_err:
@@ -205,7 +268,7 @@ class DataVisualizer:
                     
                     # Check if we have a reasonable number of columns (at least 2)
                     if df.shape[1] <= 1:
-                        logger.debug(f"Only {df.shape[1]} columns detected, trying alternative delimiters")
+                        logger.debug("Only %s columns detected, trying alternative delimiters", df.shape[1])
                         best_df = df
                         
                         # Try common delimiters
@@ -213,7 +276,7 @@ class DataVisualizer:
                             try:
                                 test_df = pd.read_csv(file_path, sep=sep, on_bad_lines='skip')
                                 if test_df.shape[1] > best_df.shape[1]:
-                                    logger.debug(f"Found better delimiter '{sep}' with {test_df.shape[1]} columns")
+                                    logger.debug("Found better delimiter '%s' with %s columns", sep, test_df.shape[1])
                                     best_df = test_df
                             except:
                                 continue
@@ -278,7 +341,8 @@ class DataVisualizer:
             numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
 
             if not datetime_cols and not numeric_cols:
-                # Try to convert potential date columns
+                # Try to convert potential date columns (on a copy, the frame may be shared)
+                df = df.copy()
                 for col in df.columns:
                     if 'date' in col.lower() or 'time' in col.lower():
                         try:
@@ -342,12 +406,13 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
-    def generate_bar_chart(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_bar_chart(self, df: pd.DataFrame, cube: Optional[AggregationCube] = None) -> Dict[str, Any]:
         """
         Generate data for a bar chart from a dataframe.
 
         Args:
             df: Pandas DataFrame
+            cube: Optional pre-built aggregation cube for the dataframe
 
         Returns:
             Dict with bar chart data
@@ -361,17 +426,20 @@ class DataVisualizer:
                 num_col = numeric_cols[0]
 
                 # Aggregate data by category
-                grouped = df.groupby(cat_col)[num_col].mean().reset_index()
+                if cube is not None and cube.has(cat_col, num_col):
+                    grouped = cube.aggregate(cat_col, num_col, 'mean')
+                else:
+                    grouped = df.groupby(cat_col)[num_col].mean()
 
                 # Sort by value and get top 10
-                grouped = grouped.sort_values(by=num_col, ascending=False).head(10)
+                grouped = grouped.sort_values(ascending=False).head(10)
 
                 return {
                     "type": "bar",
-                    "labels": grouped[cat_col].tolist(),
+                    "labels": grouped.index.tolist(),
                     "datasets": [{
                         "label": f"Average {num_col} by {cat_col}",
-                        "data": grouped[num_col].tolist(),
+                        "data": grouped.tolist(),
                         "backgroundColor": "rgba(168, 85, 247, 0.7)",
                         "borderColor": "#7928ca",
                         "borderWidth": 1
@@ -386,12 +454,13 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
-    def generate_pie_chart(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_pie_chart(self, df: pd.DataFrame, cube: Optional[AggregationCube] = None) -> Dict[str, Any]:
         """
         Generate data for a pie chart from a dataframe.
 
         Args:
             df: Pandas DataFrame
+            cube: Optional pre-built aggregation cube for the dataframe
 
         Returns:
             Dict with pie chart data
@@ -403,7 +472,10 @@ class DataVisualizer:
                 cat_col = categorical_cols[0]
 
                 # Get value counts
-                value_counts = df[cat_col].value_counts()
+                if cube is not None and cube.has(cat_col):
+                    value_counts = cube.counts(cat_col)
+                else:
+                    value_counts = df[cat_col].value_counts()
 
                 # Limit to top 8 categories
                 if len(value_counts) > 8:
@@ -442,24 +514,30 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
-    def generate_histogram(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_histogram(self, df: pd.DataFrame, distributions: Optional[ColumnDistributions] = None,
+                           column: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate data for a histogram from a dataframe.
 
         Args:
             df: Pandas DataFrame
+            distributions: Optional pre-computed distribution statistics for the dataframe
+            column: Numeric column to plot (defaults to the first one)
 
         Returns:
             Dict with histogram data
         """
         try:
-            numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+            distributions = distributions or get_distributions(df)
+            numeric_cols = distributions.columns_with_data()
 
             if numeric_cols:
-                num_col = numeric_cols[0]
+                if column is not None and column not in numeric_cols:
+                    return {"error": f"Column {column} has no numeric values"}
+                num_col = column or numeric_cols[0]
 
-                # Create histogram
-                hist, bin_edges = np.histogram(df[num_col].dropna(), bins=10)
+                # Freedman-Diaconis bins from the shared distribution pass
+                hist, bin_edges = distributions.histogram(num_col)
 
                 # Create bin labels
                 bin_labels = [f"{bin_edges[i]:.1f}-{bin_edges[i+1]:.1f}" for i in range(len(bin_edges)-1)]
@@ -528,12 +606,19 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
-    def generate_heatmap(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_heatmap(self, df: pd.DataFrame, max_columns: int = 20,
+                         tile_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Generate data for a correlation heatmap from a dataframe.
 
+        Correlations are computed over every numeric column; the displayed
+        matrix is limited to ``max_columns`` columns in clustered order, and the
+        strongest pairs are listed in ``top_pairs``.
+
         Args:
             df: Pandas DataFrame
+            max_columns: Maximum columns in the displayed matrix
+            tile_size: If set, also return the matrix split into square tiles
 
         Returns:
             Dict with heatmap data
@@ -542,31 +627,7 @@ class DataVisualizer:
             numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
 
             if len(numeric_cols) >= 2:
-                # Limit to 8 columns for readability
-                selected_cols = numeric_cols[:8]
-
-                # Calculate correlation matrix
-                corr_matrix = df[selected_cols].corr().round(2)
-
-                # Prepare data for heatmap
-                labels = selected_cols
-                datasets = []
-
-                for i, row_label in enumerate(labels):
-                    data = []
-                    for j, col_label in enumerate(labels):
-                        data.append({
-                            "x": col_label,
-                            "y": row_label,
-                            "v": float(corr_matrix.iloc[i, j])
-                        })
-                    datasets.extend(data)
-
-                return {
-                    "type": "heatmap",
-                    "labels": labels,
-                    "datasets": datasets
-                }
+                return build_heatmap(df, max_columns=max_columns, tile_size=tile_size)
             else:
                 logger.warning("Not enough numeric columns for heatmap")
                 return {"error": "Not enough numeric columns for heatmap"}
@@ -576,53 +637,33 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
-    def generate_box_plot(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_box_plot(self, df: pd.DataFrame, distributions: Optional[ColumnDistributions] = None) -> Dict[str, Any]:
         """
         Generate data for a box plot from a dataframe.
 
         Args:
             df: Pandas DataFrame
+            distributions: Optional pre-computed distribution statistics for the dataframe
 
         Returns:
             Dict with box plot data
         """
         try:
-            numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+            distributions = distributions or get_distributions(df)
+            numeric_cols = distributions.columns_with_data()
 
             if numeric_cols:
                 # Limit to first 5 numeric columns
                 selected_cols = numeric_cols[:5]
-                
-                datasets = []
-                
-                for col in selected_cols:
-                    # Calculate box plot values
-                    data = df[col].dropna()
-                    q1 = float(data.quantile(0.25))
-                    median = float(data.median())
-                    q3 = float(data.quantile(0.75))
-                    iqr = q3 - q1
-                    whisker_bottom = float(max(data.min(), q1 - 1.5 * iqr))
-                    whisker_top = float(min(data.max(), q3 + 1.5 * iqr))
-                    
-                    # Define outliers
-                    outliers = data[(data < whisker_bottom) | (data > whisker_top)].tolist()
-                    
-                    datasets.append({
-                        "label": col,
-                        "data": [{
-                            "min": whisker_bottom,
-                            "q1": q1,
-                            "median": median,
-                            "q3": q3,
-                            "max": whisker_top,
-                            "outliers": outliers[:20] if outliers else []  # Limit outliers to 20 points
-                        }],
-                        "backgroundColor": "rgba(168, 85, 247, 0.5)",
-                        "borderColor": "rgba(121, 40, 202, 0.8)",
-                        "borderWidth": 1
-                    })
-                
+
+                datasets = [{
+                    "label": col,
+                    "data": [distributions.box(col)],
+                    "backgroundColor": "rgba(168, 85, 247, 0.5)",
+                    "borderColor": "rgba(121, 40, 202, 0.8)",
+                    "borderWidth": 1
+                } for col in selected_cols]
+
                 return {
                     "type": "boxplot",
                     "labels": [""],  # Single label as we're showing multiple columns
@@ -637,12 +678,13 @@ class DataVisualizer:
             logger.error(traceback.format_exc())
             return {"error": str(e)}
 
-    def generate_radar_chart(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_radar_chart(self, df: pd.DataFrame, cube: Optional[AggregationCube] = None) -> Dict[str, Any]:
         """
         Generate data for a radar chart from a dataframe.
 
         Args:
             df: Pandas DataFrame
+            cube: Optional pre-built aggregation cube for the dataframe
 
         Returns:
             Dict with radar chart data
@@ -656,8 +698,15 @@ class DataVisualizer:
                 # Limit to first 5 numeric columns
                 selected_numeric_cols = numeric_cols[:5]
                 
+                # Per-category means for all selected columns in one pass
+                if cube is None or not cube.has(cat_col):
+                    cube = AggregationCube.from_dataframe(df[[cat_col] + selected_numeric_cols], max_cardinality=len(df))
+                
                 # Get top 3 categories
-                top_categories = df[cat_col].value_counts().head(3).index.tolist()
+                top_categories = cube.counts(cat_col).head(3).index.tolist()
+                category_means = {
+                    col: cube.aggregate(cat_col, col, 'mean') for col in selected_numeric_cols
+                }
                 
                 datasets = []
                 bg_colors = [
@@ -673,10 +722,8 @@ class DataVisualizer:
                 
                 # For each category, create a dataset
                 for i, category in enumerate(top_categories):
-                    category_data = df[df[cat_col] == category]
-                    
-                    # Calculate mean for each numeric column
-                    means = [float(category_data[col].mean()) for col in selected_numeric_cols]
+                    # Mean of each numeric column for this category
+                    means = [float(category_means[col][category]) for col in selected_numeric_cols]
                     
                     datasets.append({
                         "label": str(category),
@@ -760,3 +807,512 @@ class DataVisualizer:
             logger.error(f"Error generating bubble chart: {str(e)}")
             logger.error(traceback.format_exc())
             return {"error": str(e)}
+
+    def generate_custom_chart(self, df: pd.DataFrame, spec: Dict[str, Any],
+                              cube: Optional[AggregationCube] = None) -> Dict[str, Any]:
+        """
+        Generate chart data for user-chosen columns and aggregation.
+
+        Args:
+            df: Pandas DataFrame (treated as read-only)
+            spec: Chart spec with keys ``chart_type`` (bar, pie, line, scatter,
+                bubble or histogram), ``x``, ``y``, ``group``, ``size``,
+                ``aggregation`` (sum, mean, median, count, min, max or pXX),
+                ``filters`` (list of ``{"column", "op", "value"}``) and
+                ``max_points``
+            cube: Optional aggregation cube, used when no filters are applied
+
+        Returns:
+            Dict with chart data
+
+        Raises:
+            ValueError: If the spec references unknown columns or options
+        """
+        chart_type = str(spec.get("chart_type", "bar")).replace("_chart", "").replace("_plot", "")
+        if chart_type not in self.DEFAULT_POINT_BUDGETS:
+            raise ValueError(f"Unsupported chart type for custom chart: {spec.get('chart_type')}")
+
+        x_col = spec.get("x")
+        y_col = spec.get("y")
+        group_col = spec.get("group")
+        size_col = spec.get("size")
+        aggregation = str(spec.get("aggregation") or ("count" if not y_col else "mean")).lower()
+        filters = spec.get("filters") or []
+
+        for col in (x_col, y_col, group_col, size_col):
+            if col is not None and col not in df.columns:
+                raise ValueError(f"Unknown column: {col}")
+        if x_col is None:
+            raise ValueError("An x column is required")
+        # Every aggregation but count, min and max needs numbers
+        if (y_col is not None and chart_type in ("bar", "pie", "line")
+                and aggregation not in ("count", "min", "max")
+                and not pd.api.types.is_numeric_dtype(df[y_col])):
+            raise ValueError(f"Column {y_col} is not numeric")
+
+        try:
+            max_points = int(spec.get("max_points") or self.DEFAULT_POINT_BUDGETS[chart_type])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid max_points: {spec.get('max_points')}")
+        max_points = max(1, min(max_points, 5000))
+
+        # Filters force a pass over the rows; otherwise the cube may answer directly
+        if filters:
+            df = df[self._filter_mask(df, filters)]
+            cube = None
+
+        if chart_type in ("bar", "pie", "line"):
+            return self._custom_grouped_chart(df, chart_type, x_col, y_col, group_col, aggregation, max_points, cube)
+        if chart_type == "histogram":
+            return self._custom_histogram(df, x_col, group_col, max_points)
+        return self._custom_point_chart(df, chart_type, x_col, y_col, group_col, size_col, max_points)
+
+    def _filter_mask(self, df: pd.DataFrame, filters: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Build a boolean row mask from a list of filters.
+
+        Args:
+            df: Pandas DataFrame
+            filters: List of ``{"column", "op", "value"}`` dicts, combined with AND
+
+        Returns:
+            Boolean numpy array
+        """
+        mask = np.ones(len(df), dtype=bool)
+        for flt in filters:
+            col = flt.get("column")
+            op = flt.get("op", "eq")
+            value = flt.get("value")
+            if col not in df.columns:
+                raise ValueError(f"Unknown filter column: {col}")
+            if op not in self.FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator: {op}")
+
+            series = df[col]
+            if op in ("in", "not_in"):
+                value = value if isinstance(value, (list, tuple)) else [value]
+            elif op == "between" and (not isinstance(value, (list, tuple)) or len(value) != 2):
+                raise ValueError("The between filter needs a [low, high] value")
+            if op != "contains":
+                if isinstance(value, (list, tuple)):
+                    value = [self._filter_value(series, col, v) for v in value]
+                else:
+                    value = self._filter_value(series, col, value)
+
+            try:
+                if op == "eq":
+                    cond = series == value
+                elif op == "ne":
+                    cond = series != value
+                elif op == "gt":
+                    cond = series > value
+                elif op == "gte":
+                    cond = series >= value
+                elif op == "lt":
+                    cond = series < value
+                elif op == "lte":
+                    cond = series <= value
+                elif op in ("in", "not_in"):
+                    cond = series.isin(value)
+                    if op == "not_in":
+                        cond = ~cond
+                elif op == "between":
+                    cond = series.between(value[0], value[1])
+                else:
+                    cond = series.astype(str).str.contains(str(value), case=False, regex=False)
+            except TypeError:
+                # Object columns holding mixed types can't be ordered against the value
+                raise ValueError(f"Filter {op} {value!r} does not apply to the values of column {col}")
+
+            mask &= cond.fillna(False).to_numpy(dtype=bool)
+        return mask
+
+    @staticmethod
+    def _filter_value(series: pd.Series, col: str, value: Any) -> Any:
+        """
+        Convert a filter value to the type of the column it is compared with.
+
+        Args:
+            series: Filtered column
+            col: Column name, for error messages
+            value: Value from the request
+
+        Returns:
+            Timestamp or number for datetime and numeric columns, otherwise the value unchanged
+
+        Raises:
+            ValueError: If the value can't be converted
+        """
+        if value is None:
+            return value
+        try:
+            if pd.api.types.is_datetime64_any_dtype(series):
+                return pd.Timestamp(value)
+            if pd.api.types.is_bool_dtype(series):
+                if isinstance(value, bool):
+                    return value
+                raise ValueError
+            if pd.api.types.is_numeric_dtype(series):
+                if isinstance(value, bool):
+                    raise ValueError
+                return float(value)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Filter value {value!r} does not match the type of column {col}")
+        return value
+
+    def _aggregate_series(self, grouped, aggregation: str) -> pd.Series:
+        """
+        Apply a named aggregation to a grouped series.
+
+        Args:
+            grouped: pandas SeriesGroupBy
+            aggregation: sum, mean, median, count, min, max or pXX (percentile)
+
+        Returns:
+            Aggregated Series
+        """
+        if aggregation in ("sum", "mean", "median", "count", "min", "max"):
+            return getattr(grouped, aggregation)()
+        if aggregation.startswith("p"):
+            try:
+                percentile = float(aggregation[1:])
+            except ValueError:
+                percentile = None
+            if percentile is not None and 0 <= percentile <= 100:
+                return grouped.quantile(percentile / 100)
+        raise ValueError(f"Unsupported aggregation: {aggregation}")
+
+    def _custom_grouped_chart(self, df: pd.DataFrame, chart_type: str, x_col: str, y_col: Optional[str],
+                              group_col: Optional[str], aggregation: str, max_points: int,
+                              cube: Optional[AggregationCube]) -> Dict[str, Any]:
+        """Build a bar, pie or line chart of an aggregate of y per x (and group)."""
+        agg_label = aggregation.upper() if aggregation.startswith("p") else aggregation.title()
+        value_label = f"{agg_label} of {y_col}" if y_col else "Count"
+
+        if group_col and chart_type != "pie":
+            # One dataset per group value, aligned on x
+            if y_col:
+                grouped = self._aggregate_series(df.groupby([x_col, group_col], observed=True)[y_col], aggregation)
+            else:
+                grouped = df.groupby([x_col, group_col], observed=True).size()
+            table = grouped.unstack(group_col)
+
+            # Keep the largest groups so the legend stays readable
+            group_order = table.abs().sum().sort_values(ascending=False).index[:len(self.CHART_PALETTE)]
+            table = table[group_order]
+            if chart_type == "line":
+                table = table.sort_index()
+                if len(table) > max_points:
+                    step = len(table) // max_points + 1
+                    table = table.iloc[::step]
+            else:
+                table = table.loc[table.abs().sum(axis=1).sort_values(ascending=False).index[:max_points]]
+
+            datasets = []
+            for i, group in enumerate(table.columns):
+                color = self.CHART_PALETTE[i % len(self.CHART_PALETTE)]
+                datasets.append({
+                    "label": f"{value_label} ({group})",
+                    "data": [None if pd.isna(v) else float(v) for v in table[group]],
+                    "backgroundColor": color,
+                    "borderColor": color,
+                    "borderWidth": 1
+                })
+            return {
+                "type": chart_type,
+                "labels": self._format_labels(table.index),
+                "datasets": datasets
+            }
+
+        # Single series, from the cube when it covers the request
+        if cube is not None and aggregation in self.CUBE_AGGREGATIONS and cube.has(x_col, y_col):
+            values = cube.aggregate(x_col, y_col, aggregation) if y_col else cube.counts(x_col)
+        elif y_col:
+            values = self._aggregate_series(df.groupby(x_col, observed=True)[y_col], aggregation)
+        else:
+            values = df.groupby(x_col, observed=True).size()
+
+        if chart_type == "line":
+            values = values.sort_index()
+            if len(values) > max_points:
+                step = len(values) // max_points + 1
+                values = values.iloc[::step]
+        else:
+            values = values.dropna().sort_values(ascending=False)
+            if chart_type == "pie" and len(values) > max_points:
+                other = values.iloc[max_points - 1:].sum()
+                values = values.iloc[:max_points - 1]
+                values["Other"] = other
+            else:
+                values = values.head(max_points)
+
+        dataset = {
+            "label": f"{value_label} by {x_col}",
+            "data": [None if pd.isna(v) else float(v) for v in values],
+            "borderWidth": 1
+        }
+        if chart_type == "pie":
+            dataset["backgroundColor"] = [self.CHART_PALETTE[i % len(self.CHART_PALETTE)] for i in range(len(values))]
+        else:
+            dataset["backgroundColor"] = "rgba(168, 85, 247, 0.7)"
+            dataset["borderColor"] = "#7928ca"
+
+        return {
+            "type": chart_type,
+            "labels": self._format_labels(values.index),
+            "datasets": [dataset]
+        }
+
+    def _custom_histogram(self, df: pd.DataFrame, x_col: str, group_col: Optional[str], max_points: int) -> Dict[str, Any]:
+        """Build a histogram of x with shared bin edges for every group."""
+        values = pd.to_numeric(df[x_col], errors='coerce')
+        finite = values.dropna()
+        if finite.empty:
+            raise ValueError(f"Column {x_col} has no numeric values")
+
+        bin_edges = np.histogram_bin_edges(finite.to_numpy(dtype=float), bins=max_points)
+        bin_labels = [f"{bin_edges[i]:.1f}-{bin_edges[i+1]:.1f}" for i in range(len(bin_edges)-1)]
+
+        if group_col:
+            groups = df[group_col].value_counts().index[:len(self.CHART_PALETTE)]
+            series = [(str(g), values[df[group_col] == g].dropna()) for g in groups]
+        else:
+            series = [(f"Distribution of {x_col}", finite)]
+
+        datasets = []
+        for i, (label, data) in enumerate(series):
+            hist, _ = np.histogram(data.to_numpy(dtype=float), bins=bin_edges)
+            datasets.append({
+                "label": label,
+                "data": hist.tolist(),
+                "backgroundColor": self.CHART_PALETTE[i % len(self.CHART_PALETTE)],
+                "borderWidth": 1
+            })
+        return {"type": "bar", "labels": bin_labels, "datasets": datasets}
+
+    def _custom_point_chart(self, df: pd.DataFrame, chart_type: str, x_col: str, y_col: Optional[str],
+                            group_col: Optional[str], size_col: Optional[str], max_points: int) -> Dict[str, Any]:
+        """Build a scatter or bubble chart, sampled down to the point budget."""
+        if not y_col:
+            raise ValueError("A y column is required for scatter and bubble charts")
+        if chart_type == "bubble" and not size_col:
+            raise ValueError("A size column is required for bubble charts")
+
+        # Keep only rows whose coordinates are finite numbers; NaN and inf are not valid JSON
+        numeric = {}
+        keep = np.ones(len(df), dtype=bool)
+        for col in dict.fromkeys(c for c in (x_col, y_col, size_col) if c):
+            values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+            finite = np.isfinite(values)
+            if not finite.any() and df[col].notna().any():
+                raise ValueError(f"Column {col} has no numeric values")
+            numeric[col] = values
+            keep &= finite
+
+        rows = np.flatnonzero(keep)
+        if len(rows) > max_points:
+            # Fixed seed so repeated requests return the same sample
+            rows = np.sort(np.random.default_rng(0).choice(rows, max_points, replace=False))
+
+        x = numeric[x_col][rows]
+        y = numeric[y_col][rows]
+        radius = None
+        if size_col:
+            size = numeric[size_col][rows]
+            size_min, size_max = size.min(), size.max()
+            # Scale the radius between 5 and 20
+            radius = 5 + (size - size_min) / max(size_max - size_min, 1e-12) * 15
+
+        if group_col:
+            group_values = df[group_col].iloc[rows].astype(str)
+            labels = group_values.to_numpy()
+            groups = list(group_values.value_counts().index[:len(self.CHART_PALETTE)])
+        else:
+            labels = None
+            groups = [None]
+
+        datasets = []
+        for i, group in enumerate(groups):
+            selected = np.ones(len(rows), dtype=bool) if group is None else labels == group
+            data = []
+            for j in np.flatnonzero(selected):
+                point = {"x": float(x[j]), "y": float(y[j])}
+                if chart_type == "bubble":
+                    point["r"] = float(radius[j])
+                data.append(point)
+            color = self.CHART_PALETTE[i % len(self.CHART_PALETTE)]
+            label = f"{x_col} vs {y_col}" if group is None else str(group)
+            datasets.append({
+                "label": label,
+                "data": data,
+                "backgroundColor": color,
+                "borderColor": color,
+                "borderWidth": 1
+            })
+        return {"type": chart_type, "datasets": datasets}
+
+    def _format_labels(self, index: pd.Index) -> List[Any]:
+        """Convert an index into JSON-friendly chart labels."""
+        if pd.api.types.is_datetime64_any_dtype(index):
+            return index.strftime('%Y-%m-%d').tolist()
+        return [v if isinstance(v, (int, float, str)) else str(v) for v in index.tolist()]
+
+
+# Marker stored in chart payloads that use the compact columnar encoding
+COLUMNAR_FORMAT = "columnar"
+
+
+def _pack_numbers(values: List[Any], float32: bool = False, precision: Optional[int] = None) -> List[Any]:
+    """
+    Pack a list of numbers into a compact JSON-ready list.
+
+    Args:
+        values: Numeric values (None/NaN allowed)
+        float32: Whether to reduce values to float32 precision
+        precision: Optional number of significant digits to keep
+
+    Returns:
+        List of floats/ints with NaN replaced by None
+    """
+    arr = np.asarray(values, dtype=np.float32 if float32 else np.float64)
+    missing = np.isnan(arr)
+    arr = arr.astype(np.float64)
+    if precision is not None:
+        # Significant rather than decimal digits, so small values keep their magnitude
+        digits = max(int(precision), 1)
+        packed = [float(f"{v:.{digits}g}") for v in arr]
+    elif float32:
+        # Seven significant digits is all a float32 carries; drop the noise digits
+        packed = [float(f"{v:.7g}") for v in arr]
+    else:
+        packed = arr.tolist()
+    if missing.any():
+        packed = [None if m else v for v, m in zip(packed, missing)]
+    return packed
+
+
+def _is_number_list(values: Any) -> bool:
+    """Check whether a value is a non-empty list of plain numbers."""
+    return (isinstance(values, list) and len(values) > 0 and
+            all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values))
+
+
+def _columnize_points(points: List[Dict[str, Any]], float32: bool, precision: Optional[int]) -> Dict[str, Any]:
+    """
+    Turn a list of per-point dicts into parallel arrays.
+
+    String-valued fields (e.g. heatmap axis labels) are dictionary encoded
+    into integer codes plus a ``dictionaries`` entry with the distinct values.
+    """
+    keys = []
+    for point in points:
+        for key in point:
+            if key not in keys:
+                keys.append(key)
+
+    columns = {}
+    dictionaries = {}
+    for key in keys:
+        values = [point.get(key) for point in points]
+        if _is_number_list(values):
+            columns[key] = _pack_numbers(values, float32, precision)
+        elif all(isinstance(v, str) for v in values):
+            categories = list(dict.fromkeys(values))
+            lookup = {v: i for i, v in enumerate(categories)}
+            columns[key] = [lookup[v] for v in values]
+            dictionaries[key] = categories
+        else:
+            columns[key] = values
+
+    packed = {"length": len(points), "columns": columns}
+    if dictionaries:
+        packed["dictionaries"] = dictionaries
+    return packed
+
+
+def to_columnar_payload(chart_data: Dict[str, Any], float32: bool = False, precision: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Convert a chart payload into the compact columnar format.
+
+    Point lists such as ``[{"x": .., "y": ..}, ...]`` become parallel arrays
+    and plain numeric data arrays are optionally reduced to float32 or a
+    number of significant digits. ``static/js/charts.js`` expands the result back with
+    ``ChartManager.expandPayload`` before rendering.
+
+    Args:
+        chart_data: Chart payload as returned by the ``generate_*`` methods
+        float32: Whether to reduce numbers to float32 precision
+        precision: Optional number of significant digits to keep
+
+    Returns:
+        Dict with the columnar chart payload
+    """
+    if not isinstance(chart_data, dict) or "error" in chart_data or chart_data.get("format") == COLUMNAR_FORMAT:
+        return chart_data
+
+    payload = dict(chart_data)
+    payload["format"] = COLUMNAR_FORMAT
+    datasets = chart_data.get("datasets", [])
+
+    # Heatmaps carry their cells directly in "datasets"
+    if datasets and all(isinstance(d, dict) and "data" not in d for d in datasets):
+        payload["datasets"] = _columnize_points(datasets, float32, precision)
+        return payload
+
+    packed_datasets = []
+    for dataset in datasets:
+        dataset = dict(dataset)
+        data = dataset.get("data")
+        # Single summary points (e.g. box plot stats) gain nothing from packing
+        if isinstance(data, list) and len(data) > 1 and all(isinstance(p, dict) for p in data):
+            dataset["data"] = _columnize_points(data, float32, precision)
+        elif _is_number_list(data) and (float32 or precision is not None):
+            dataset["data"] = _pack_numbers(data, float32, precision)
+        packed_datasets.append(dataset)
+    payload["datasets"] = packed_datasets
+    return payload
+
+
+def _expand_points(packed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rebuild a list of per-point dicts from parallel arrays."""
+    columns = packed.get("columns", {})
+    dictionaries = packed.get("dictionaries", {})
+    points = [{} for _ in range(packed.get("length", 0))]
+    for key, values in columns.items():
+        lookup = dictionaries.get(key)
+        for point, value in zip(points, values):
+            point[key] = lookup[value] if lookup is not None else value
+    return points
+
+
+def from_columnar_payload(chart_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Expand a columnar chart payload back into per-point datasets.
+
+    Inverse of ``to_columnar_payload`` (the Python counterpart of
+    ``ChartManager.expandPayload``); other payloads are returned unchanged.
+
+    Args:
+        chart_data: Chart payload, columnar or not
+
+    Returns:
+        Dict with the expanded chart payload
+    """
+    if not isinstance(chart_data, dict) or chart_data.get("format") != COLUMNAR_FORMAT:
+        return chart_data
+
+    def is_packed(value: Any) -> bool:
+        return isinstance(value, dict) and "columns" in value
+
+    expanded = dict(chart_data)
+    del expanded["format"]
+    datasets = chart_data.get("datasets", [])
+    if is_packed(datasets):
+        # Heatmap cells are stored directly in "datasets"
+        expanded["datasets"] = _expand_points(datasets)
+    else:
+        expanded["datasets"] = [
+            dict(dataset, data=_expand_points(dataset["data"])) if is_packed(dataset.get("data")) else dataset
+            for dataset in datasets
+        ]
+    return expanded
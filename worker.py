@@ -0,0 +1,46 @@
+import signal
+import logging
+import argparse
+import threading
+
+from app import create_app
+from jobs import JobWorker, DEFAULT_LEASE_SECONDS, DEFAULT_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run background job workers until interrupted."""
+    parser = argparse.ArgumentParser(description="Run SmartDataHub background job workers.")
+    parser.add_argument('--threads', type=int, default=2,
+                        help="Number of worker threads in this process")
+    parser.add_argument('--lease', type=int, default=DEFAULT_LEASE_SECONDS,
+                        help="Seconds a job may go without progress before other workers take it over")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Seconds to wait between polls when the queue is empty")
+    args = parser.parse_args()
+
+    # This process runs its own workers below
+    app = create_app(job_workers=0)
+
+    workers = [JobWorker(app, lease_seconds=args.lease, poll_interval=args.poll_interval)
+               for _ in range(max(args.threads, 1))]
+    threads = [threading.Thread(target=worker.run, name=f'job-worker-{index}')
+               for index, worker in enumerate(workers)]
+
+    def shutdown(signum, frame):
+        logger.info("Stopping job workers after their current jobs")
+        for worker in workers:
+            worker.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == '__main__':
+    main()